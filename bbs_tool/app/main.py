@@ -1,7 +1,29 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+from ..extract.cache import ExtractionCache
+from ..extract.ocr_pool import OCRPool
+from ..jobs.api import job_routes, submit_upload
+from ..jobs.runner import JobRunner
+from ..jobs.store import JobStore
+from ..metrics import instrument
+
+ocr_pool = OCRPool()
+job_runner = JobRunner(JobStore(), ocr_pool, ExtractionCache())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_runner.store.remove_stale_dirs()
+    yield
+    job_runner.shutdown(wait=False)
+    ocr_pool.shutdown()
 
-app = FastAPI(title="Automated Bar Bending Schedule (BBS) Tool", version="0.1.0")
+
+app = FastAPI(title="Automated Bar Bending Schedule (BBS) Tool", version="0.1.0", lifespan=lifespan)
 
 # CORS for local UI testing
 app.add_middleware(
@@ -11,6 +33,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+instrument(app, "app")
 
 
 @app.get("/health")
@@ -19,8 +42,19 @@ async def health_check():
     return {"status": "ok"}
 
 
-@app.post("/upload-drawing")
-async def upload_drawing(file: UploadFile = File(...)):
-    """Upload a drawing file (image/PDF) and trigger BBS generation (placeholder)."""
-    # TODO: Save file temporarily, call OCR + shape detection + calculations
-    return {"filename": file.filename, "detail": "Processing not yet implemented"}
\ No newline at end of file
+def _source_type(file: UploadFile) -> str:
+    name = (file.filename or "").lower()
+    if name.endswith(".pdf") or file.content_type == "application/pdf":
+        return "pdf"
+    if name.endswith(".csv") or file.content_type == "text/csv":
+        return "csv"
+    return "image"
+
+
+@app.post("/upload-drawing", status_code=202)
+async def upload_drawing(file: UploadFile = File(...)) -> JSONResponse:
+    """Upload a drawing (image/PDF) or CSV schedule and queue BBS generation; poll /jobs/{job_id}."""
+    return await submit_upload(job_runner, _source_type(file), file)
+
+
+app.include_router(job_routes(job_runner))
@@ -0,0 +1,222 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from ..models.schemas import BBSItem, BBSCalculationConfig
+from ..recognition.shape_recognizer import normalize_shape_label
+from .is2502 import SHAPES, AllowanceTable, allowance_table, calculate_cutting_length_for_item
+
+
+# Dimension labels stored as fixed columns; anything else stays on the item.
+DIM_LABELS: Tuple[str, ...] = ("A", "B", "C", "D", "E", "F")
+_DIM_INDEX = {label: i for i, label in enumerate(DIM_LABELS)}
+
+
+@dataclass
+class ItemColumns:
+    """Columnar view of a list of BBS items.
+
+    ``dims_mm`` is an (n, 6) matrix over ``DIM_LABELS``; ``dims_present`` marks
+    which cells were actually given so a legitimate NaN is not mistaken for a
+    missing dimension.
+    """
+
+    bar_marks: List[str]
+    shapes: List[str]
+    normalized_shapes: np.ndarray
+    diameter_mm: np.ndarray
+    quantity: np.ndarray
+    dims_mm: np.ndarray
+    dims_present: np.ndarray
+    extra_dims: np.ndarray
+    items: Sequence[BBSItem] = field(default_factory=list, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.bar_marks)
+
+    def dim(self, label: str) -> np.ndarray:
+        return self.dims_mm[:, _DIM_INDEX[label]]
+
+    def has_dim(self, label: str) -> np.ndarray:
+        return self.dims_present[:, _DIM_INDEX[label]]
+
+    @classmethod
+    def from_items(cls, items: Sequence[BBSItem]) -> "ItemColumns":
+        n = len(items)
+        bar_marks = [item.bar_mark for item in items]
+        shapes = [item.shape for item in items]
+        shape_cache: Dict[str, str] = {}
+        for label in set(shapes):
+            shape_cache[label] = normalize_shape_label(label)
+        normalized = np.asarray([shape_cache[label] for label in shapes], dtype=object)
+        diameter = np.fromiter((item.diameter_mm for item in items), dtype=np.float64, count=n)
+        quantity = np.fromiter((item.quantity for item in items), dtype=np.int64, count=n)
+        dims = np.zeros((n, len(DIM_LABELS)), dtype=np.float64)
+        present = np.zeros((n, len(DIM_LABELS)), dtype=bool)
+        extra = np.zeros(n, dtype=bool)
+
+        # Most schedules only use A/B, so fill column-wise from a single pass
+        rows: List[int] = []
+        cols: List[int] = []
+        vals: List[float] = []
+        index = _DIM_INDEX
+        for i, item in enumerate(items):
+            for k, v in item.dims_mm.items():
+                j = index.get(k)
+                if j is None:
+                    extra[i] = True
+                    continue
+                rows.append(i)
+                cols.append(j)
+                vals.append(v)
+        if rows:
+            dims[rows, cols] = vals
+            present[rows, cols] = True
+
+        return cls(
+            bar_marks=bar_marks,
+            shapes=shapes,
+            normalized_shapes=normalized,
+            diameter_mm=diameter,
+            quantity=quantity,
+            dims_mm=dims,
+            dims_present=present,
+            extra_dims=extra,
+            items=items,
+        )
+
+
+def round_half_like_python(values: np.ndarray, ndigits: int) -> List[float]:
+    """Round like the builtin ``round`` but vectorized.
+
+    ``np.round`` scales, rounds and unscales, which can disagree with Python's
+    correctly-rounded ``round`` for values sitting right on a half step. Those few
+    values are re-rounded with the builtin so output matches the scalar path.
+    """
+    out = np.round(values, ndigits)
+    scaled = values * (10.0 ** ndigits)
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    rounded = out.tolist()
+    for i in np.flatnonzero(near_half).tolist():
+        rounded[i] = round(float(values[i]), ndigits)
+    return rounded
+
+
+@dataclass
+class BatchResult:
+    columns: ItemColumns
+    cutting_length_mm: np.ndarray
+    unit_weight_kg_per_m: np.ndarray
+    total_length_m: np.ndarray
+    total_weight_kg: np.ndarray
+    ok: np.ndarray
+    errors: Dict[int, str]
+
+    def to_records(self) -> List[Dict[str, float | int | str]]:
+        """Result rows in the same shape and rounding as the scalar endpoint."""
+        cols = self.columns
+        idx = np.flatnonzero(self.ok)
+        bar_marks = cols.bar_marks
+        shapes = cols.shapes
+        return [
+            {
+                "bar_mark": bar_marks[i],
+                "shape": shapes[i],
+                "diameter_mm": d,
+                "cutting_length_mm": cl,
+                "unit_weight_kg_per_m": uw,
+                "quantity": q,
+                "total_length_m": tl,
+                "total_weight_kg": tw,
+            }
+            for i, d, cl, uw, q, tl, tw in zip(
+                idx.tolist(),
+                cols.diameter_mm[idx].tolist(),
+                round_half_like_python(self.cutting_length_mm[idx], 1),
+                round_half_like_python(self.unit_weight_kg_per_m[idx], 4),
+                cols.quantity[idx].tolist(),
+                round_half_like_python(self.total_length_m[idx], 3),
+                round_half_like_python(self.total_weight_kg[idx], 3),
+            )
+        ]
+
+
+def calculate_batch(items: ItemColumns | Sequence[BBSItem], config: BBSCalculationConfig) -> BatchResult:
+    """Vectorized equivalent of calculate_cutting_length_for_item over a whole schedule.
+
+    Items are grouped by normalized shape and each group is computed with NumPy
+    array operations. Rows that the scalar path would reject are marked not ok and
+    their error message is taken from the scalar function itself.
+    """
+    cols = items if isinstance(items, ItemColumns) else ItemColumns.from_items(items)
+    table = allowance_table(config)
+    n = len(cols)
+    d = cols.diameter_mm
+    cutting = np.full(n, np.nan, dtype=np.float64)
+    ok = np.zeros(n, dtype=bool)
+
+    a_all = cols.dim("A")
+    b_all = cols.dim("B")
+    for shape in set(cols.normalized_shapes.tolist()):
+        spec = SHAPES.get(shape)
+        if spec is None:
+            continue
+        required, factor, _ = spec
+        rows = cols.normalized_shapes == shape
+        for label in required:
+            rows &= cols.has_dim(label)
+        idx = np.flatnonzero(rows)
+        if idx.size == 0:
+            continue
+        if len(required) == 1:
+            total = a_all[idx].copy()
+        elif factor == 1:
+            total = a_all[idx] + b_all[idx]
+        else:
+            total = factor * (a_all[idx] + b_all[idx])
+        # Allowances only depend on the diameter; look up each distinct one once
+        for term in _term_columns(table, shape, d[idx]):
+            total = total + term
+        cutting[idx] = total
+        ok[idx] = True
+
+    errors: Dict[int, str] = {}
+    if cols.items:
+        for i in np.flatnonzero(~ok).tolist():
+            try:
+                calculate_cutting_length_for_item(cols.items[i], config, table)
+            except Exception as ex:
+                errors[i] = str(ex)
+            else:
+                errors[i] = "batch engine could not evaluate item"
+    else:
+        for i in np.flatnonzero(~ok).tolist():
+            errors[i] = f"Unsupported shape or missing dims for shape: {cols.normalized_shapes[i]}"
+
+    unit_wt = _lookup(d, table.unit_weight)
+    total_length = (cutting / 1000.0) * cols.quantity
+    total_weight = unit_wt * total_length
+    return BatchResult(
+        columns=cols,
+        cutting_length_mm=cutting,
+        unit_weight_kg_per_m=unit_wt,
+        total_length_m=total_length,
+        total_weight_kg=total_weight,
+        ok=ok,
+        errors=errors,
+    )
+
+
+def _lookup(diameters: np.ndarray, fn: Callable[[float], float]) -> np.ndarray:
+    uniq, inverse = np.unique(diameters, return_inverse=True)
+    return np.array([fn(float(u)) for u in uniq], dtype=np.float64)[inverse]
+
+
+def _term_columns(table: AllowanceTable, shape: str, diameters: np.ndarray) -> List[np.ndarray]:
+    uniq, inverse = np.unique(diameters, return_inverse=True)
+    per_diameter = np.array([table.terms(shape, float(u)) for u in uniq], dtype=np.float64)
+    if per_diameter.ndim < 2 or per_diameter.shape[1] == 0:
+        return []
+    return [per_diameter[:, k][inverse] for k in range(per_diameter.shape[1])]
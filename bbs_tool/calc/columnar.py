@@ -0,0 +1,192 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+import json
+
+import numpy as np
+
+from ..metrics import ITEMS, stage_timer
+from ..models.schemas import BBSCalculationConfig
+from ..recognition.shape_recognizer import normalize_shape_label
+from ..validation.engine import BatchValidator
+from .batch import DIM_LABELS, BatchResult, ItemColumns, calculate_batch, round_half_like_python
+from .stream import RESULT_FIELDS
+
+# Arrow IPC stream and Parquet bodies; pyarrow is only imported when one is used
+COLUMNAR_MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+_MEDIA_ALIASES = {"application/x-parquet": "parquet"}
+
+REQUIRED_COLUMNS = ("bar_mark", "shape", "diameter_mm")
+
+
+def _pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as ex:
+        raise RuntimeError("Arrow and Parquet bodies need pyarrow (pip install pyarrow)") from ex
+    return pyarrow
+
+
+def columnar_format(media_type: str | None) -> str | None:
+    """'arrow' or 'parquet' for a Content-Type / Accept value, else None."""
+    if not media_type:
+        return None
+    for part in media_type.split(","):
+        mime = part.split(";")[0].strip().lower()
+        for fmt, known in COLUMNAR_MEDIA_TYPES.items():
+            if mime == known:
+                return fmt
+        if mime in _MEDIA_ALIASES:
+            return _MEDIA_ALIASES[mime]
+    return None
+
+
+def read_table(body: bytes, fmt: str) -> Any:
+    pa = _pyarrow()
+    buf = pa.py_buffer(body)
+    try:
+        if fmt == "parquet":
+            return pa.parquet.read_table(pa.BufferReader(buf))
+        return pa.ipc.open_stream(buf).read_all()
+    except (pa.ArrowInvalid, OSError) as ex:
+        raise ValueError(f"Could not read {fmt} body: {ex}") from ex
+
+
+def write_table(table: Any, fmt: str) -> bytes:
+    pa = _pyarrow()
+    sink = pa.BufferOutputStream()
+    if fmt == "parquet":
+        pa.parquet.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def columns_from_table(table: Any, warnings: List[str]) -> ItemColumns:
+    """ItemColumns from an Arrow table with bar_mark, shape, diameter_mm, quantity and A-F columns.
+
+    Rules mirror BBSItem but are checked a column at a time; failing rows are
+    dropped with a ``row N: field: message`` warning (rows count from 1).
+    Numeric columns without nulls are handed to NumPy without copying. A null
+    dimension means the dimension was not given.
+    """
+    pa = _pyarrow()
+    pc = pa.compute
+    missing = [name for name in REQUIRED_COLUMNS if name not in table.column_names]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    n = table.num_rows
+    bad: Dict[int, str] = {}
+
+    def numeric(name: str, dtype: Any, default: float) -> Tuple[np.ndarray, np.ndarray]:
+        if name not in table.column_names:
+            return np.full(n, default, dtype=dtype.to_pandas_dtype()), np.zeros(n, dtype=bool)
+        try:
+            column = table.column(name).cast(dtype)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as ex:
+            raise ValueError(f"Column {name}: {ex}") from ex
+        if column.null_count:
+            nulls = column.is_null().to_numpy(zero_copy_only=False)
+            column = column.fill_null(default)
+        else:
+            nulls = np.zeros(n, dtype=bool)
+        return column.to_numpy(), nulls
+
+    def reject(mask: np.ndarray, message: str) -> None:
+        for i in np.flatnonzero(mask).tolist():
+            bad.setdefault(i, message)
+
+    def strings(name: str) -> Any:
+        column = table.column(name).cast(pa.string())
+        reject(column.is_null().to_numpy(zero_copy_only=False), f"{name}: Field required")
+        return column
+
+    bar_marks = strings("bar_mark")
+    shapes = strings("shape")
+    diameter, no_diameter = numeric("diameter_mm", pa.float64(), 0.0)
+    reject(no_diameter, "diameter_mm: Field required")
+    reject(~(diameter > 0), "diameter_mm: Input should be greater than 0")
+    quantity, _ = numeric("quantity", pa.int64(), 1)
+    reject(quantity < 1, "quantity: Input should be greater than or equal to 1")
+
+    dims = np.zeros((n, len(DIM_LABELS)), dtype=np.float64)
+    present = np.zeros((n, len(DIM_LABELS)), dtype=bool)
+    for j, label in enumerate(DIM_LABELS):
+        if label in table.column_names:
+            dims[:, j], nulls = numeric(label, pa.float64(), 0.0)
+            present[:, j] = ~nulls
+
+    if bad:
+        for i in sorted(bad):
+            warnings.append(f"row {i + 1}: {bad[i]}")
+        keep = np.ones(n, dtype=bool)
+        keep[list(bad)] = False
+        rows = pa.array(np.flatnonzero(keep))
+        bar_marks, shapes = bar_marks.take(rows), shapes.take(rows)
+        diameter, quantity = diameter[keep], quantity[keep]
+        dims, present = dims[keep], present[keep]
+
+    # Normalize each distinct shape label once
+    encoded = shapes.combine_chunks().dictionary_encode()
+    labels = np.asarray([normalize_shape_label(s) for s in encoded.dictionary.to_pylist()], dtype=object)
+    normalized = labels[encoded.indices.to_numpy(zero_copy_only=False)] if len(labels) else np.empty(0, dtype=object)
+    return ItemColumns(
+        bar_marks=bar_marks.to_pylist(),
+        shapes=shapes.to_pylist(),
+        normalized_shapes=normalized,
+        diameter_mm=diameter,
+        quantity=quantity,
+        dims_mm=dims,
+        dims_present=present,
+        extra_dims=np.zeros(len(diameter), dtype=bool),
+    )
+
+
+def results_table(result: BatchResult, warnings: List[str]) -> Any:
+    """Calculated rows as an Arrow table with the RESULT_FIELDS columns.
+
+    Rounding matches the JSON endpoint; warnings travel as a JSON list in the
+    schema metadata under ``warnings``.
+    """
+    pa = _pyarrow()
+    cols = result.columns
+    idx = np.flatnonzero(result.ok)
+    data = {
+        "bar_mark": pa.array(cols.bar_marks, pa.string()).take(pa.array(idx)),
+        "shape": pa.array(cols.shapes, pa.string()).take(pa.array(idx)),
+        "diameter_mm": cols.diameter_mm[idx],
+        "cutting_length_mm": pa.array(round_half_like_python(result.cutting_length_mm[idx], 1), pa.float64()),
+        "unit_weight_kg_per_m": pa.array(round_half_like_python(result.unit_weight_kg_per_m[idx], 4), pa.float64()),
+        "quantity": cols.quantity[idx],
+        "total_length_m": pa.array(round_half_like_python(result.total_length_m[idx], 3), pa.float64()),
+        "total_weight_kg": pa.array(round_half_like_python(result.total_weight_kg[idx], 3), pa.float64()),
+    }
+    return pa.table({name: data[name] for name in RESULT_FIELDS}, metadata={"warnings": json.dumps(warnings)})
+
+
+def calculate_columnar(body: bytes, in_fmt: str, out_fmt: str, config: BBSCalculationConfig) -> bytes:
+    """Decode, validate and calculate a columnar schedule and encode the results.
+
+    Warnings come in the order of the other calculate paths: rejected rows
+    first, then each row's validation issues and calculation failures.
+    """
+    warnings: List[str] = []
+    with stage_timer("calculate.decode"):
+        columns = columns_from_table(read_table(body, in_fmt), warnings)
+    with stage_timer("calculate.compute"):
+        result = calculate_batch(columns, config)
+    with stage_timer("calculate.validate"):
+        issues = BatchValidator(config).validate(columns)
+    for i in sorted(set(issues) | set(result.errors)):
+        row_issues = issues.get(i, ())
+        warnings.extend(issue.message for issue in row_issues)
+        if i in result.errors and not any(issue.severity == "error" for issue in row_issues):
+            warnings.append(f"Calculation failed for {columns.bar_marks[i]}: {result.errors[i]}")
+    ITEMS.inc(len(columns), "calculated")
+    with stage_timer("calculate.serialize"):
+        return write_table(results_table(result, warnings), out_fmt)
@@ -0,0 +1,240 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+import math
+import time
+
+import numpy as np
+
+from ..models.schemas import BBSItem, BBSCalculationConfig, CuttingStockConfig
+from .batch import ItemColumns, calculate_batch
+
+
+@dataclass
+class CuttingPattern:
+    """One way of cutting a stock bar, repeated ``bars`` times."""
+
+    cuts: List[Tuple[int, int]]  # (piece length mm, pieces per bar), longest first
+    bars: int
+    offcut_mm: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cuts": [{"length_mm": length, "count": count} for length, count in self.cuts],
+            "bars": self.bars,
+            "offcut_mm": round(self.offcut_mm, 1),
+        }
+
+
+@dataclass
+class DiameterPlan:
+    diameter_mm: float
+    stock_length_mm: float
+    pieces: int
+    bars: int
+    lower_bound: int
+    used_length_mm: float
+    method: str
+    patterns: List[CuttingPattern] = field(default_factory=list)
+
+    @property
+    def wastage_pct(self) -> float:
+        stock = self.bars * self.stock_length_mm
+        return 100.0 * (stock - self.used_length_mm) / stock if stock else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "diameter_mm": self.diameter_mm,
+            "stock_length_mm": self.stock_length_mm,
+            "pieces": self.pieces,
+            "stock_bars": self.bars,
+            "lower_bound_bars": self.lower_bound,
+            "wastage_pct": round(self.wastage_pct, 2),
+            "method": self.method,
+            "patterns": [p.to_dict() for p in self.patterns],
+        }
+
+
+def optimize_cutting(items: ItemColumns | Sequence[BBSItem], config: BBSCalculationConfig,
+                     stock: CuttingStockConfig) -> Tuple[List[DiameterPlan], List[str]]:
+    """Cutting patterns per diameter for a whole schedule; returns (plans, warnings).
+
+    Demand is aggregated to (diameter, length rounded up to the mm) -> piece
+    count, so a mark with quantity 10,000 costs the same as one with 1.
+    Pieces longer than a stock bar are left out with a warning.
+    """
+    cols = items if isinstance(items, ItemColumns) else ItemColumns.from_items(items)
+    result = calculate_batch(cols, config)
+    warnings = [f"Calculation failed for {cols.bar_marks[i]}: {msg}" for i, msg in sorted(result.errors.items())]
+
+    ok = np.flatnonzero(result.ok)
+    length = np.ceil(result.cutting_length_mm[ok] - 1e-9).astype(np.int64)
+    oversize = length > stock.stock_length_mm
+    for i in ok[oversize].tolist():
+        warnings.append(f"{cols.bar_marks[i]}: cutting length {result.cutting_length_mm[i]:.0f} mm exceeds "
+                        f"the {stock.stock_length_mm:.0f} mm stock bar; lap or couple it separately")
+    ok, length = ok[~oversize], length[~oversize]
+    empty = length <= 0
+    for i in ok[empty].tolist():
+        warnings.append(f"{cols.bar_marks[i]}: cutting length is not positive; left out of the cutting plan")
+    ok, length = ok[~empty], length[~empty]
+
+    diameters = cols.diameter_mm[ok]
+    quantity = cols.quantity[ok]
+    groups = sorted(set(diameters.tolist()))
+    deadline = time.perf_counter() + stock.time_budget_s
+    plans = []
+    for n, diameter in enumerate(groups):
+        rows = diameters == diameter
+        lengths, inverse = np.unique(length[rows], return_inverse=True)
+        counts = np.bincount(inverse, weights=quantity[rows]).astype(np.int64)
+        # Split what is left of the budget evenly over the diameters still to do
+        budget = max(deadline - time.perf_counter(), 0.0) / (len(groups) - n)
+        plans.append(plan_diameter(diameter, lengths[::-1], counts[::-1], stock, budget))
+    return plans, warnings
+
+
+def plan_diameter(diameter_mm: float, lengths: np.ndarray, counts: np.ndarray, stock: CuttingStockConfig,
+                  budget_s: float) -> DiameterPlan:
+    """Plan one diameter; ``lengths`` are distinct whole-mm piece lengths, longest first.
+
+    First-fit-decreasing gives the baseline. While the budget lasts, DP-built
+    plans are tried with sequential value correction and the best is kept if
+    it needs fewer bars. Pieces a DP round has not placed when the budget
+    runs out are finished with first-fit-decreasing.
+    """
+    # A kerf is lost per cut; the last piece on a bar needs none, hence capacity + kerf
+    kerf = int(math.ceil(stock.kerf_mm))
+    capacity = int(stock.stock_length_mm) + kerf
+    weights = lengths.astype(np.int64) + kerf
+    lower_bound = int(math.ceil(int(weights @ counts) / capacity)) if len(counts) else 0
+
+    deadline = time.perf_counter() + budget_s
+    plan, method = _first_fit_decreasing(weights, counts.copy(), capacity), "ffd"
+    if _bars(plan) > lower_bound and budget_s > 0:
+        dp_plan = _value_correction(weights, counts, capacity, lower_bound, deadline)
+        if dp_plan is not None and _bars(dp_plan) < _bars(plan):
+            plan, method = dp_plan, "dp"
+
+    stock_mm = float(stock.stock_length_mm)
+    patterns = []
+    for take, bars in plan:
+        idx = np.flatnonzero(take)
+        used = int(lengths[idx] @ take[idx])
+        cuts = list(zip(lengths[idx].tolist(), take[idx].tolist()))
+        patterns.append(CuttingPattern(cuts=cuts, bars=bars, offcut_mm=stock_mm - used - kerf * (int(take.sum()) - 1)))
+    patterns.sort(key=lambda p: -p.bars)
+    return DiameterPlan(
+        diameter_mm=diameter_mm,
+        stock_length_mm=stock_mm,
+        pieces=int(counts.sum()),
+        bars=_bars(plan),
+        lower_bound=lower_bound,
+        used_length_mm=float(lengths @ counts),
+        method=method,
+        patterns=patterns,
+    )
+
+
+Plan = List[Tuple[np.ndarray, int]]  # (pieces of each length on the bar, bars cut this way)
+
+
+def _bars(plan: Plan) -> int:
+    return sum(bars for _, bars in plan)
+
+
+def _repeat(plan: Plan, take: np.ndarray, remaining: np.ndarray) -> None:
+    used = take > 0
+    bars = int((remaining[used] // take[used]).min())
+    remaining -= bars * take
+    plan.append((take, bars))
+
+
+def _first_fit_decreasing(weights: np.ndarray, remaining: np.ndarray, capacity: int) -> Plan:
+    """FFD on aggregated counts: fill a bar longest-first, then cut as many identical bars as the counts allow.
+
+    ``remaining`` is consumed in place.
+    """
+    plan: Plan = []
+    w = weights.tolist()
+    while True:
+        open_rows = np.flatnonzero(remaining).tolist()
+        if not open_rows:
+            return plan
+        shortest = w[open_rows[-1]]
+        take = np.zeros(len(w), dtype=np.int64)
+        space = capacity
+        for j in open_rows:
+            k = min(int(remaining[j]), space // w[j])
+            if k:
+                take[j] = k
+                space -= k * w[j]
+                if space < shortest:
+                    break
+        _repeat(plan, take, remaining)
+
+
+def _value_correction(weights: np.ndarray, counts: np.ndarray, capacity: int, lower_bound: int,
+                      deadline: float) -> Plan | None:
+    """Sequential value correction: the best of several DP-built plans under a deadline.
+
+    Each round builds a plan by repeatedly cutting the bar pattern of highest
+    total piece value (a bounded knapsack DP) as often as the counts allow.
+    Values start at the piece lengths; after each round a length's value is
+    pulled towards its length divided by the fill ratio of the bars it was cut
+    from, so pieces that ended up on wasteful bars are preferred next round.
+    """
+    values = weights.astype(np.float64)
+    best: Plan | None = None
+    while time.perf_counter() < deadline:
+        remaining = counts.copy()
+        plan: Plan = []
+        while remaining.any() and time.perf_counter() < deadline:
+            _repeat(plan, _best_pattern(weights, values, remaining, capacity), remaining)
+        plan += _first_fit_decreasing(weights, remaining, capacity)
+        if best is None or _bars(plan) < _bars(best):
+            best = plan
+        if _bars(best) == lower_bound:
+            break
+
+        corrected = np.zeros_like(values)
+        cut = np.zeros_like(values)
+        for take, bars in plan:
+            fill = int(weights @ take) / capacity
+            rows = take > 0
+            corrected[rows] += weights[rows] / fill * take[rows] * bars
+            cut[rows] += take[rows] * bars
+        values = 0.5 * values + 0.5 * np.where(cut > 0, corrected / np.maximum(cut, 1), values)
+    return best
+
+
+def _best_pattern(weights: np.ndarray, values: np.ndarray, remaining: np.ndarray, capacity: int) -> np.ndarray:
+    """Pieces per length for one bar maximising total value (bounded knapsack).
+
+    Counts are split into 1, 2, 4, ... bundles so each bundle is a 0/1 item.
+    The DP keeps, per bundle, which capacities it improved; walking the
+    bundles backwards from the best capacity recovers the chosen set.
+    """
+    best = np.zeros(capacity + 1)
+    steps: List[Tuple[int, int, int, np.ndarray]] = []  # (length row, pieces, weight, improved)
+    for j in np.flatnonzero(remaining).tolist():
+        w = int(weights[j])
+        left = min(int(remaining[j]), capacity // w)
+        size = 1
+        while left:
+            k = min(size, left)
+            total = k * w
+            candidate = best[:capacity + 1 - total] + k * values[j]
+            improved = candidate > best[total:]
+            best[total:][improved] = candidate[improved]
+            steps.append((j, k, total, improved))
+            left -= k
+            size *= 2
+
+    take = np.zeros(len(weights), dtype=np.int64)
+    c = int(np.argmax(best))
+    for j, k, total, improved in reversed(steps):
+        if c >= total and improved[c - total]:
+            take[j] += k
+            c -= total
+    return take
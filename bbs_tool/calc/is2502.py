@@ -1,6 +1,8 @@
 from __future__ import annotations
-from typing import Dict
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
 from math import pi
+import threading
 
 from ..models.schemas import BBSItem, BBSCalculationConfig
 from ..recognition.shape_recognizer import normalize_shape_label
@@ -27,50 +29,125 @@ def unit_weight_kg_per_m(diameter_mm: float, config: BBSCalculationConfig) -> fl
     return area_mm2 * config.steel_density_kg_per_m3 / 1_000_000.0
 
 
-def calculate_cutting_length_for_item(item: BBSItem, config: BBSCalculationConfig) -> float:
+# Diameters (mm) every table is pre-filled with; anything else is added on first use
+STANDARD_DIAMETERS_MM = (8.0, 10.0, 12.0, 16.0, 20.0, 25.0, 28.0, 32.0, 36.0, 40.0)
+ALLOWANCE_TABLE_CACHE_SIZE = 32
+
+
+def _allowance_terms(angle: float, bends: int, hook_angle: int | None = None):
+    def terms(d: float, config: BBSCalculationConfig, r: float | None) -> Tuple[float, ...]:
+        out = (bends * bend_allowance_mm(angle, d, config, r),)
+        if hook_angle is not None:
+            out += (2 * hook_extension_mm(hook_angle, d, config),)
+        return out
+    return terms
+
+
+# Normalized shape -> (required dims, dims factor, allowance terms). Cutting length is
+# dims factor * sum(dims) followed by each allowance term, added in order.
+SHAPES: Dict[str, Tuple[Tuple[str, ...], int, Callable[[float, BBSCalculationConfig, float | None], Tuple[float, ...]]]] = {
+    "STRAIGHT": (("A",), 1, lambda d, config, r: ()),
+    # L-shaped bar with one 90° bend; dims A,B as legs on centreline
+    "L_90": (("A", "B"), 1, _allowance_terms(90.0, 1)),
+    "L_135": (("A", "B"), 1, _allowance_terms(135.0, 1)),
+    # Open U-shaped bar (like stirrup with two 135° bends and hook extensions)
+    "U_135_OPEN": (("A", "B"), 1, _allowance_terms(135.0, 2, hook_angle=135)),
+    # Closed rectangular stirrup, dims A,B are the centreline sides; four 90° bends
+    "STIRRUP_RECT": (("A", "B"), 2, _allowance_terms(90.0, 4)),
+}
+
+
+def missing_dims_message(shape: str, required: Tuple[str, ...]) -> str:
+    if required == ("A",):
+        return f"{shape} requires dim A (centreline length in mm)"
+    return f"{shape} requires dims {' and '.join(required)} (centreline)"
+
+
+def config_key(config: BBSCalculationConfig) -> Tuple:
+    """Hashable, order-independent fingerprint of a calculation config."""
+    key = []
+    for name in type(config).model_fields:
+        value = getattr(config, name)
+        if isinstance(value, dict):
+            value = tuple(sorted(value.items()))
+        key.append((name, value))
+    return tuple(key)
+
+
+class AllowanceTable:
+    """Per-config memo of the fixed part of each cutting length.
+
+    Maps (shape, diameter, bend radius) to the bend/hook allowance terms and
+    diameter to unit weight, so per-bar work is a dict lookup plus the
+    dimension sum. Terms are stored separately and added in the original order
+    so results stay bit-identical to the direct formulas.
+    """
+
+    def __init__(self, config: BBSCalculationConfig):
+        self.config = config.model_copy(deep=True)
+        self._terms: Dict[Tuple[str, float, float | None], Tuple[float, ...]] = {}
+        self._weights: Dict[float, float] = {}
+        for d in STANDARD_DIAMETERS_MM:
+            self.unit_weight(d)
+            for shape in SHAPES:
+                self.terms(shape, d)
+
+    def terms(self, shape: str, diameter_mm: float, radius_mm: float | None = None) -> Tuple[float, ...]:
+        key = (shape, diameter_mm, radius_mm)
+        try:
+            return self._terms[key]
+        except KeyError:
+            value = self._terms[key] = SHAPES[shape][2](diameter_mm, self.config, radius_mm)
+            return value
+
+    def unit_weight(self, diameter_mm: float) -> float:
+        try:
+            return self._weights[diameter_mm]
+        except KeyError:
+            value = self._weights[diameter_mm] = unit_weight_kg_per_m(diameter_mm, self.config)
+            return value
+
+
+_TABLES: "OrderedDict[Tuple, AllowanceTable]" = OrderedDict()
+_TABLES_LOCK = threading.Lock()
+
+
+def allowance_table(config: BBSCalculationConfig) -> AllowanceTable:
+    """Shared AllowanceTable for ``config``, kept in a small LRU across configs."""
+    key = config_key(config)
+    with _TABLES_LOCK:
+        table = _TABLES.get(key)
+        if table is not None:
+            _TABLES.move_to_end(key)
+            return table
+    table = AllowanceTable(config)
+    with _TABLES_LOCK:
+        _TABLES[key] = table
+        while len(_TABLES) > ALLOWANCE_TABLE_CACHE_SIZE:
+            _TABLES.popitem(last=False)
+    return table
+
+
+def calculate_cutting_length_for_item(item: BBSItem, config: BBSCalculationConfig,
+                                      table: AllowanceTable | None = None) -> float:
     shape = normalize_shape_label(item.shape)
-    d = item.diameter_mm
+    spec = SHAPES.get(shape)
+    if spec is None:
+        raise ValueError(f"Unsupported shape: {shape}")
+    required, factor, _ = spec
     dims = item.dims_mm
+    for label in required:
+        if label not in dims:
+            raise ValueError(missing_dims_message(shape, required))
 
-    if shape == "STRAIGHT":
-        if "A" not in dims:
-            raise ValueError("STRAIGHT requires dim A (centreline length in mm)")
-        return float(dims["A"])  # centreline length
-
-    if shape == "L_90":
-        # L-shaped bar with one 90° bend; dims A,B as legs on centreline
-        a = dims.get("A")
-        b = dims.get("B")
-        if a is None or b is None:
-            raise ValueError("L_90 requires dims A and B (centreline)")
-        return float(a + b + bend_allowance_mm(90.0, d, config))
-
-    if shape == "L_135":
-        a = dims.get("A")
-        b = dims.get("B")
-        if a is None or b is None:
-            raise ValueError("L_135 requires dims A and B (centreline)")
-        return float(a + b + bend_allowance_mm(135.0, d, config))
-
-    if shape == "U_135_OPEN":
-        # Open U-shaped bar (like stirrup with two 135° bends and hook extensions)
-        # dims A,B are the legs; optional hook angle defaults to 135°
-        a = dims.get("A")
-        b = dims.get("B")
-        if a is None or b is None:
-            raise ValueError("U_135_OPEN requires dims A and B (centreline)")
-        bends = 2 * bend_allowance_mm(135.0, d, config)
-        hooks = 2 * hook_extension_mm(135, d, config)
-        return float(a + b + bends + hooks)
-
-    if shape == "STIRRUP_RECT":
-        # Closed rectangular stirrup. dims A,B are the centreline sides
-        a = dims.get("A")
-        b = dims.get("B")
-        if a is None or b is None:
-            raise ValueError("STIRRUP_RECT requires dims A and B (centreline)")
-        # Four 90° bends
-        bends = 4 * bend_allowance_mm(90.0, d, config)
-        return float(2 * (a + b) + bends)
-
-    raise ValueError(f"Unsupported shape: {shape}")
\ No newline at end of file
+    if table is None:
+        table = allowance_table(config)
+    if len(required) == 1:
+        total = float(dims["A"])  # centreline length
+    elif factor == 1:
+        total = dims["A"] + dims["B"]
+    else:
+        total = factor * (dims["A"] + dims["B"])
+    for term in table.terms(shape, item.diameter_mm):
+        total = total + term
+    return float(total)
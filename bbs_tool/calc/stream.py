@@ -0,0 +1,122 @@
+from __future__ import annotations
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, List, Sequence, Tuple
+import csv
+import io
+import json
+
+from ..metrics import ITEMS, stage_timer
+from ..models.schemas import BBSItem, BBSCalculationConfig
+from ..validation.engine import BatchValidator
+from .batch import ItemColumns, calculate_batch
+
+
+RESULT_FIELDS: Tuple[str, ...] = (
+    "bar_mark",
+    "shape",
+    "diameter_mm",
+    "cutting_length_mm",
+    "unit_weight_kg_per_m",
+    "quantity",
+    "total_length_m",
+    "total_weight_kg",
+)
+STREAM_CHUNK_SIZE = 2000
+
+# ("result", row dict) or ("warning", message)
+Event = Tuple[str, Any]
+
+
+def calculation_events(items: Sequence[BBSItem], config: BBSCalculationConfig,
+                       validator: BatchValidator | None = None) -> List[Event]:
+    """Results and warnings for a batch, in the same per-item order as the scalar loop.
+
+    Pass the same ``validator`` for every batch of one schedule so repeated
+    bar marks are caught across batches. A row whose validation already
+    explains why it cannot be calculated gets no extra failure warning.
+    """
+    with stage_timer("calculate.compute"):
+        columns = ItemColumns.from_items(items)
+    return column_events(columns, config, validator)
+
+
+def column_events(columns: ItemColumns, config: BBSCalculationConfig,
+                  validator: BatchValidator | None = None) -> List[Event]:
+    """``calculation_events`` for a batch that is already in columns (e.g. parsed straight from CSV)."""
+    with stage_timer("calculate.compute"):
+        result = calculate_batch(columns, config)
+    with stage_timer("calculate.validate"):
+        issues = (validator or BatchValidator(config)).validate(columns)
+    with stage_timer("calculate.records"):
+        records = iter(result.to_records())
+    ITEMS.inc(len(columns), "calculated")
+
+    events: List[Event] = []
+    for i in range(len(columns)):
+        row_issues = issues.get(i, ())
+        for issue in row_issues:
+            events.append(("warning", issue.message))
+        if i in result.errors:
+            if not any(issue.severity == "error" for issue in row_issues):
+                events.append(("warning", f"Calculation failed for {columns.bar_marks[i]}: {result.errors[i]}"))
+        else:
+            events.append(("result", next(records)))
+    return events
+
+
+def iter_calculation_events(items: Sequence[BBSItem], config: BBSCalculationConfig,
+                            chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[List[Event]]:
+    """Compute a schedule chunk by chunk so only one chunk of results is alive at a time."""
+    validator = BatchValidator(config)
+    for start in range(0, len(items), chunk_size):
+        yield calculation_events(items[start:start + chunk_size], config, validator)
+
+
+def ndjson_chunk(events: List[Event]) -> str:
+    """One JSON object per line: ``{"type": "result", ...}`` or ``{"type": "warning", "message": ...}``."""
+    dumps = json.dumps
+    lines = []
+    for kind, payload in events:
+        if kind == "result":
+            lines.append(dumps({"type": "result", **payload}))
+        else:
+            lines.append(dumps({"type": "warning", "message": payload}))
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def csv_header() -> str:
+    return ",".join(("type",) + RESULT_FIELDS + ("message",)) + "\r\n"
+
+
+def csv_chunk(events: List[Event]) -> str:
+    """CSV rows with a ``type`` column; warning rows carry only ``message``."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    blank = [""] * len(RESULT_FIELDS)
+    for kind, payload in events:
+        if kind == "result":
+            writer.writerow(["result", *(payload[f] for f in RESULT_FIELDS), ""])
+        else:
+            writer.writerow(["warning", *blank, payload])
+    return buf.getvalue()
+
+
+def encode_lines(fmt: str, chunks: Iterable[List[Event]]) -> Iterator[str]:
+    if fmt == "csv":
+        yield csv_header()
+    encode = csv_chunk if fmt == "csv" else ndjson_chunk
+    for events in chunks:
+        with stage_timer("calculate.serialize"):
+            text = encode(events)
+        if text:
+            yield text
+
+
+async def aencode_lines(fmt: str, chunks: AsyncIterable[List[Event]]) -> AsyncIterator[str]:
+    if fmt == "csv":
+        yield csv_header()
+    encode = csv_chunk if fmt == "csv" else ndjson_chunk
+    async for events in chunks:
+        with stage_timer("calculate.serialize"):
+            text = encode(events)
+        if text:
+            yield text
@@ -0,0 +1,147 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from ..models.schemas import BBSItem, BBSCalculationConfig
+from ..validation.engine import BatchValidator
+from .batch import ItemColumns, calculate_batch
+from .is2502 import SHAPES, allowance_table
+
+
+@dataclass
+class WhatIfResult:
+    """One schedule evaluated under several configs; arrays are (configs, items).
+
+    Rows that cannot be calculated are NaN in every config, since whether a
+    row can be calculated does not depend on the config.
+    """
+
+    columns: ItemColumns
+    base: int
+    cutting_length_mm: np.ndarray
+    unit_weight_kg_per_m: np.ndarray
+    total_length_m: np.ndarray
+    total_weight_kg: np.ndarray
+    ok: np.ndarray
+    warnings: List[str]
+
+    @property
+    def configs(self) -> int:
+        return len(self.cutting_length_mm)
+
+    def totals_by_diameter(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(diameters, total length m, total weight kg); the totals are (configs, diameters)."""
+        ok = np.flatnonzero(self.ok)
+        diameters, inverse = np.unique(self.columns.diameter_mm[ok], return_inverse=True)
+        # One bincount over a flattened (config, diameter) index instead of one per config
+        slots = (np.arange(self.configs)[:, None] * len(diameters) + inverse[None, :]).ravel()
+        shape = (self.configs, len(diameters))
+        size = shape[0] * shape[1]
+        length = np.bincount(slots, weights=self.total_length_m[:, ok].ravel(), minlength=size).reshape(shape)
+        weight = np.bincount(slots, weights=self.total_weight_kg[:, ok].ravel(), minlength=size).reshape(shape)
+        return diameters, length, weight
+
+    def to_dict(self) -> Dict[str, Any]:
+        diameters, length, weight = self.totals_by_diameter()
+        ok = np.flatnonzero(self.ok)
+        marks = self.columns.bar_marks
+        configs = []
+        for c in range(self.configs):
+            cl_delta = np.round(self.cutting_length_mm[c, ok] - self.cutting_length_mm[self.base, ok], 1)
+            tw_delta = np.round(self.total_weight_kg[c, ok] - self.total_weight_kg[self.base, ok], 3)
+            changed = np.flatnonzero((cl_delta != 0) | (tw_delta != 0))
+            configs.append({
+                "index": c,
+                "total_length_m": round(float(length[c].sum()), 3),
+                "total_weight_kg": round(float(weight[c].sum()), 3),
+                "weight_delta_kg": round(float(weight[c].sum() - weight[self.base].sum()), 3),
+                "by_diameter": [
+                    {"diameter_mm": d, "total_length_m": round(lm, 3), "total_weight_kg": round(kg, 3)}
+                    for d, lm, kg in zip(diameters.tolist(), length[c].tolist(), weight[c].tolist())
+                ],
+                # Columns over the items whose results differ from the base config
+                "item_deltas": {
+                    "row": ok[changed].tolist(),
+                    "bar_mark": [marks[i] for i in ok[changed].tolist()],
+                    "cutting_length_mm": cl_delta[changed].tolist(),
+                    "total_weight_kg": tw_delta[changed].tolist(),
+                },
+            })
+        return {"base": self.base, "items": len(self.columns), "configs": configs, "warnings": self.warnings}
+
+
+def evaluate_configs(items: ItemColumns | Sequence[BBSItem], configs: Sequence[BBSCalculationConfig],
+                     base: int = 0) -> WhatIfResult:
+    """Cutting lengths and weights of one schedule under every config in one pass.
+
+    The dimension part of each cutting length does not depend on the config,
+    so it is computed once, as is which rows can be calculated. The
+    allowance terms and unit weights only depend on (config, shape, diameter);
+    they are tabulated per distinct shape and diameter and broadcast over a
+    config axis. Terms are added in the same order as the scalar formula, so
+    every config's values match a plain calculation with it.
+    Items are validated once, with the base config's thresholds.
+    """
+    if not configs:
+        raise ValueError("At least one config is needed")
+    if not 0 <= base < len(configs):
+        raise ValueError(f"base must index one of the {len(configs)} configs")
+    cols = items if isinstance(items, ItemColumns) else ItemColumns.from_items(items)
+    result = calculate_batch(cols, configs[base])
+    issues = BatchValidator(configs[base]).validate(cols)
+    warnings: List[str] = []
+    for i in sorted(set(issues) | set(result.errors)):
+        row_issues = issues.get(i, ())
+        warnings.extend(issue.message for issue in row_issues)
+        if i in result.errors and not any(issue.severity == "error" for issue in row_issues):
+            warnings.append(f"Calculation failed for {cols.bar_marks[i]}: {result.errors[i]}")
+
+    ok = result.ok
+    shapes = list(SHAPES)
+    shape_index = {shape: s for s, shape in enumerate(shapes)}
+    # Rows with an unknown shape are not ok and end up NaN; any index will do for them
+    sid = np.fromiter((shape_index.get(s, 0) for s in cols.normalized_shapes.tolist()), dtype=np.int64,
+                      count=len(cols))
+    diameters, uid = np.unique(cols.diameter_mm, return_inverse=True)
+
+    # Dimension part, built the same way calculate_batch builds it
+    dims_part = np.full(len(cols), np.nan)
+    a, b = cols.dim("A"), cols.dim("B")
+    for shape, (required, factor, _) in SHAPES.items():
+        rows = ok & (cols.normalized_shapes == shape)
+        if len(required) == 1:
+            dims_part[rows] = a[rows]
+        elif factor == 1:
+            dims_part[rows] = a[rows] + b[rows]
+        else:
+            dims_part[rows] = factor * (a[rows] + b[rows])
+
+    # (configs, shapes, diameters, term) allowance table, zero-padded: adding 0.0 is exact
+    tables = [allowance_table(config) for config in configs]
+    dlist = diameters.tolist()
+    looked_up = [[[t.terms(shape, d) for d in dlist] for shape in shapes] for t in tables]
+    n_terms = max((len(v) for per_config in looked_up for per_shape in per_config for v in per_shape), default=0)
+    terms = np.zeros((len(configs), len(shapes), len(diameters), n_terms))
+    for c, per_config in enumerate(looked_up):
+        for s, per_shape in enumerate(per_config):
+            for u, values in enumerate(per_shape):
+                terms[c, s, u, :len(values)] = values
+    weights = np.array([[t.unit_weight(d) for d in dlist] for t in tables]).reshape(len(configs), len(dlist))
+
+    cutting = dims_part[None, :]
+    for k in range(n_terms):
+        cutting = cutting + terms[:, sid, uid, k]
+    unit_wt = weights[:, uid]
+    total_length = (cutting / 1000.0) * cols.quantity[None, :]
+    return WhatIfResult(
+        columns=cols,
+        base=base,
+        cutting_length_mm=cutting,
+        unit_weight_kg_per_m=unit_wt,
+        total_length_m=total_length,
+        total_weight_kg=unit_wt * total_length,
+        ok=ok,
+        warnings=warnings,
+    )
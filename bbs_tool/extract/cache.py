@@ -0,0 +1,175 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from pydantic import TypeAdapter
+
+from ..models.schemas import BBSItem
+
+
+# Bump when OCR or line parsing changes in a way that alters results
+CACHE_VERSION = 3
+
+EXTRACT_CACHE_DIR = os.environ.get("BBS_EXTRACT_CACHE_DIR") or str(Path(tempfile.gettempdir()) / "bbs_tool_cache")
+EXTRACT_CACHE_MAX_MB = float(os.environ.get("BBS_EXTRACT_CACHE_MAX_MB", "256"))
+# Uploads are hashed while they are copied to disk, this much at a time
+COPY_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+_ITEMS = TypeAdapter(List[BBSItem])
+
+
+def _content_hash() -> Any:
+    return hashlib.blake2b(digest_size=32)
+
+
+def content_digest(data: bytes) -> str:
+    """Hex digest identifying an upload's bytes."""
+    h = _content_hash()
+    h.update(data)
+    return h.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """``content_digest`` of a file on disk, read in chunks."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, _content_hash).hexdigest()
+
+
+def copy_with_digest(src: BinaryIO, dst: BinaryIO, chunk_size: int = COPY_CHUNK_SIZE) -> str:
+    """Copy ``src`` to ``dst`` chunk by chunk; returns the ``content_digest`` of what was copied."""
+    h = _content_hash()
+    while chunk := src.read(chunk_size):
+        h.update(chunk)
+        dst.write(chunk)
+    return h.hexdigest()
+
+
+def cache_key(digest: str, params: Dict[str, Any]) -> str:
+    """Key for an upload's ``content_digest`` and the parameters that shaped the result."""
+    h = _content_hash()
+    h.update(digest.encode())
+    h.update(json.dumps({"version": CACHE_VERSION, **params}, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+class ExtractionCache:
+    """Content-addressed store of extracted items in a local SQLite file.
+
+    Entries are evicted least-recently-used first once their total size
+    exceeds ``max_bytes``. A ``max_bytes`` of 0 disables the cache.
+    """
+
+    def __init__(self, directory: str = EXTRACT_CACHE_DIR, max_bytes: int = int(EXTRACT_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = Path(directory) / "extract_cache.sqlite3"
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @contextmanager
+    def _session(self) -> Iterator[sqlite3.Connection]:
+        # Short-lived connections keep this usable from any threadpool thread
+        with self._lock:
+            if not self._ready:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            try:
+                if not self._ready:
+                    self._create(conn)
+                    self._ready = True
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+
+    @staticmethod
+    def _create(conn: sqlite3.Connection) -> None:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, payload BLOB NOT NULL,"
+            " size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access)")
+
+    # A broken or locked cache file must never fail an extraction; it just misses.
+
+    def get(self, key: str) -> Optional[List[BBSItem]]:
+        if not self.enabled:
+            return None
+        try:
+            with self._session() as conn:
+                row = conn.execute("SELECT payload FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error:
+            self.errors += 1
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _ITEMS.validate_json(row[0])
+
+    def put(self, key: str, items: List[BBSItem]) -> None:
+        if not self.enabled:
+            return
+        payload = _ITEMS.dump_json(items)
+        if len(payload) > self.max_bytes:
+            return
+        try:
+            with self._session() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, payload, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, payload, len(payload), time.time()),
+                )
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(conn, total - self.max_bytes)
+        except sqlite3.Error:
+            self.errors += 1
+
+    def _evict(self, conn: sqlite3.Connection, excess: int) -> None:
+        freed = 0
+        doomed: List[str] = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            if freed >= excess:
+                break
+            doomed.append(key)
+            freed += size
+        conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in doomed])
+        self.evictions += len(doomed)
+
+    def stats(self) -> Dict[str, Any]:
+        entries, size = 0, 0
+        if self.enabled:
+            try:
+                with self._session() as conn:
+                    entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            except sqlite3.Error:
+                self.errors += 1
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
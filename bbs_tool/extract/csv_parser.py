@@ -0,0 +1,275 @@
+from __future__ import annotations
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import TypeAdapter, ValidationError
+
+from ..calc.batch import DIM_LABELS, ItemColumns
+from ..metrics import ITEMS, stage_timer
+from ..models.schemas import BBSItem
+from ..recognition.shape_recognizer import normalize_shape_label
+from .csv_stream import AsyncReadable, iter_csv_records
+
+
+# Header aliases in the priority order used by BBSItem.from_csv_row
+BAR_MARK_ALIASES = ("bar_mark", "mark", "Bar Mark")
+SHAPE_ALIASES = ("shape", "Shape")
+DIAMETER_ALIASES = ("diameter_mm", "diameter", "Dia")
+QUANTITY_ALIASES = ("quantity", "qty")
+DIM_COLUMNS = {"A", "B", "C", "D", "E", "F"}
+
+_ITEMS = TypeAdapter(List[BBSItem])
+
+
+def _convert_shape(raw: Optional[str]) -> str:
+    return (raw or "").strip().upper()
+
+
+def _convert_diameter(raw: Optional[str]) -> float:
+    diameter = float(raw or 0)
+    if not diameter > 0:
+        raise ValueError(f"diameter must be > 0, got {diameter:g}")
+    return diameter
+
+
+def _convert_quantity(raw: Optional[str]) -> int:
+    quantity = int(float(raw or 1))
+    if quantity < 1:
+        raise ValueError(f"quantity must be >= 1, got {quantity}")
+    return quantity
+
+
+def _column_index(header: Sequence[str]) -> Dict[str, int]:
+    # Same as the row dict csv.DictReader builds: first position, last column wins
+    return {name: j for j, name in enumerate(header)}
+
+
+class CSVRowParser:
+    """Row parser compiled once per CSV header.
+
+    Column aliases and dimension columns (A–F) are resolved to indices up front
+    and each batch is converted column by column. Rows become plain dicts
+    that are validated into ``BBSItem`` in one ``TypeAdapter`` call per batch,
+    or go straight into ``ItemColumns`` when they are only calculated; rows
+    that fail are reported by row number instead of aborting the file.
+    """
+
+    def __init__(self, header: Sequence[str]):
+        self.header = list(header)
+        columns = _column_index(header)
+        self.bar_mark = tuple(columns[a] for a in BAR_MARK_ALIASES if a in columns)
+        self.shape = tuple(columns[a] for a in SHAPE_ALIASES if a in columns)
+        self.diameter = tuple(columns[a] for a in DIAMETER_ALIASES if a in columns)
+        self.quantity = tuple(columns[a] for a in QUANTITY_ALIASES if a in columns)
+        # "a" and "A" both feed dim A; the last non-empty numeric one wins
+        dims: Dict[str, List[int]] = {}
+        for name, j in columns.items():
+            k = name.strip().upper()
+            if k in DIM_COLUMNS:
+                dims.setdefault(k, []).append(j)
+        self.dims = tuple((k, tuple(reversed(js))) for k, js in dims.items())
+
+    @staticmethod
+    def _pick(columns: Sequence[Sequence[str]], indices: Tuple[int, ...], n: int) -> Sequence[str]:
+        """Per row, the first non-empty value among the alias columns ("" if none)."""
+        if not indices:
+            return [""] * n
+        picked = columns[indices[0]]
+        for j in indices[1:]:
+            picked = [a or b for a, b in zip(picked, columns[j])]
+        return picked
+
+    @staticmethod
+    def _convert(column: Sequence[str], convert: Callable[[Optional[str]], Any]) -> Tuple[List[Any], Dict[str, str]]:
+        """Converted column plus the error of each value that failed.
+
+        Shape, diameter and quantity repeat a handful of values per file, so
+        each distinct value is converted once.
+        """
+        values: Dict[str, Any] = {}
+        failed: Dict[str, str] = {}
+        for raw in set(column):
+            try:
+                values[raw] = convert(raw)
+            except (ValueError, OverflowError) as ex:
+                values[raw] = None
+                failed[raw] = str(ex)
+        return list(map(values.__getitem__, column)), failed
+
+    @staticmethod
+    def _floats(column: Sequence[str]) -> List[Optional[float]]:
+        """Column as floats; empty and non-numeric cells are None."""
+        if all(column):
+            try:
+                return list(map(float, column))
+            except (ValueError, OverflowError):
+                pass
+        try:
+            return [float(v) if v else None for v in column]
+        except (ValueError, OverflowError):
+            pass
+        out: List[Optional[float]] = []
+        for v in column:
+            try:
+                out.append(float(v) if v else None)
+            except (ValueError, OverflowError):
+                out.append(None)
+        return out
+
+    def _convert_rows(self, records: Sequence[Sequence[str]], first_row: int,
+                      errors: List[str]) -> Tuple[List[int], List[str], List[str], List[float], List[int],
+                                                  List[List[Optional[float]]]]:
+        """Row numbers, bar marks, shapes, diameters, quantities and per-dimension values of the rows that convert.
+
+        Records are transposed into columns and converted column by column;
+        rows whose diameter or quantity fails are reported in ``errors``.
+        The dimension columns follow ``self.dims``, with None where not given.
+        """
+        width = len(self.header)
+        if all(records):
+            row_numbers = list(range(first_row, first_row + len(records)))
+        else:
+            row_numbers = [first_row + i for i, record in enumerate(records) if record]
+            records = [record for record in records if record]
+        # Ragged rows are padded or cut to the header so the columns line up
+        if set(map(len, records)) - {width}:
+            records = [r if len(r) == width else (list(r) + [""] * width)[:width] for r in records]
+        n = len(records)
+        if not n:
+            return [], [], [], [], [], [[] for _ in self.dims]
+        columns = list(zip(*records))
+
+        bar_marks = list(self._pick(columns, self.bar_mark, n))
+        shapes, _ = self._convert(self._pick(columns, self.shape, n), _convert_shape)
+        diameter_raw = self._pick(columns, self.diameter, n)
+        diameters, bad_diameters = self._convert(diameter_raw, _convert_diameter)
+        quantity_raw = self._pick(columns, self.quantity, n)
+        quantities, bad_quantities = self._convert(quantity_raw, _convert_quantity)
+
+        dim_values = []
+        for _, indices in self.dims:
+            values = self._floats(columns[indices[0]])
+            for j in indices[1:]:
+                if None in values:
+                    values = [v if v is not None else w for v, w in zip(values, self._floats(columns[j]))]
+            dim_values.append(values)
+
+        if bad_diameters or bad_quantities:
+            # Failed cells hold None; the few failing rows are found with list.index
+            # rather than a Python loop over every row. A bad diameter is reported
+            # ahead of a bad quantity on the same row.
+            bad: Dict[int, str] = {}
+            for values, raw, failed in ((quantities, quantity_raw, bad_quantities),
+                                        (diameters, diameter_raw, bad_diameters)):
+                i = -1
+                for _ in range(values.count(None)):
+                    i = values.index(None, i + 1)
+                    bad[i] = failed[raw[i]]
+            for i in sorted(bad):
+                errors.append(f"row {row_numbers[i]}: {bad[i]}")
+            drop = sorted(bad, reverse=True)
+            for column in (row_numbers, bar_marks, shapes, diameters, quantities, *dim_values):
+                for i in drop:
+                    del column[i]
+        return row_numbers, bar_marks, shapes, diameters, quantities, dim_values
+
+    def parse(self, records: Sequence[Sequence[str]], first_row: int, errors: List[str]) -> List[BBSItem]:
+        """Parse records whose first entry is spreadsheet row ``first_row`` (header is row 1).
+
+        Only building each row's dict is done per row.
+        """
+        row_numbers, bar_marks, shapes, diameters, quantities, dim_values = self._convert_rows(records, first_row, errors)
+        dim_names = tuple(k for k, _ in self.dims)
+        if dim_values:
+            dims = [{k: v for k, v in zip(dim_names, row) if v is not None} for row in zip(*dim_values)]
+        else:
+            dims = [{} for _ in bar_marks]
+        rows = [
+            {"bar_mark": b, "diameter_mm": d, "shape": s, "dims_mm": m, "quantity": q}
+            for b, d, s, m, q in zip(bar_marks, diameters, shapes, dims, quantities)
+        ]
+        return self._validate(rows, row_numbers, errors)
+
+    def parse_columns(self, records: Sequence[Sequence[str]], first_row: int, errors: List[str]) -> ItemColumns:
+        """Like ``parse`` but straight into ``ItemColumns``, for paths that only calculate.
+
+        The converters already enforce BBSItem's rules (diameter > 0,
+        quantity >= 1, numeric dimensions), so no per-row model is built.
+        """
+        _, bar_marks, shapes, diameters, quantities, dim_values = self._convert_rows(records, first_row, errors)
+        n = len(bar_marks)
+        dims = np.zeros((n, len(DIM_LABELS)), dtype=np.float64)
+        present = np.zeros((n, len(DIM_LABELS)), dtype=bool)
+        for (label, _), values in zip(self.dims, dim_values):
+            j = DIM_LABELS.index(label)
+            missing = values.count(None)
+            if not missing:
+                dims[:, j] = np.fromiter(values, dtype=np.float64, count=n)
+                present[:, j] = True
+            elif missing < n:
+                given = np.fromiter((v is not None for v in values), dtype=bool, count=n)
+                dims[:, j] = np.fromiter((v if v is not None else 0.0 for v in values), dtype=np.float64, count=n)
+                present[:, j] = given
+        # Normalize each distinct shape label once
+        labels = {label: normalize_shape_label(label) for label in set(shapes)}
+        return ItemColumns(
+            bar_marks=bar_marks,
+            shapes=shapes,
+            normalized_shapes=np.asarray([labels[s] for s in shapes], dtype=object),
+            diameter_mm=np.fromiter(diameters, dtype=np.float64, count=n),
+            quantity=np.fromiter(quantities, dtype=np.int64, count=n),
+            dims_mm=dims,
+            dims_present=present,
+            extra_dims=np.zeros(n, dtype=bool),
+        )
+
+    @staticmethod
+    def _validate(rows: List[Dict[str, Any]], row_numbers: List[int], errors: List[str]) -> List[BBSItem]:
+        try:
+            return _ITEMS.validate_python(rows)
+        except ValidationError as ex:
+            bad: Dict[int, str] = {}
+            for err in ex.errors():
+                i = err["loc"][0]
+                field = ".".join(str(p) for p in err["loc"][1:])
+                bad.setdefault(i, f"{field}: {err['msg']}" if field else err["msg"])
+            for i in sorted(bad):
+                errors.append(f"row {row_numbers[i]}: {bad[i]}")
+            return _ITEMS.validate_python([r for i, r in enumerate(rows) if i not in bad])
+
+
+async def _iter_parsed(upload: AsyncReadable, warnings: List[str], chunk_size: Optional[int],
+                       parse: Callable[[CSVRowParser, Sequence[Sequence[str]], int, List[str]], Any]) -> AsyncIterator[Any]:
+    parser: Optional[CSVRowParser] = None
+    row = 1
+    async for records in iter_csv_records(upload, warnings, chunk_size):
+        if parser is None:
+            # Leading blank lines are skipped like csv.DictReader does
+            while records and not records[0]:
+                records = records[1:]
+                row += 1
+            if not records:
+                continue
+            parser = CSVRowParser(records[0])
+            records = records[1:]
+            row += 1
+        with stage_timer("extract.csv_parse"):
+            parsed = parse(parser, records, row, warnings)
+        ITEMS.inc(len(parsed), "extracted")
+        row += len(records)
+        if len(parsed):
+            yield parsed
+
+
+async def iter_csv_items(upload: AsyncReadable, warnings: List[str],
+                         chunk_size: Optional[int] = None) -> AsyncIterator[List[BBSItem]]:
+    """Yield BBS items per upload chunk; unparseable rows are added to ``warnings``."""
+    async for items in _iter_parsed(upload, warnings, chunk_size, CSVRowParser.parse):
+        yield items
+
+
+async def iter_csv_columns(upload: AsyncReadable, warnings: List[str],
+                           chunk_size: Optional[int] = None) -> AsyncIterator[ItemColumns]:
+    """Like ``iter_csv_items`` but yields ``ItemColumns`` without building an item per row."""
+    async for columns in _iter_parsed(upload, warnings, chunk_size, CSVRowParser.parse_columns):
+        yield columns
@@ -0,0 +1,112 @@
+from __future__ import annotations
+from typing import AsyncIterator, List, Optional, Protocol
+import codecs
+import csv
+import io
+from itertools import islice
+
+
+CSV_READ_CHUNK_SIZE = 1 << 20  # 1 MiB
+# Records handed on per batch. Small batches let their temporaries die young instead
+# of being promoted and rescanned by every full GC pass over the items built so far.
+CSV_RECORD_BATCH = 512
+
+
+class AsyncReadable(Protocol):
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+class _RecordSplitter:
+    """Cuts decoded text at the last point where every CSV record before it is whole.
+
+    Records end at "\n" (so also "\r\n") and nowhere else, as when the whole
+    text is read through StringIO; characters that str.splitlines would also
+    break on (\x0b, \x85, \u2028, ...) stay inside their field. A newline
+    ends a record when the count of quote characters before it is even,
+    since a quoted field holds its quotes doubled. Only the text after the
+    last boundary is kept, with its quote count, and each chunk is counted
+    with str.count, so a long quoted field is never scanned twice.
+    """
+
+    def __init__(self) -> None:
+        self.pending: List[str] = []
+        self.quotes = 0
+
+    def feed(self, text: str) -> str:
+        """The complete records that ``text`` finishes, as one string (possibly empty)."""
+        end = text.rfind("\n")
+        if end >= 0:
+            before = self.quotes + text.count('"', 0, end)
+            while before % 2 and end >= 0:
+                prev = text.rfind("\n", 0, end)
+                before -= text.count('"', max(prev, 0), end)
+                end = prev
+        if end < 0:
+            self.pending.append(text)
+            self.quotes += text.count('"')
+            return ""
+        self.pending.append(text[:end + 1])
+        complete = "".join(self.pending)
+        tail = text[end + 1:]
+        self.pending = [tail]
+        self.quotes = tail.count('"')
+        return complete
+
+    def close(self) -> str:
+        """Whatever is left: a last line without a newline, or an unterminated quoted record."""
+        rest = "".join(self.pending)
+        self.pending, self.quotes = [], 0
+        return rest
+
+
+def _detect_encoding(head: bytes) -> str:
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return "latin-1"
+    return "utf-8"
+
+
+async def iter_csv_records(upload: AsyncReadable, warnings: List[str],
+                           chunk_size: Optional[int] = None) -> AsyncIterator[List[List[str]]]:
+    """Read a CSV upload chunk by chunk and yield the records parsed from each chunk.
+
+    Records are plain lists as produced by csv.reader; the header is the first
+    record of the first batch and blank lines come through as empty lists.
+
+    The encoding is detected from the first chunk (UTF-8, with or without BOM,
+    else latin-1). If a later chunk turns out not to be UTF-8 the remainder is
+    decoded as latin-1 and a warning is recorded.
+    """
+    chunk_size = chunk_size or CSV_READ_CHUNK_SIZE
+    decoder = None
+    encoding = ""
+    consumed = 0
+    splitter = _RecordSplitter()
+
+    while True:
+        chunk = await upload.read(chunk_size)
+        final = not chunk
+        if decoder is None:
+            encoding = _detect_encoding(chunk)
+            decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            text = decoder.decode(chunk, final=final)
+        except UnicodeDecodeError:
+            warnings.append(f"CSV is not valid {encoding} after byte {consumed}; decoded the rest as latin-1")
+            encoding = "latin-1"
+            decoder = codecs.getincrementaldecoder(encoding)()
+            text = decoder.decode(chunk, final=final)
+        consumed += len(chunk)
+
+        complete = splitter.feed(text)
+        if final:
+            complete += splitter.close()
+        # Chunks are cut at record boundaries, so each gets its own reader
+        reader = csv.reader(io.StringIO(complete))
+        while records := list(islice(reader, CSV_RECORD_BATCH)):
+            yield records
+        if final:
+            break
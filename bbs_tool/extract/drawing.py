@@ -0,0 +1,51 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from ..metrics import ITEMS, record_ocr_timings
+from ..models.schemas import BBSItem
+from .cache import ExtractionCache, cache_key, content_digest, file_digest
+from .ocr_pool import OCRPool
+
+# The OCR modules pull in cv2, PIL and the Tesseract bindings; they
+# are imported on first use so CSV-only deployments never load them.
+
+
+async def extract_drawing(source_type: str, content: bytes | str, pool: OCRPool, cache: ExtractionCache,
+                          digest: Optional[str] = None) -> Tuple[List[BBSItem], Dict[str, float]]:
+    """OCR an image or PDF upload, answering from the extraction cache when possible.
+
+    ``content`` is the image bytes, or for a PDF the path of the upload on
+    disk; ``digest`` is its ``content_digest`` when the caller already has it.
+    Raises PoolSaturated when the OCR pool is full; other failures propagate as-is.
+    """
+    from .tiled_ocr import ocr_params
+
+    started = time.perf_counter()
+    if digest is None:
+        digest = await run_in_threadpool(content_digest if isinstance(content, bytes) else file_digest, content)
+    key = cache_key(digest, {"source_type": source_type, **ocr_params()})
+    cached = await run_in_threadpool(cache.get, key)
+    if cached is not None:
+        items, timings = cached, {"cache": (time.perf_counter() - started) * 1000.0}
+    else:
+        items, timings = await _ocr(source_type, content, pool)
+        await run_in_threadpool(cache.put, key, items)
+    # Worker processes time their own stages; they are recorded here, in the API process
+    record_ocr_timings(timings)
+    ITEMS.inc(len(items), "extracted")
+    return items, timings
+
+
+async def _ocr(source_type: str, content: bytes | str, pool: OCRPool) -> Tuple[List[BBSItem], Dict[str, float]]:
+    from .ocr_extractor import extract_from_image_timed
+    from .tiled_ocr import extract_from_image_tiled, extract_from_pdf_tiled, is_large_image
+
+    if source_type == "pdf":
+        # Workers render their own tiles from the file on disk
+        return await extract_from_pdf_tiled(content, pool)
+    if is_large_image(content):
+        return await extract_from_image_tiled(content, pool)
+    return await pool.run(extract_from_image_timed, content)
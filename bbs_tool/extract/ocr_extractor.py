@@ -1,17 +1,26 @@
 from __future__ import annotations
-from typing import List
+from typing import Dict, List, Tuple
 import io
+import time
 import numpy as np
 import cv2
 from PIL import Image
-import pytesseract
 
 from ..models.schemas import BBSItem
+from ..recognition.sketch import Sketch, recognize_sketches
+from .tess_engine import OCRWords, recognize
+
+MIN_WORD_CONFIDENCE = 30.0
+# Recognised sketches join the OCR text as one token each, e.g. "sketch:L_90"
+SKETCH_TOKEN_PREFIX = "sketch:"
 
 
 def preprocess_image_for_ocr(data: bytes) -> np.ndarray:
     image = Image.open(io.BytesIO(data)).convert("L")
-    img = np.array(image)
+    return preprocess_gray_for_ocr(np.array(image))
+
+
+def preprocess_gray_for_ocr(img: np.ndarray) -> np.ndarray:
     img = cv2.resize(img, None, fx=1.0, fy=1.0, interpolation=cv2.INTER_CUBIC)
     img = cv2.GaussianBlur(img, (3, 3), 0)
     img = cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
@@ -20,34 +29,109 @@ def preprocess_image_for_ocr(data: bytes) -> np.ndarray:
 
 
 def extract_from_image(data: bytes) -> List[BBSItem]:
+    items, _ = extract_from_image_timed(data)
+    return items
+
+
+def extract_from_image_timed(data: bytes) -> Tuple[List[BBSItem], Dict[str, float]]:
+    """Run extract_from_image and return per-stage wall times in milliseconds."""
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
     try:
         img = preprocess_image_for_ocr(data)
     except Exception as ex:
         raise RuntimeError(f"Image preprocessing failed: {ex}")
+    t1 = time.perf_counter()
+    timings["preprocess"] = (t1 - t0) * 1000.0
 
     try:
-        # Use pytesseract to extract TSV data
-        tsv = pytesseract.image_to_data(img, output_type=pytesseract.Output.DATAFRAME)
+        words = recognize(img)
     except Exception as ex:
         raise RuntimeError("Tesseract not available or OCR failed. Install tesseract-ocr or provide CSV input.") from ex
+    t2 = time.perf_counter()
+    timings["tesseract"] = (t2 - t1) * 1000.0
+
+    sketches = recognize_sketches(img)
+    t3 = time.perf_counter()
+    timings["sketch"] = (t3 - t2) * 1000.0
+
+    items = parse_ocr_table(attach_sketches(words, sketches))
+    timings["parse"] = (time.perf_counter() - t3) * 1000.0
+    return items, timings
+
+
+def attach_sketches(words: OCRWords, sketches: List[Sketch], min_conf: float = MIN_WORD_CONFIDENCE) -> OCRWords:
+    """Add each sketch as a word of the text line whose vertical centre falls in its cell.
+
+    Sketches with no such line (an empty row, a header) are dropped.
+    """
+    lines = words.select((words.conf > min_conf) & (words.text != ""))
+    if not sketches or not len(lines):
+        return words
+    keys, inverse = np.unique(np.column_stack([lines.page, lines.block, lines.par, lines.line]),
+                              axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    top = np.full(len(keys), np.iinfo(np.int64).max)
+    bottom = np.zeros(len(keys), dtype=np.int64)
+    np.minimum.at(top, inverse, lines.top)
+    np.maximum.at(bottom, inverse, lines.top + lines.height)
+    centre = (top + bottom) / 2
+
+    box = np.array([(s.y, s.height) for s in sketches], dtype=np.float64)
+    gap = np.abs(centre[None, :] - (box[:, :1] + box[:, 1:] / 2))
+    nearest = gap.argmin(axis=1)
+    hit = np.flatnonzero(gap[np.arange(len(sketches)), nearest] <= box[:, 1] / 2)
+    if not len(hit):
+        return words
+    key = keys[nearest[hit]]
+    text = np.empty(len(hit), dtype=object)
+    text[:] = [sketch_token(sketches[i].shape) for i in hit.tolist()]
+    extra = OCRWords(
+        page=key[:, 0], block=key[:, 1], par=key[:, 2], line=key[:, 3],
+        left=np.array([sketches[i].x for i in hit.tolist()], dtype=np.int64),
+        top=np.array([sketches[i].y for i in hit.tolist()], dtype=np.int64),
+        width=np.array([sketches[i].width for i in hit.tolist()], dtype=np.int64),
+        height=np.array([sketches[i].height for i in hit.tolist()], dtype=np.int64),
+        conf=np.full(len(hit), 100.0),
+        text=text,
+    )
+    return OCRWords(**{name: np.concatenate([getattr(words, name), getattr(extra, name)])
+                       for name in words.__dataclass_fields__})
+
+
+def sketch_token(shape: str) -> str:
+    return SKETCH_TOKEN_PREFIX + shape
+
+
+def parse_ocr_table(words: OCRWords) -> List[BBSItem]:
+    """Turn OCR words into BBS items."""
+    return parse_bbs_lines(ocr_lines(words))
+
+
+def ocr_lines(words: OCRWords, min_conf: float = MIN_WORD_CONFIDENCE) -> List[str]:
+    """Text of each Tesseract line (page, block, paragraph, line), in reading order.
 
-    # Very minimal heuristic: expect a header row with known columns
-    # Filter rows with reasonable confidence
-    tsv = tsv.dropna(subset=['text'])
-    tsv = tsv[tsv['conf'].astype(float) > 30]
+    Confident words are stably sorted by the line key; line starts are where
+    the key changes, so only the final joins are done per line in Python.
+    """
+    words = words.select((words.conf > min_conf) & (words.text != ""))
+    if not len(words):
+        return []
+    order = np.lexsort((words.line, words.par, words.block, words.page))
+    keys = np.column_stack([words.page, words.block, words.par, words.line])[order]
+    starts = np.flatnonzero(np.concatenate([[True], np.any(keys[1:] != keys[:-1], axis=1)])).tolist()
+    text = words.text[order].tolist()
+    return [" ".join(text[a:b]) for a, b in zip(starts, starts[1:] + [len(text)])]
 
-    # Group by line and reconstruct rows
-    rows: List[str] = []
-    for _, grp in tsv.groupby(['page_num', 'block_num', 'par_num', 'line_num']):
-        line = " ".join(str(t).strip() for t in grp['text'] if isinstance(t, str))
-        if line:
-            rows.append(line)
 
+def parse_bbs_lines(rows: List[str]) -> List[BBSItem]:
     # Extremely naive parsing: look for tokens and build items
     # Users are encouraged to upload CSV for reliable extraction in this initial version.
     items: List[BBSItem] = []
     for line in rows:
         tokens = [tok.strip() for tok in line.replace(',', ' ').split() if tok.strip()]
+        sketched = [tok[len(SKETCH_TOKEN_PREFIX):] for tok in tokens if tok.startswith(SKETCH_TOKEN_PREFIX)]
+        tokens = [tok for tok in tokens if not tok.startswith(SKETCH_TOKEN_PREFIX)]
         if len(tokens) < 4:
             continue
         # Heuristic: BAR MARK, DIA, SHAPE, QTY, dims A,B,... present as A=xxx B=yyy
@@ -57,7 +141,8 @@ def extract_from_image(data: bytes) -> List[BBSItem]:
         except Exception:
             dia_candidates = []
         diameter = dia_candidates[0] if dia_candidates else 0.0
-        shape = "STRAIGHT"
+        # A drawn sketch replaces the STRAIGHT fallback; a printed shape label still wins
+        shape = sketched[-1] if sketched else "STRAIGHT"
         for tok in tokens:
             up = tok.upper()
             if up in {"STRAIGHT", "L_90", "L90", "L_135", "L135", "U_135_OPEN", "STIRRUP_RECT"}:
@@ -0,0 +1,120 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import os
+import threading
+
+from .tess_engine import warm_engine
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+OCR_WORKERS = _env_int("BBS_OCR_WORKERS", min(4, os.cpu_count() or 1))
+OCR_QUEUE_DEPTH = _env_int("BBS_OCR_QUEUE_DEPTH", 8)
+
+
+class PoolSaturated(RuntimeError):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class OCRPool:
+    """Bounded process pool for CPU-heavy OCR work.
+
+    At most ``workers`` jobs run at once and at most ``queue_depth`` more wait
+    for a worker; anything beyond that is rejected with PoolSaturated right away
+    instead of piling up behind the event loop. The executor is started lazily
+    and rebuilt if a worker dies. Workers live as long as the pool and run
+    ``initializer`` once at start, by default loading the OCR engine so each
+    image is handed to a warm engine. One pool is shared by request handlers
+    and job threads, each on its own event loop, so its counters are guarded
+    by a lock.
+    """
+
+    def __init__(self, workers: int = OCR_WORKERS, queue_depth: int = OCR_QUEUE_DEPTH,
+                 initializer: Optional[Callable[[], None]] = warm_engine):
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self.initializer = initializer
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer)
+            return self._executor
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                raise PoolSaturated(f"OCR pool saturated ({self.workers} running, {self.queue_depth} queued)")
+            self.in_flight += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        self._admit()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        except BrokenProcessPool:
+            self.shutdown(wait=False)
+            raise
+        finally:
+            self._release()
+
+    async def run_many(self, fn: Callable[..., Any], jobs: Iterable[Tuple[Any, ...]]) -> List[Any]:
+        """Run ``fn(*args)`` for every job across all workers; counts as one request.
+
+        Jobs are pulled from the iterable as workers free up (at most two per
+        worker outstanding), so a lazy iterable keeps memory bounded by the
+        jobs in flight. Results come back in job order.
+        """
+        self._admit()
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        window = 2 * self.workers
+        order: Dict[asyncio.Future, int] = {}
+        results: Dict[int, Any] = {}
+        pending: Set[asyncio.Future] = set()
+        try:
+            for i, args in enumerate(jobs):
+                if len(pending) >= window:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for fut in done:
+                        results[order.pop(fut)] = fut.result()
+                fut = loop.run_in_executor(executor, fn, *args)
+                order[fut] = i
+                pending.add(fut)
+            for fut in pending:
+                results[order[fut]] = await fut
+        except BrokenProcessPool:
+            self.shutdown(wait=False)
+            raise
+        finally:
+            for fut in pending:
+                fut.cancel()
+            self._release()
+        return [results[i] for i in range(len(results))]
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
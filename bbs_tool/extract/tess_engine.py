@@ -0,0 +1,105 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any
+import importlib.util
+import io
+import os
+import threading
+
+import numpy as np
+
+# "tesserocr" keeps one Tesseract instance per worker in memory and hands it
+# image buffers directly; "pytesseract" starts the tesseract CLI per image.
+# "auto" uses tesserocr when it is installed.
+OCR_ENGINE = os.environ.get("BBS_OCR_ENGINE", "auto")
+OCR_LANG = os.environ.get("BBS_OCR_LANG", "eng")
+
+_local = threading.local()
+
+
+@dataclass
+class OCRWords:
+    """Word-level OCR output as parallel arrays (Tesseract TSV columns)."""
+
+    page: np.ndarray
+    block: np.ndarray
+    par: np.ndarray
+    line: np.ndarray
+    left: np.ndarray
+    top: np.ndarray
+    width: np.ndarray
+    height: np.ndarray
+    conf: np.ndarray
+    text: np.ndarray  # object array of str
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def select(self, mask: np.ndarray) -> "OCRWords":
+        return OCRWords(**{name: getattr(self, name)[mask] for name in self.__dataclass_fields__})
+
+
+# Column of each field in a TSV word row (level, page_num, block_num, par_num, line_num,
+# word_num, left, top, width, height, conf, text)
+_COLUMNS = {"page": 1, "block": 2, "par": 3, "line": 4, "left": 6, "top": 7, "width": 8, "height": 9}
+
+
+def parse_tsv(tsv: str) -> OCRWords:
+    """Word rows (level 5) of Tesseract TSV output.
+
+    Layout rows and the header line (present from the CLI, absent from the
+    C API) are skipped. The numeric columns are parsed in one ``loadtxt``
+    call; only splitting off the text is done per word.
+    """
+    rows = [line.rpartition("\t") for line in tsv.splitlines() if line.startswith("5\t")]
+    if rows:
+        table = np.loadtxt(io.StringIO("\n".join(r[0] for r in rows)), delimiter="\t", ndmin=2)
+    else:
+        table = np.empty((0, 11))
+    text = np.empty(len(rows), dtype=object)
+    text[:] = [r[2].strip() for r in rows]
+    columns = {name: table[:, i].astype(np.int64) for name, i in _COLUMNS.items()}
+    return OCRWords(conf=table[:, 10], text=text, **columns)
+
+
+def engine_name() -> str:
+    if OCR_ENGINE != "auto":
+        return OCR_ENGINE
+    return "tesserocr" if importlib.util.find_spec("tesserocr") is not None else "pytesseract"
+
+
+def _api() -> Any:
+    api = getattr(_local, "api", None)
+    if api is None:
+        import tesserocr
+
+        api = _local.api = tesserocr.PyTessBaseAPI(lang=OCR_LANG)
+    return api
+
+
+def warm_engine() -> None:
+    """Load the language data up front; used as the OCR pool's worker initializer.
+
+    Failures are left for the first real OCR call to report.
+    """
+    if engine_name() != "tesserocr":
+        return
+    try:
+        _api()
+    except Exception:
+        pass
+
+
+def recognize(img: np.ndarray) -> OCRWords:
+    """OCR a 2-D uint8 image and return its words."""
+    img = np.ascontiguousarray(img, dtype=np.uint8)
+    if engine_name() == "tesserocr":
+        api = _api()
+        height, width = img.shape
+        api.SetImageBytes(img.tobytes(), width, height, 1, width)
+        api.Recognize()
+        return parse_tsv(api.GetTSVText(0))
+
+    import pytesseract
+
+    return parse_tsv(pytesseract.image_to_data(img, lang=OCR_LANG, output_type=pytesseract.Output.STRING))
@@ -0,0 +1,249 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Sequence, Tuple
+import asyncio
+import io
+import time
+
+import numpy as np
+from PIL import Image
+
+from ..models.schemas import BBSItem
+from ..recognition.sketch import recognize_sketches
+from .ocr_extractor import MIN_WORD_CONFIDENCE, parse_bbs_lines, preprocess_gray_for_ocr, sketch_token
+from .ocr_pool import OCRPool
+from .tess_engine import engine_name, recognize
+
+
+TILE_SIZE_PX = 2000
+TILE_OVERLAP_PX = 200
+PDF_RESOLUTION_DPI = 300
+# Images with a side longer than this are OCR'd in tiles
+LARGE_IMAGE_SIDE_PX = 3000
+
+
+def ocr_params() -> Dict[str, float | str]:
+    """Settings that change OCR output; part of the extraction cache key."""
+    return {
+        "engine": engine_name(),
+        "tile_size_px": TILE_SIZE_PX,
+        "tile_overlap_px": TILE_OVERLAP_PX,
+        "pdf_resolution_dpi": PDF_RESOLUTION_DPI,
+        "large_image_side_px": LARGE_IMAGE_SIDE_PX,
+        "min_word_confidence": MIN_WORD_CONFIDENCE,
+    }
+
+
+# (page, left, top, width, height, text) in page pixels
+Word = Tuple[int, int, int, int, int, str]
+
+
+@dataclass(frozen=True)
+class Tile:
+    """A tile box plus its core; words are only kept if their centre is in the core.
+
+    Cores of neighbouring tiles meet in the middle of the overlap, so every
+    word is kept by exactly one tile.
+    """
+
+    page: int
+    x0: int
+    y0: int
+    x1: int
+    y1: int
+    core: Tuple[int, int, int, int]
+
+
+def _spans(length: int, size: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    """(start, end, core_start, core_end) along one axis."""
+    if length <= size:
+        return [(0, length, 0, length)]
+    starts = list(range(0, length - size, size - overlap)) + [length - size]
+    ends = [s + size for s in starts]
+    # Split each overlap down the middle between the two tiles sharing it
+    cuts = [(ends[i] + starts[i + 1]) // 2 for i in range(len(starts) - 1)]
+    return list(zip(starts, ends, [0] + cuts, cuts + [length]))
+
+
+def plan_tiles(page: int, width: int, height: int, size: int = TILE_SIZE_PX,
+               overlap: int = TILE_OVERLAP_PX) -> List[Tile]:
+    tiles: List[Tile] = []
+    for y0, y1, cy0, cy1 in _spans(height, size, overlap):
+        for x0, x1, cx0, cx1 in _spans(width, size, overlap):
+            tiles.append(Tile(page, x0, y0, x1, y1, (cx0, cy0, cx1, cy1)))
+    return tiles
+
+
+def ocr_tile_words(gray: np.ndarray, tile: Tile) -> Tuple[List[Word], Dict[str, float]]:
+    """Preprocess and OCR one tile; word boxes are returned in page coordinates.
+
+    Bar sketches found in the tile come back as words too (see sketch_token),
+    kept by the same core rule, so they join the line of their table row.
+    """
+    t0 = time.perf_counter()
+    img = preprocess_gray_for_ocr(gray)
+    t1 = time.perf_counter()
+    try:
+        ocr = recognize(img)
+    except Exception as ex:
+        raise RuntimeError("Tesseract not available or OCR failed. Install tesseract-ocr or provide CSV input.") from ex
+    t2 = time.perf_counter()
+
+    cx0, cy0, cx1, cy1 = tile.core
+    x = ocr.left + tile.x0
+    y = ocr.top + tile.y0
+    cx = x + ocr.width / 2
+    cy = y + ocr.height / 2
+    keep = ((ocr.conf > MIN_WORD_CONFIDENCE) & (ocr.text != "")
+            & (cx0 <= cx) & (cx < cx1) & (cy0 <= cy) & (cy < cy1))
+    idx = np.flatnonzero(keep)
+    words: List[Word] = list(zip([tile.page] * len(idx), x[idx].tolist(), y[idx].tolist(),
+                                 ocr.width[idx].tolist(), ocr.height[idx].tolist(), ocr.text[idx].tolist()))
+
+    for s in recognize_sketches(img):
+        sx, sy = s.x + tile.x0, s.y + tile.y0
+        if cx0 <= sx + s.width / 2 < cx1 and cy0 <= sy + s.height / 2 < cy1:
+            words.append((tile.page, sx, sy, s.width, s.height, sketch_token(s.shape)))
+    t3 = time.perf_counter()
+    return words, {"preprocess": (t1 - t0) * 1000.0, "tesseract": (t2 - t1) * 1000.0, "sketch": (t3 - t2) * 1000.0}
+
+
+def render_pdf_tile(path: str, tile: Tile, dpi: int = PDF_RESOLUTION_DPI) -> np.ndarray:
+    """Render only the tile's region of a PDF page as a grayscale array."""
+    import pypdfium2
+
+    scale = dpi / 72.0
+    doc = pypdfium2.PdfDocument(path)
+    try:
+        page = doc[tile.page]
+        width, height = _rotated_size(page)
+        crop = (tile.x0 / scale, height - tile.y1 / scale, width - tile.x1 / scale, tile.y0 / scale)
+        bitmap = page.render(scale=scale, crop=tuple(max(0.0, c) for c in crop), grayscale=True)
+        return np.array(bitmap.to_pil().convert("L"))
+    finally:
+        doc.close()
+
+
+def _rotated_size(page) -> Tuple[float, float]:
+    width, height = page.get_size()
+    if page.get_rotation() in (90, 270):
+        return height, width
+    return width, height
+
+
+def _ocr_pdf_tile(path: str, tile: Tile, dpi: int) -> Tuple[List[Word], Dict[str, float]]:
+    t0 = time.perf_counter()
+    gray = render_pdf_tile(path, tile, dpi)
+    render_ms = (time.perf_counter() - t0) * 1000.0
+    words, timings = ocr_tile_words(gray, tile)
+    timings["render"] = render_ms
+    return words, timings
+
+
+def pdf_tiles(path: str, dpi: int = PDF_RESOLUTION_DPI) -> Iterator[Tile]:
+    """Tile plan for every page; pages are only measured here, never rendered."""
+    import pypdfium2
+
+    scale = dpi / 72.0
+    doc = pypdfium2.PdfDocument(path)
+    try:
+        for index in range(len(doc)):
+            width, height = _rotated_size(doc[index])
+            yield from plan_tiles(index, int(width * scale), int(height * scale))
+    finally:
+        doc.close()
+
+
+def image_tiles(gray: np.ndarray) -> Iterator[Tuple[np.ndarray, Tile]]:
+    height, width = gray.shape[:2]
+    for tile in plan_tiles(0, width, height):
+        # Copy so only the tile, not the whole page, is pickled to the worker
+        yield np.ascontiguousarray(gray[tile.y0:tile.y1, tile.x0:tile.x1]), tile
+
+
+def _decode_gray(data: bytes) -> np.ndarray:
+    with Image.open(io.BytesIO(data)) as image:
+        return np.array(image.convert("L"))
+
+
+def is_large_image(data: bytes) -> bool:
+    # Only reads the header; unreadable data is left for the regular path to report
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return max(image.size) > LARGE_IMAGE_SIDE_PX
+    except Exception:
+        return False
+
+
+def merge_words_into_lines(words: Sequence[Word]) -> List[str]:
+    """Group words whose vertical centres are close into text lines, left to right.
+
+    Words are sorted by page and vertical centre; a word joins the current
+    line if it is on the same page and its centre is within half the median
+    word height of the line's running mean centre, so a skewed row is not
+    chained into the next one. Each line is then ordered by x with one more sort.
+    """
+    if not words:
+        return []
+    page, left, top, _, height, text = zip(*words)
+    page = np.asarray(page)
+    left = np.asarray(left, dtype=np.float64)
+    height = np.asarray(height, dtype=np.float64)
+    centre = np.asarray(top, dtype=np.float64) + height / 2
+    tolerance = 0.5 * float(np.median(height))
+
+    order = np.lexsort((centre, page))
+    line_id = np.empty(len(order), dtype=np.int64)
+    line, count, mean, prev_page = 0, 0, 0.0, None
+    for i, p, y in zip(order.tolist(), page[order].tolist(), centre[order].tolist()):
+        if p == prev_page and abs(y - mean) <= tolerance:
+            count += 1
+            mean += (y - mean) / count
+        else:
+            line += prev_page is not None
+            count, mean, prev_page = 1, y, p
+        line_id[i] = line
+
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    order = np.lexsort((rank, left, line_id))
+    starts = np.flatnonzero(np.concatenate([[True], np.diff(line_id[order]) != 0])).tolist()
+    ordered = [text[i] for i in order.tolist()]
+    return [" ".join(ordered[a:b]) for a, b in zip(starts, starts[1:] + [len(ordered)])]
+
+
+def _merge_results(results: Sequence[Tuple[List[Word], Dict[str, float]]],
+                   timings: Dict[str, float]) -> List[BBSItem]:
+    words: List[Word] = []
+    for tile_words, tile_timings in results:
+        words.extend(tile_words)
+        for stage, ms in tile_timings.items():
+            timings[stage] = timings.get(stage, 0.0) + ms
+    t0 = time.perf_counter()
+    lines = merge_words_into_lines(words)
+    t1 = time.perf_counter()
+    items = parse_bbs_lines(lines)
+    timings["merge"] = (t1 - t0) * 1000.0
+    timings["parse"] = (time.perf_counter() - t1) * 1000.0
+    return items
+
+
+async def extract_from_pdf_tiled(path: str, pool: OCRPool,
+                                 dpi: int = PDF_RESOLUTION_DPI) -> Tuple[List[BBSItem], Dict[str, float]]:
+    """OCR every page of a PDF tile by tile across the pool's worker processes.
+
+    Stage timings are summed over tiles, so they are CPU time rather than wall time.
+    """
+    timings: Dict[str, float] = {}
+    jobs = ((path, tile, dpi) for tile in pdf_tiles(path, dpi))
+    results = await pool.run_many(_ocr_pdf_tile, jobs)
+    return _merge_results(results, timings), timings
+
+
+async def extract_from_image_tiled(data: bytes, pool: OCRPool) -> Tuple[List[BBSItem], Dict[str, float]]:
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    gray = await asyncio.to_thread(_decode_gray, data)
+    timings["decode"] = (time.perf_counter() - t0) * 1000.0
+    results = await pool.run_many(ocr_tile_words, image_tiles(gray))
+    return _merge_results(results, timings), timings
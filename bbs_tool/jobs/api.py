@@ -0,0 +1,70 @@
+from __future__ import annotations
+from typing import Annotated, Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from ..models.schemas import BBSCalculationConfig
+from .runner import JobQueueFull, JobRunner
+from .store import FINISHED, Job, iter_result_bytes, read_result_events
+
+
+RESULT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+async def submit_upload(runner: JobRunner, source_type: str, file: UploadFile,
+                        config: Optional[str] = None, status_prefix: str = "") -> JSONResponse:
+    """Queue a generate job for an upload and answer 202 with where to poll it."""
+    try:
+        cfg = BBSCalculationConfig.model_validate_json(config) if config else None
+        job = await run_in_threadpool(runner.submit, source_type, file.filename or "", file.file, cfg)
+    except JobQueueFull as ex:
+        raise HTTPException(status_code=503, detail=str(ex), headers={"Retry-After": "30"})
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail=str(ex))
+    status_url = f"{status_prefix}/jobs/{job.id}"
+    return JSONResponse(
+        {**job.summary(), "status_url": status_url, "result_url": f"{status_url}/result"},
+        status_code=202,
+        headers={"Location": status_url},
+    )
+
+
+def job_routes(runner: JobRunner) -> APIRouter:
+    """Polling endpoints for jobs submitted to ``runner``."""
+    router = APIRouter()
+
+    def get_job(job_id: str) -> Job:
+        job = runner.store.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired job")
+        return job
+
+    @router.get("/jobs")
+    def job_queue() -> Dict[str, Any]:
+        """Worker and queue occupancy plus job counts by status."""
+        return runner.stats()
+
+    @router.get("/jobs/{job_id}")
+    def job_status(job_id: str) -> Dict[str, Any]:
+        return get_job(job_id).summary()
+
+    @router.get("/jobs/{job_id}/result")
+    def job_result(
+        job_id: str,
+        format: Annotated[str, Query(description="'json', 'ndjson' or 'csv'")] = "json",
+    ) -> Any:
+        """Rows calculated so far; complete once the job status is 'succeeded'."""
+        job = get_job(job_id)
+        headers = {"X-Job-Status": job.status}
+        if format == "json":
+            body = {"job_id": job.id, "status": job.status, "complete": job.status in FINISHED,
+                    **read_result_events(job)}
+            return JSONResponse(body, headers=headers)
+        if format not in RESULT_MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail="format must be 'json', 'ndjson' or 'csv'")
+        return StreamingResponse(iter_result_bytes(job, format), media_type=RESULT_MEDIA_TYPES[format],
+                                 headers=headers)
+
+    return router
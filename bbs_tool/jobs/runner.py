@@ -0,0 +1,193 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, List, Optional
+import asyncio
+import os
+import shutil
+import threading
+import time
+
+from ..calc.stream import STREAM_CHUNK_SIZE, calculation_events, column_events
+from ..validation.engine import BatchValidator
+from ..extract.cache import ExtractionCache
+from ..extract.csv_parser import iter_csv_columns
+from ..extract.drawing import extract_drawing
+from ..extract.ocr_pool import OCRPool, PoolSaturated
+from ..models.schemas import BBSCalculationConfig
+from .store import Job, JobStore, ResultWriter
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+JOB_WORKERS = _env_int("BBS_JOB_WORKERS", 2)
+JOB_QUEUE_DEPTH = _env_int("BBS_JOB_QUEUE_DEPTH", 32)
+# How long a job waits before retrying when the OCR pool is saturated
+JOB_OCR_RETRY_S = 1.0
+
+SOURCE_TYPES = ("csv", "image", "pdf")
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when every job worker is busy and the job queue is full."""
+
+
+class _UploadReader:
+    """Reads a stored upload for iter_csv_columns and tracks how far it got."""
+
+    def __init__(self, path) -> None:
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self.position = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        block = self._file.read(size)
+        self.position += len(block)
+        return block
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class JobRunner:
+    """Runs generate jobs (extract -> validate -> calculate) on a bounded thread pool.
+
+    At most ``workers`` jobs run at once and at most ``queue_depth`` more wait;
+    submitting beyond that raises JobQueueFull. Each job runs its own event
+    loop on a worker thread, so jobs outlive the request that submitted them.
+    """
+
+    def __init__(self, store: JobStore, pool: OCRPool, cache: ExtractionCache,
+                 workers: int = JOB_WORKERS, queue_depth: int = JOB_QUEUE_DEPTH):
+        self.store = store
+        self.pool = pool
+        self.cache = cache
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bbs-job")
+            return self._executor
+
+    def submit(self, source_type: str, filename: str, upload: BinaryIO,
+               config: Optional[BBSCalculationConfig] = None) -> Job:
+        """Store the upload and queue a job for it; returns immediately."""
+        if source_type not in SOURCE_TYPES:
+            raise ValueError("Unsupported source_type. Use 'csv', 'image' or 'pdf'.")
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                raise JobQueueFull(f"Job queue full ({self.workers} running, {self.queue_depth} queued)")
+            self.in_flight += 1
+        job: Optional[Job] = None
+        try:
+            job = self.store.create(source_type, filename, config or BBSCalculationConfig())
+            with open(job.upload_path, "wb") as f:
+                shutil.copyfileobj(upload, f)
+            self._get_executor().submit(self._run, job)
+        except BaseException:
+            # A job that never got queued must not linger as "queued"
+            if job is not None:
+                self.store.remove(job)
+            self._release()
+            raise
+        return job
+
+    def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        writer: Optional[ResultWriter] = None
+        try:
+            writer = ResultWriter(job)
+            asyncio.run(self._process(job, writer))
+        except Exception as ex:
+            job.status = "failed"
+            job.error = str(ex)
+        else:
+            job.status = "succeeded"
+            job.stage = "done"
+            job.progress = 1.0
+        finally:
+            if writer is not None:
+                writer.close()
+            job.upload_path.unlink(missing_ok=True)
+            self.store.finish(job)
+            self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    async def _process(self, job: Job, writer: ResultWriter) -> None:
+        if job.source_type == "csv":
+            await self._process_csv(job, writer)
+            return
+
+        job.stage = "extract"
+        started = time.perf_counter()
+        # A PDF is OCR'd straight from the stored upload, which is hashed in chunks
+        content = str(job.upload_path) if job.source_type == "pdf" else job.upload_path.read_bytes()
+        items, timings = await self._extract_drawing(job.source_type, content)
+        job.timings_ms.update(timings)
+        job.timings_ms["extract"] = (time.perf_counter() - started) * 1000.0
+
+        job.stage = "calculate"
+        started = time.perf_counter()
+        job.items = len(items)
+        validator = BatchValidator(job.config)
+        for start in range(0, len(items), STREAM_CHUNK_SIZE):
+            writer.write(calculation_events(items[start:start + STREAM_CHUNK_SIZE], job.config, validator))
+            job.progress = min(start + STREAM_CHUNK_SIZE, len(items)) / len(items)
+        job.timings_ms["calculate"] = (time.perf_counter() - started) * 1000.0
+
+    async def _extract_drawing(self, source_type: str, content: bytes | str):
+        # Jobs are already queued, so a busy OCR pool means wait rather than fail
+        while True:
+            try:
+                return await extract_drawing(source_type, content, self.pool, self.cache)
+            except PoolSaturated:
+                await asyncio.sleep(JOB_OCR_RETRY_S)
+
+    async def _process_csv(self, job: Job, writer: ResultWriter) -> None:
+        # Parsing and calculation interleave per chunk, so progress is the share of the upload read
+        reader = _UploadReader(job.upload_path)
+        warnings: List[str] = []
+        validator = BatchValidator(job.config)
+        started = time.perf_counter()
+        try:
+            job.stage = "calculate"
+            async for columns in iter_csv_columns(reader, warnings):
+                job.items += len(columns)
+                writer.write(column_events(columns, job.config, validator))
+                writer.write([("warning", w) for w in warnings])
+                warnings.clear()
+                job.progress = reader.position / reader.size if reader.size else 1.0
+            writer.write([("warning", w) for w in warnings])
+        finally:
+            reader.close()
+        job.timings_ms["calculate"] = (time.perf_counter() - started) * 1000.0
+
+    def stats(self) -> Dict[str, Any]:
+        in_flight = self.in_flight
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "running": min(in_flight, self.workers),
+            "queued": max(0, in_flight - self.workers),
+            "jobs": self.store.counts(),
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
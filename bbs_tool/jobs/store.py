@@ -0,0 +1,207 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from ..calc.stream import Event, csv_chunk, csv_header, ndjson_chunk
+from ..models.schemas import BBSCalculationConfig
+
+
+JOB_DIR = os.environ.get("BBS_JOB_DIR") or str(Path(tempfile.gettempdir()) / "bbs_tool_jobs")
+JOB_TTL_S = float(os.environ.get("BBS_JOB_TTL_S", "3600"))
+
+RESULT_FILES = {"ndjson": "results.ndjson", "csv": "results.csv"}
+FINISHED = ("succeeded", "failed")
+# Written into a job's directory when it finishes; its mtime is the finish time
+FINISHED_MARKER = "finished"
+
+
+@dataclass
+class Job:
+    """State of one generate job. Results are appended to files in ``directory``.
+
+    ``committed`` holds how many bytes of each result file are complete rows,
+    so partial results can be read while the job is still writing.
+    """
+
+    id: str
+    source_type: str
+    filename: str
+    directory: Path
+    config: BBSCalculationConfig
+    status: str = "queued"  # queued, running, succeeded, failed
+    stage: str = "queued"   # queued, extract, calculate, done
+    progress: float = 0.0
+    items: int = 0
+    results: int = 0
+    warnings: int = 0
+    error: Optional[str] = None
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    committed: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(RESULT_FILES, 0))
+
+    @property
+    def upload_path(self) -> Path:
+        return self.directory / "upload"
+
+    def result_path(self, fmt: str) -> Path:
+        return self.directory / RESULT_FILES[fmt]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "source_type": self.source_type,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 4),
+            "items": self.items,
+            "results": self.results,
+            "warnings": self.warnings,
+            "error": self.error,
+            "timings_ms": self.timings_ms,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ResultWriter:
+    """Appends calculation events to a job's NDJSON and CSV result files."""
+
+    def __init__(self, job: Job) -> None:
+        self.job = job
+        self._files = {fmt: open(job.result_path(fmt), "w", encoding="utf-8", newline="") for fmt in RESULT_FILES}
+        self._files["csv"].write(csv_header())
+        self._commit()
+
+    def write(self, events: List[Event]) -> None:
+        if not events:
+            return
+        self._files["ndjson"].write(ndjson_chunk(events))
+        self._files["csv"].write(csv_chunk(events))
+        results = sum(1 for kind, _ in events if kind == "result")
+        self.job.results += results
+        self.job.warnings += len(events) - results
+        self._commit()
+
+    def _commit(self) -> None:
+        for fmt, f in self._files.items():
+            f.flush()
+            self.job.committed[fmt] = f.tell()
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+
+
+class JobStore:
+    """Jobs of this process, each with a directory under ``directory``.
+
+    Finished jobs and their files are removed ``ttl_s`` seconds after they
+    finish. ``remove_stale_dirs`` does the same for directories of finished
+    jobs left behind by an earlier process; it is called at app startup.
+    """
+
+    def __init__(self, directory: str = JOB_DIR, ttl_s: float = JOB_TTL_S):
+        self.directory = Path(directory)
+        self.ttl_s = ttl_s
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def create(self, source_type: str, filename: str, config: BBSCalculationConfig) -> Job:
+        self.purge_expired()
+        job_id = uuid.uuid4().hex
+        directory = self.directory / job_id
+        directory.mkdir(parents=True)
+        job = Job(job_id, source_type, filename, directory, config)
+        with self._lock:
+            self._jobs[job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self.purge_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def remove(self, job: Job) -> None:
+        """Forget ``job`` and delete its files, e.g. when it could not be queued."""
+        with self._lock:
+            self._jobs.pop(job.id, None)
+        shutil.rmtree(job.directory, ignore_errors=True)
+
+    def finish(self, job: Job) -> None:
+        """Record that ``job`` is done so its directory can expire."""
+        (job.directory / FINISHED_MARKER).touch()
+        job.finished_at = time.time()
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        cutoff = (now or time.time()) - self.ttl_s
+        with self._lock:
+            expired = [j for j in self._jobs.values() if j.finished_at is not None and j.finished_at < cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            shutil.rmtree(job.directory, ignore_errors=True)
+        return len(expired)
+
+    def remove_stale_dirs(self, now: Optional[float] = None) -> int:
+        """Remove expired directories of finished jobs not held by this store.
+
+        Directories without a finish marker may belong to a job still running
+        in another process sharing ``directory``, so they are left alone.
+        """
+        if not self.directory.is_dir():
+            return 0
+        cutoff = (now or time.time()) - self.ttl_s
+        with self._lock:
+            held = set(self._jobs)
+        removed = 0
+        for path in self.directory.iterdir():
+            marker = path / FINISHED_MARKER
+            if path.name in held or not marker.is_file() or marker.stat().st_mtime >= cutoff:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        return removed
+
+    def counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(("queued", "running") + FINISHED, 0)
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return counts
+
+
+def iter_result_bytes(job: Job, fmt: str, block_size: int = 1 << 16) -> Iterator[bytes]:
+    """Committed bytes of a result file; rows still being written are not included."""
+    remaining = job.committed[fmt]
+    with open(job.result_path(fmt), "rb") as f:
+        while remaining > 0:
+            block = f.read(min(block_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def read_result_events(job: Job) -> Dict[str, List[Any]]:
+    """Committed results and warnings of a job, as in BBSCalculationResponse."""
+    results: List[Dict[str, Any]] = []
+    warnings: List[str] = []
+    for line in b"".join(iter_result_bytes(job, "ndjson")).splitlines():
+        row = json.loads(line)
+        if row.pop("type") == "result":
+            results.append(row)
+        else:
+            warnings.append(row["message"])
+    return {"results": results, "warnings": warnings}
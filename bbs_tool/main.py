@@ -1,17 +1,49 @@
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, HTMLResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from starlette.concurrency import run_in_threadpool
+from typing import Annotated, List, Optional, Dict, Any
+from contextlib import asynccontextmanager
 import io
-import csv
+import tempfile
+import time
 
-from .models.schemas import BBSItem, BBSCalculationConfig, BBSCalculationRequest, BBSCalculationResponse
-from .extract.ocr_extractor import extract_from_image
-from .calc.is2502 import calculate_cutting_length_for_item, unit_weight_kg_per_m
-from .validation.validators import validate_item
+from .models.schemas import (BBSItem, BBSCalculationConfig, BBSCalculationRequest, BBSCalculationResponse,
+                             CuttingPlanRequest, CuttingStockConfig, WhatIfRequest)
+from .extract.drawing import extract_drawing
+from .extract.ocr_pool import OCRPool, PoolSaturated
+from .extract.cache import ExtractionCache, copy_with_digest
+from .calc.columnar import COLUMNAR_MEDIA_TYPES, calculate_columnar, columnar_format
+from .calc.cutting_stock import optimize_cutting
+from .calc.is2502 import allowance_table, calculate_cutting_length_for_item
+from .calc.stream import calculation_events, column_events, iter_calculation_events, encode_lines, aencode_lines
+from .calc.whatif import evaluate_configs
+from .extract.csv_parser import iter_csv_columns, iter_csv_items
+from .calc.batch import ItemColumns
+from .validation.engine import BatchValidator
+from .jobs.api import job_routes, submit_upload
+from .jobs.runner import JobRunner
+from .jobs.store import JobStore
+from .metrics import ITEMS, instrument, stage_timer
 
-app = FastAPI(title="BBS Tool API", version="0.1.0")
+ocr_pool = OCRPool()
+extraction_cache = ExtractionCache()
+job_runner = JobRunner(JobStore(), ocr_pool, extraction_cache)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_runner.store.remove_stale_dirs()
+    yield
+    job_runner.shutdown(wait=False)
+    ocr_pool.shutdown()
+
+
+app = FastAPI(title="BBS Tool API", version="0.1.0", lifespan=lifespan)
+
+# Requests with more items than this go through the vectorized batch engine.
+BATCH_CALCULATION_THRESHOLD = 1000
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,6 +52,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+instrument(app, "api")
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -52,9 +85,10 @@ def index() -> str:
                   <select name='source_type'>
                     <option value='csv'>CSV</option>
                     <option value='image'>Image</option>
+                    <option value='pdf'>PDF drawing</option>
                   </select>
                   <br/>
-                  <input type='file' name='file' accept='.csv,image/*' required />
+                  <input type='file' name='file' accept='.csv,.pdf,image/*' required />
                   <br/>
                   <button type='submit'>Extract</button>
                 </form>
@@ -106,68 +140,249 @@ def index() -> str:
     )
 
 
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _stream_format(stream: Optional[str], accept: Optional[str]) -> Optional[str]:
+    if stream:
+        if stream not in STREAM_MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail="stream must be 'ndjson' or 'csv'")
+        return stream
+    for fmt, media_type in STREAM_MEDIA_TYPES.items():
+        if accept and media_type in accept:
+            return fmt
+    return None
+
+
+class _DetachedUpload:
+    """Takes over an upload's file so it outlives the request form.
+
+    FastAPI closes form files when the endpoint returns, which is before a
+    StreamingResponse body is produced.
+    """
+
+    def __init__(self, upload: UploadFile) -> None:
+        self._file = upload.file
+        upload.file = io.BytesIO()
+
+    async def read(self, size: int = -1) -> bytes:
+        return await run_in_threadpool(self._file.read, size)
+
+    def close(self) -> None:
+        self._file.close()
+
+
 class ExtractResponse(BaseModel):
     items: List[BBSItem]
     warnings: List[str] = []
+    timings_ms: Dict[str, float] = {}
 
 
 @app.post("/api/extract", response_model=ExtractResponse)
 async def extract(source_type: str = Form(...), file: UploadFile = File(...)) -> Any:
     warnings: List[str] = []
-    content = await file.read()
+    timings_ms: Dict[str, float] = {}
 
     items: List[BBSItem] = []
     if source_type == "csv":
+        async for batch in iter_csv_items(file, warnings):
+            items.extend(batch)
+    elif source_type in ("image", "pdf"):
+        started = time.perf_counter()
         try:
-            text = content.decode("utf-8")
-        except Exception:
-            text = content.decode("latin-1")
-        reader = csv.DictReader(io.StringIO(text))
-        for row in reader:
-            item = BBSItem.from_csv_row(row)
-            items.append(item)
-    elif source_type == "image":
-        try:
-            items = extract_from_image(content)
+            if source_type == "pdf":
+                # Spooled to disk while it is hashed, since the OCR workers read the PDF from a file
+                with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+                    digest = await run_in_threadpool(copy_with_digest, file.file, tmp)
+                    tmp.flush()
+                    items, timings_ms = await extract_drawing(source_type, tmp.name, ocr_pool, extraction_cache, digest)
+            else:
+                content = await file.read()
+                items, timings_ms = await extract_drawing(source_type, content, ocr_pool, extraction_cache)
+        except PoolSaturated as ex:
+            raise HTTPException(status_code=503, detail=str(ex), headers={"Retry-After": "5"})
         except Exception as ex:
             warnings.append(f"OCR extraction failed: {ex}")
             items = []
+        timings_ms["total"] = (time.perf_counter() - started) * 1000.0
     else:
-        warnings.append("Unsupported source_type. Use 'csv' or 'image'.")
+        warnings.append("Unsupported source_type. Use 'csv', 'image' or 'pdf'.")
+
+    return ExtractResponse(items=items, warnings=warnings, timings_ms=timings_ms)
+
+
+@app.get("/api/extract/cache")
+def extract_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters and size of the OCR extraction cache."""
+    return extraction_cache.stats()
+
+
+@app.post("/api/extract/calculate")
+async def extract_and_calculate(
+    file: UploadFile = File(...),
+    config: Optional[str] = Form(None, description="BBSCalculationConfig as JSON"),
+    stream: Annotated[str, Query(description="Stream rows as 'ndjson' or 'csv'")] = "ndjson",
+) -> StreamingResponse:
+    """Parse a CSV upload and stream calculated rows without materialising the item list."""
+    fmt = _stream_format(stream, None)
+    try:
+        cfg = BBSCalculationConfig.model_validate_json(config) if config else BBSCalculationConfig()
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail=str(ex))
+    upload = _DetachedUpload(file)
+    validator = BatchValidator(cfg)
+
+    async def chunks():
+        warnings: List[str] = []
+        try:
+            # One batch per record batch of the upload, a few hundred rows each
+            async for columns in iter_csv_columns(upload, warnings):
+                yield await run_in_threadpool(column_events, columns, cfg, validator)
+                if warnings:
+                    yield [("warning", w) for w in warnings]
+                    warnings.clear()
+        finally:
+            upload.close()
 
-    return ExtractResponse(items=items, warnings=warnings)
+    return StreamingResponse(aencode_lines(fmt, chunks()), media_type=STREAM_MEDIA_TYPES[fmt])
 
 
 @app.post("/api/calculate", response_model=BBSCalculationResponse)
-def calculate(req: BBSCalculationRequest) -> BBSCalculationResponse:
+def calculate(
+    req: BBSCalculationRequest,
+    stream: Annotated[Optional[str], Query(description="Stream rows as 'ndjson' or 'csv'")] = None,
+    accept: Annotated[Optional[str], Header()] = None,
+) -> Any:
+    config = req.config or BBSCalculationConfig()
+    fmt = _stream_format(stream, accept)
+    if fmt is not None:
+        lines = encode_lines(fmt, iter_calculation_events(req.items, config))
+        return StreamingResponse(lines, media_type=STREAM_MEDIA_TYPES[fmt])
+    if len(req.items) > BATCH_CALCULATION_THRESHOLD:
+        return _calculate_batched(req.items, config)
+    return _calculate_scalar(req.items, config)
+
+
+def _calculate_scalar(items: List[BBSItem], config: BBSCalculationConfig) -> BBSCalculationResponse:
     results: List[Dict[str, Any]] = []
     warnings: List[str] = []
+    table = allowance_table(config)
+    with stage_timer("calculate.validate"):
+        issues = BatchValidator(config).validate(ItemColumns.from_items(items))
+    with stage_timer("calculate.compute"):
+        for i, item in enumerate(items):
+            row_issues = issues.get(i, ())
+            warnings.extend(issue.message for issue in row_issues)
+            if any(issue.severity == "error" for issue in row_issues):
+                continue
+            try:
+                cutting_length_mm = calculate_cutting_length_for_item(item, config, table)
+                unit_wt = table.unit_weight(item.diameter_mm)
+                total_length_m = (cutting_length_mm / 1000.0) * item.quantity
+                total_weight_kg = unit_wt * total_length_m
+                results.append({
+                    "bar_mark": item.bar_mark,
+                    "shape": item.shape,
+                    "diameter_mm": item.diameter_mm,
+                    "cutting_length_mm": round(cutting_length_mm, 1),
+                    "unit_weight_kg_per_m": round(unit_wt, 4),
+                    "quantity": item.quantity,
+                    "total_length_m": round(total_length_m, 3),
+                    "total_weight_kg": round(total_weight_kg, 3),
+                })
+            except Exception as ex:
+                warnings.append(f"Calculation failed for {item.bar_mark}: {ex}")
+    ITEMS.inc(len(items), "calculated")
+
+    return BBSCalculationResponse(results=results, warnings=warnings)
+
+
+def _calculate_batched(items: List[BBSItem], config: BBSCalculationConfig) -> BBSCalculationResponse:
+    results: List[Dict[str, Any]] = []
+    warnings: List[str] = []
+    for kind, payload in calculation_events(items, config):
+        if kind == "result":
+            results.append(payload)
+        else:
+            warnings.append(payload)
+
+    # Records are built from typed arrays already; skip re-validating every row
+    return BBSCalculationResponse.model_construct(results=results, warnings=warnings)
+
+
+@app.post("/api/calculate/columnar")
+async def calculate_columnar_endpoint(
+    request: Request,
+    config: Annotated[Optional[str], Query(description="BBSCalculationConfig as JSON")] = None,
+    content_type: Annotated[Optional[str], Header()] = None,
+    accept: Annotated[Optional[str], Header()] = None,
+) -> Response:
+    """Items as an Arrow IPC stream or Parquet body; results come back as Arrow or Parquet.
+
+    The response format follows ``Accept`` and defaults to the request's.
+    Warnings are a JSON list in the result schema metadata under ``warnings``.
+    """
+    in_fmt = columnar_format(content_type)
+    if in_fmt is None:
+        raise HTTPException(status_code=415, detail="Send items as " + " or ".join(COLUMNAR_MEDIA_TYPES.values()))
+    out_fmt = columnar_format(accept) or in_fmt
+    body = await request.body()
+    try:
+        cfg = BBSCalculationConfig.model_validate_json(config) if config else BBSCalculationConfig()
+        content = await run_in_threadpool(calculate_columnar, body, in_fmt, out_fmt, cfg)
+    except RuntimeError as ex:
+        raise HTTPException(status_code=415, detail=str(ex))
+    except ValueError as ex:
+        raise HTTPException(status_code=422, detail=str(ex))
+    return Response(content, media_type=COLUMNAR_MEDIA_TYPES[out_fmt])
+
+
+@app.post("/api/what-if")
+def what_if(req: WhatIfRequest) -> Dict[str, Any]:
+    """One item set under several configs: totals per config and diameter, and item deltas against ``base``."""
+    try:
+        result = evaluate_configs(req.items, req.configs, req.base)
+    except ValueError as ex:
+        raise HTTPException(status_code=422, detail=str(ex))
+    return result.to_dict()
+
+
+@app.post("/api/validate")
+def validate(req: BBSCalculationRequest) -> Dict[str, Any]:
+    """Structured validation issues for a whole schedule, with a count per code."""
     config = req.config or BBSCalculationConfig()
+    issues = BatchValidator(config).validate(ItemColumns.from_items(req.items))
+    flat = [issue for i in sorted(issues) for issue in issues[i]]
+    counts: Dict[str, int] = {}
+    for issue in flat:
+        counts[issue.code] = counts.get(issue.code, 0) + 1
+    return {"issues": [issue.to_dict() for issue in flat], "counts": counts}
 
-    for item in req.items:
-        item_warnings = validate_item(item, config)
-        warnings.extend(item_warnings)
-        try:
-            cutting_length_mm = calculate_cutting_length_for_item(item, config)
-            unit_wt = unit_weight_kg_per_m(item.diameter_mm, config)
-            total_length_m = (cutting_length_mm / 1000.0) * item.quantity
-            total_weight_kg = unit_wt * total_length_m
-            results.append({
-                "bar_mark": item.bar_mark,
-                "shape": item.shape,
-                "diameter_mm": item.diameter_mm,
-                "cutting_length_mm": round(cutting_length_mm, 1),
-                "unit_weight_kg_per_m": round(unit_wt, 4),
-                "quantity": item.quantity,
-                "total_length_m": round(total_length_m, 3),
-                "total_weight_kg": round(total_weight_kg, 3),
-            })
-        except Exception as ex:
-            warnings.append(f"Calculation failed for {item.bar_mark}: {ex}")
 
-    return BBSCalculationResponse(results=results, warnings=warnings)
+@app.post("/api/cutting-plan")
+def cutting_plan(req: CuttingPlanRequest) -> Dict[str, Any]:
+    """Cutting patterns from stock bars per diameter, with bar counts and wastage."""
+    stock = req.stock or CuttingStockConfig()
+    plans, warnings = optimize_cutting(req.items, req.config or BBSCalculationConfig(), stock)
+    bars = sum(p.bars for p in plans)
+    used = sum(p.used_length_mm for p in plans)
+    wastage = 100.0 * (1 - used / (bars * stock.stock_length_mm)) if bars else 0.0
+    return {
+        "plans": [p.to_dict() for p in plans],
+        "stock_bars": bars,
+        "wastage_pct": round(wastage, 2),
+        "warnings": warnings,
+    }
+
+
+@app.post("/api/generate", status_code=202)
+async def generate(
+    source_type: str = Form(...),
+    file: UploadFile = File(...),
+    config: Optional[str] = Form(None, description="BBSCalculationConfig as JSON"),
+) -> JSONResponse:
+    """Queue extract -> validate -> calculate for an upload; poll the returned job for progress."""
+    return await submit_upload(job_runner, source_type, file, config, status_prefix="/api")
 
 
-@app.post("/api/generate")
-def generate():
-    return JSONResponse({"message": "Not implemented in this initial version. Use /api/extract then /api/calculate."})
\ No newline at end of file
+app.include_router(job_routes(job_runner), prefix="/api")
@@ -0,0 +1,300 @@
+from __future__ import annotations
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+# Opt-in sampling profiler: requests slower than BBS_PROFILE_SLOW_MS (0 = off) are
+# written out as collapsed stacks; only BBS_PROFILE_SAMPLE_RATE of requests are sampled.
+PROFILE_SLOW_MS = _env_float("BBS_PROFILE_SLOW_MS", 0.0)
+PROFILE_SAMPLE_RATE = _env_float("BBS_PROFILE_SAMPLE_RATE", 0.1)
+PROFILE_INTERVAL_MS = _env_float("BBS_PROFILE_INTERVAL_MS", 5.0)
+PROFILE_DIR = Path(os.environ.get("BBS_PROFILE_DIR") or Path(tempfile.gettempdir()) / "bbs_tool_profiles")
+
+LATENCY_BUCKETS_S = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _label_text(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic count per label set; label values are passed positionally."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            values = list(self._values.items())
+        lines.extend(f"{self.name}{self._label_text(k)} {_number(v)}" for k, v in values)
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS_S):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][slot] += 1
+            entry[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            values = [(k, list(counts), total[0]) for k, (counts, total) in self._values.items()]
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket_labels = self._label_text(labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._label_text(labels)} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+REGISTRY: List[_Metric] = []
+
+HTTP_REQUESTS = Counter("bbs_http_requests_total", "HTTP requests by route and status.",
+                        ("app", "method", "route", "status"))
+HTTP_LATENCY = Histogram("bbs_http_request_duration_seconds", "Time from request start to the last body byte.",
+                         ("app", "method", "route"))
+HTTP_REQUEST_BYTES = Counter("bbs_http_request_bytes_total", "Request body bytes received.", ("app", "route"))
+HTTP_RESPONSE_BYTES = Counter("bbs_http_response_bytes_total", "Response body bytes sent.", ("app", "route"))
+STAGE_LATENCY = Histogram("bbs_stage_duration_seconds", "Time spent per pipeline stage.", ("stage",))
+ITEMS = Counter("bbs_items_total", "BBS items extracted or calculated.", ("stage",))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - started, stage)
+
+
+# Stage names used in the timings_ms dicts of the OCR code, which runs in worker processes
+_OCR_STAGES = {
+    "decode": "extract.decode",
+    "render": "extract.pdf_render",
+    "preprocess": "extract.ocr_preprocess",
+    "tesseract": "extract.tesseract",
+    "sketch": "extract.sketch_recognition",
+    "merge": "extract.line_merge",
+    "parse": "extract.line_parse",
+    "cache": "extract.cache_lookup",
+}
+
+
+def record_ocr_timings(timings_ms: Dict[str, float]) -> None:
+    for key, ms in timings_ms.items():
+        stage = _OCR_STAGES.get(key)
+        if stage is not None:
+            STAGE_LATENCY.observe(ms / 1000.0, stage)
+
+
+class SlowRequestProfiler:
+    """Samples every thread's stack while a request runs; keeps the samples only if it was slow.
+
+    Output is one collapsed-stack file per slow request (``frame;frame;frame count``
+    per line), which flamegraph tools read directly.
+    """
+
+    def __init__(self, slow_ms: float, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 interval_ms: float = PROFILE_INTERVAL_MS, out_dir: Path = PROFILE_DIR):
+        self.slow_s = slow_ms / 1000.0
+        self.sample_rate = sample_rate
+        self.interval_s = interval_ms / 1000.0
+        self.out_dir = Path(out_dir)
+
+    @classmethod
+    def from_env(cls) -> Optional["SlowRequestProfiler"]:
+        return cls(PROFILE_SLOW_MS) if PROFILE_SLOW_MS > 0 else None
+
+    def start(self) -> Optional["_Sampler"]:
+        if random.random() >= self.sample_rate:
+            return None
+        sampler = _Sampler(self.interval_s)
+        sampler.start()
+        return sampler
+
+    def finish(self, sampler: "_Sampler", elapsed_s: float, method: str, route: str) -> Optional[Path]:
+        stacks = sampler.stop()
+        if elapsed_s < self.slow_s or not stacks:
+            return None
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{route.strip('/').replace('/', '_') or 'root'}" \
+               f"-{int(elapsed_s * 1000)}ms.folded"
+        path = self.out_dir / name
+        path.write_text("".join(f"{stack} {n}\n" for stack, n in sorted(stacks.items())))
+        logger.warning("Slow request %s %s took %.0f ms; profile written to %s", method, route, elapsed_s * 1000, path)
+        return path
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, interval_s: float):
+        super().__init__(name="bbs-profiler", daemon=True)
+        self.interval_s = interval_s
+        self.stacks: Dict[str, int] = {}
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._done.wait(self.interval_s):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                key = ";".join([names.get(ident, str(ident))] + parts[::-1])
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def stop(self) -> Dict[str, int]:
+        self._done.set()
+        self.join()
+        return self.stacks
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and body sizes per route template."""
+
+    def __init__(self, app: Callable, app_name: str, profiler: Optional[SlowRequestProfiler] = None):
+        self.app = app
+        self.app_name = app_name
+        self.profiler = profiler
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        state = {"status": 500, "in": 0, "out": 0}
+
+        async def counting_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["in"] += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["out"] += len(message.get("body", b""))
+            await send(message)
+
+        sampler = self.profiler.start() if self.profiler else None
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = _route_template(scope)
+            method = scope["method"]
+            HTTP_REQUESTS.inc(1, self.app_name, method, route, str(state["status"]))
+            HTTP_LATENCY.observe(elapsed, self.app_name, method, route)
+            HTTP_REQUEST_BYTES.inc(state["in"], self.app_name, route)
+            HTTP_RESPONSE_BYTES.inc(state["out"], self.app_name, route)
+            if sampler is not None:
+                self.profiler.finish(sampler, elapsed, method, route)
+
+
+def _route_template(scope: Dict[str, Any]) -> str:
+    """Matched path template, e.g. ``/api/jobs/{job_id}``; the raw path would make labels unbounded."""
+    # FastAPI keeps routes of an included router unprefixed and records the
+    # prefixed path in its per-request context
+    effective = scope.get("fastapi", {}).get("effective_route_context")
+    if effective is not None:
+        return effective.path
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+def instrument(app, app_name: str) -> None:
+    """Add the metrics middleware and a GET /metrics endpoint to a FastAPI app."""
+    from fastapi.responses import PlainTextResponse
+
+    app.add_middleware(MetricsMiddleware, app_name=app_name, profiler=SlowRequestProfiler.from_env())
+
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    def metrics() -> PlainTextResponse:
+        return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
@@ -41,6 +41,9 @@ class BBSCalculationConfig(BaseModel):
         description="Weight formula: 'IS_D2_OVER_162' or 'DENSITY_PI_R2'",
     )
     steel_density_kg_per_m3: float = 7850.0
+    min_leg_multiplier: float = Field(4.0, description="Warn when a dimension is shorter than this multiple of d")
+    min_bend_radius_multiplier: float = Field(2.0, description="Warn when the default bend radius is below this multiple of d")
+    check_duplicate_marks: bool = Field(True, description="Warn on bar marks repeated within a schedule")
 
 
 class BBSCalculationRequest(BaseModel):
@@ -50,4 +53,22 @@ class BBSCalculationRequest(BaseModel):
 
 class BBSCalculationResponse(BaseModel):
     results: List[Dict[str, float | int | str]]
-    warnings: List[str] = []
\ No newline at end of file
+    warnings: List[str] = []
+
+
+class CuttingStockConfig(BaseModel):
+    stock_length_mm: float = Field(12000.0, gt=0, le=24000.0, description="Length of the stock bars pieces are cut from")
+    kerf_mm: float = Field(0.0, ge=0, description="Material lost per cut")
+    time_budget_s: float = Field(2.0, ge=0, le=5.0, description="Time allowed for improving on first-fit-decreasing, over all diameters")
+
+
+class CuttingPlanRequest(BaseModel):
+    items: List[BBSItem]
+    config: Optional[BBSCalculationConfig] = None
+    stock: Optional[CuttingStockConfig] = None
+
+
+class WhatIfRequest(BaseModel):
+    items: List[BBSItem]
+    configs: List[BBSCalculationConfig] = Field(..., min_length=1, description="Configs to evaluate the items under")
+    base: int = Field(0, ge=0, description="Index of the config deltas are taken against")
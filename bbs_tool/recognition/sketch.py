@@ -0,0 +1,291 @@
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+import hashlib
+import os
+import threading
+
+import cv2
+import numpy as np
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+# Table cells smaller than this (either side) are never treated as sketch cells
+MIN_CELL_SIDE_PX = 24
+# A grid is an ink component enclosing at least this many cells
+MIN_GRID_CELLS = 2
+# Ink components at least this long relative to their cell's shorter side make up the sketch
+SKETCH_SPAN_FRACTION = 0.6
+# A hole this large relative to the hull makes the stroke a closed loop
+CLOSED_HOLE_FRACTION = 0.25
+# Sketches whose nearest template is further than this are left unclassified
+MAX_MATCH_DISTANCE = 0.3
+# Descriptors are computed across threads (OpenCV releases the GIL) once a page has this many sketches
+PARALLEL_MIN_SKETCHES = 64
+SKETCH_WORKERS = _env_int("BBS_SKETCH_WORKERS", min(4, os.cpu_count() or 1))
+DESCRIPTOR_CACHE_SIZE = _env_int("BBS_SKETCH_CACHE_SIZE", 4096)
+
+# closed, elongation, rect fill, widest hull angle / 180; a closed loop outweighs the rest
+FEATURE_WEIGHTS = np.array([3.0, 1.5, 1.0, 1.5])
+
+
+@dataclass(frozen=True)
+class Sketch:
+    """A classified bar sketch: its cell box in image pixels and the shape code."""
+
+    x: int
+    y: int
+    width: int
+    height: int
+    shape: str
+    distance: float
+
+
+class DescriptorCache:
+    """Thread-safe LRU of stroke descriptors keyed by a hash of the stroke pixels.
+
+    Bar sketches repeat across a sheet (and across re-uploads of the same
+    sheet), so most strokes after the first few are answered from here.
+    """
+
+    def __init__(self, max_entries: int = DESCRIPTOR_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(stroke: np.ndarray) -> bytes:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(np.asarray(stroke.shape, dtype=np.int64).tobytes())
+        h.update(np.packbits(stroke > 0).tobytes())
+        return h.digest()
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: bytes, value: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_cache = DescriptorCache()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(1, SKETCH_WORKERS), thread_name_prefix="sketch")
+        return _executor
+
+
+def ink_mask(binary: np.ndarray) -> np.ndarray:
+    """255 where a thresholded page (dark ink on white) has ink."""
+    return cv2.threshold(binary, 127, 255, cv2.THRESH_BINARY_INV)[1]
+
+
+Cell = Tuple[int, int, int, int]
+
+
+def find_sketch_cells(ink: np.ndarray) -> List[Tuple[Cell, np.ndarray]]:
+    """Each table cell (x, y, w, h) holding a sketch, with its strokes cropped out.
+
+    The grid is any ink component that encloses several cell-sized holes; a
+    closed stirrup sketch encloses one, a character is too small. Cells cut
+    by the image border are not holes, so partial cells at tile edges are
+    skipped. A cell holds a sketch when ink components in it are long
+    compared with the cell, which characters of text are not. The page is
+    labelled once and each cell reads its components from that labelling.
+    """
+    _, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    is_grid = np.zeros(len(stats), dtype=bool)
+    is_grid[0] = True
+    cells: List[Cell] = []
+    big = np.flatnonzero((stats[:, cv2.CC_STAT_WIDTH] >= 2 * MIN_CELL_SIDE_PX)
+                         & (stats[:, cv2.CC_STAT_HEIGHT] >= 2 * MIN_CELL_SIDE_PX))
+    for k in big[big > 0].tolist():
+        x, y, w, h = stats[k, :4].tolist()
+        component = (labels[y:y + h, x:x + w] == k).astype(np.uint8)
+        contours, hierarchy = cv2.findContours(component, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+        holes = []
+        for contour, (_, _, _, parent) in zip(contours, hierarchy[0].tolist()):
+            if parent >= 0:
+                hx, hy, hw, hh = cv2.boundingRect(contour)
+                if hw >= MIN_CELL_SIDE_PX and hh >= MIN_CELL_SIDE_PX:
+                    holes.append((x + hx, y + hy, hw, hh))
+        if len(holes) >= MIN_GRID_CELLS:
+            is_grid[k] = True
+            cells.extend(holes)
+
+    if not cells:
+        return []
+    # Which cell each long enough non-grid component lies in, by containment matrices
+    # over chunks of components so memory stays bounded on text-heavy pages
+    box = np.array(cells)
+    min_side = box[:, 2:4].min(axis=1)
+    candidates = np.flatnonzero(~is_grid & (stats[:, 2:4].max(axis=1) >= SKETCH_SPAN_FRACTION * MIN_CELL_SIDE_PX))
+    members: Dict[int, List[int]] = {}
+    for start in range(0, len(candidates), 4096):
+        ids = candidates[start:start + 4096]
+        x0, y0, w, h = (stats[ids, i][:, None] for i in range(4))
+        inside = ((x0 >= box[:, 0]) & (y0 >= box[:, 1]) & (x0 + w <= box[:, 0] + box[:, 2])
+                  & (y0 + h <= box[:, 1] + box[:, 3]) & (np.maximum(w, h) >= SKETCH_SPAN_FRACTION * min_side))
+        for k, c in zip(*np.nonzero(inside)):
+            members.setdefault(int(c), []).append(int(ids[k]))
+    found = []
+    for c in sorted(members):
+        x, y, w, h = cells[c]
+        found.append((cells[c], _crop(np.isin(labels[y:y + h, x:x + w], members[c]))))
+    return found
+
+
+def _crop(mask: np.ndarray) -> np.ndarray:
+    """A boolean mask cropped to its set pixels, as uint8 with a 2 px margin."""
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    stroke = np.zeros((rows[-1] - rows[0] + 5, cols[-1] - cols[0] + 5), dtype=np.uint8)
+    stroke[2:-2, 2:-2] = mask[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1] * 255
+    return stroke
+
+
+def _widest_angle(corners: np.ndarray) -> float:
+    """Largest interior angle in degrees of a convex polygon; 90 for a degenerate one."""
+    if len(corners) < 3:
+        return 90.0
+    prev = np.roll(corners, 1, axis=0) - corners
+    nxt = np.roll(corners, -1, axis=0) - corners
+    cos = (prev * nxt).sum(axis=1) / np.maximum(np.linalg.norm(prev, axis=1) * np.linalg.norm(nxt, axis=1), 1e-9)
+    return float(np.degrees(np.arccos(np.clip(cos, -1.0, 1.0))).max())
+
+
+def stroke_descriptor(stroke: np.ndarray) -> np.ndarray:
+    """Scale- and rotation-free features of a sketch stroke.
+
+    [closed loop, minimum-area-rectangle short/long side, hull area / that
+    rectangle's area, widest angle of the simplified hull / 180]. An L bar's
+    hull is a triangle (fill 0.5) whose widest angle is its bend; U bars,
+    stirrups and straight bars fill their rectangle, told apart by the hole
+    and the elongation.
+    """
+    contours, hierarchy = cv2.findContours(stroke, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+    outer = [c for c, (_, _, _, parent) in zip(contours, hierarchy[0].tolist()) if parent < 0]
+    holes = [cv2.contourArea(c) for c, (_, _, _, parent) in zip(contours, hierarchy[0].tolist()) if parent >= 0]
+    points = np.vstack(outer)
+    hull = cv2.convexHull(points)
+    hull_area = max(cv2.contourArea(hull), 1.0)
+    (_, _), (rw, rh), _ = cv2.minAreaRect(points)
+    corners = cv2.approxPolyDP(hull, 0.04 * cv2.arcLength(hull, True), True)[:, 0, :].astype(np.float64)
+    return np.array([
+        float(max(holes, default=0.0) >= CLOSED_HOLE_FRACTION * hull_area),
+        min(rw, rh) / max(rw, rh, 1.0),
+        min(hull_area / max(rw * rh, 1.0), 1.0),
+        _widest_angle(corners) / 180.0,
+    ])
+
+
+def _cached_descriptor(stroke: np.ndarray) -> np.ndarray:
+    key = DescriptorCache.key(stroke)
+    value = _cache.get(key)
+    if value is None:
+        value = stroke_descriptor(stroke)
+        _cache.put(key, value)
+    return value
+
+
+def _template_polylines() -> List[Tuple[str, np.ndarray, bool]]:
+    """(shape, points, closed) for each supported shape over a spread of proportions."""
+    templates: List[Tuple[str, np.ndarray, bool]] = []
+    diag = np.sqrt(0.5)
+    for a, b in [(1.0, 1.0), (1.0, 0.7), (1.0, 0.5), (1.0, 0.3), (1.0, 0.15), (0.7, 1.0), (0.5, 1.0), (0.3, 1.0), (0.15, 1.0)]:
+        templates.append(("L_90", np.array([(0, b), (0, 0), (a, 0)]), False))
+        templates.append(("L_135", np.array([(0, 0), (a, 0), (a + b * diag, b * diag)]), False))
+        templates.append(("U_135_OPEN", np.array([(0, b), (0, 0), (a, 0), (a, b)]), False))
+        hook = 0.15 * min(a, b)
+        templates.append(("U_135_OPEN", np.array([(hook, b - hook), (0, b), (0, 0), (a, 0), (a, b),
+                                                  (a - hook, b - hook)]), False))
+        templates.append(("STIRRUP_RECT", np.array([(0, 0), (a, 0), (a, b), (0, b)]), True))
+        templates.append(("STIRRUP_RECT", np.array([(hook, b - hook), (0, b), (0, 0), (a, 0), (a, b), (0, b),
+                                                    (hook, b + hook)]), True))
+    templates.append(("STRAIGHT", np.array([(0, 0), (1, 0)]), False))
+    return templates
+
+
+@lru_cache(maxsize=1)
+def template_index() -> Tuple[np.ndarray, np.ndarray]:
+    """(descriptors, shape codes) of the templates, each drawn at a few sizes, thicknesses and turns.
+
+    Built once per process; the descriptors are invariant to everything the
+    renderings vary, so the spread only covers rasterisation effects.
+    """
+    quarter = np.array([[0.0, -1.0], [1.0, 0.0]])
+    descriptors, shapes = [], []
+    for shape, points, closed in _template_polylines():
+        for size, thickness in [(60, 2), (120, 3), (200, 5)]:
+            rotated = points.astype(np.float64)
+            for _ in range(4):
+                rotated = rotated @ quarter.T
+                scaled = (rotated - rotated.min(axis=0)) * size / np.ptp(rotated, axis=0).max()
+                margin = thickness + 4
+                width, height = (scaled.max(axis=0) + 2 * margin + 1).astype(int).tolist()
+                canvas = np.zeros((height, width), dtype=np.uint8)
+                cv2.polylines(canvas, [np.round(scaled + margin).astype(np.int32)], closed, 255, thickness)
+                descriptors.append(stroke_descriptor(canvas))
+                shapes.append(shape)
+    return np.array(descriptors), np.array(shapes, dtype=object)
+
+
+def classify_strokes(strokes: Sequence[np.ndarray]) -> List[Tuple[Optional[str], float]]:
+    """(shape code or None, distance) for each stroke, in one nearest-template pass.
+
+    Descriptors come from the cache or are computed, across threads for
+    large batches; the distances to every template are one array operation.
+    """
+    if not strokes:
+        return []
+    if len(strokes) >= PARALLEL_MIN_SKETCHES and SKETCH_WORKERS > 1:
+        chunk = -(-len(strokes) // SKETCH_WORKERS)
+        parts = _get_executor().map(lambda part: [_cached_descriptor(s) for s in part],
+                                    [strokes[i:i + chunk] for i in range(0, len(strokes), chunk)])
+        descriptors = np.array([d for part in parts for d in part])
+    else:
+        descriptors = np.array([_cached_descriptor(s) for s in strokes])
+    index, shapes = template_index()
+    dist = np.linalg.norm((descriptors[:, None, :] - index[None, :, :]) * FEATURE_WEIGHTS, axis=2)
+    best = dist.argmin(axis=1)
+    best_dist = dist[np.arange(len(strokes)), best]
+    return [(shape if d <= MAX_MATCH_DISTANCE else None, d)
+            for shape, d in zip(shapes[best].tolist(), best_dist.tolist())]
+
+
+def recognize_sketches(binary: np.ndarray) -> List[Sketch]:
+    """Find the bar sketches in the table cells of a thresholded page and classify them as a batch.
+
+    Sketches that match no shape closely enough are left out.
+    """
+    found = find_sketch_cells(ink_mask(binary))
+    labels = classify_strokes([stroke for _, stroke in found])
+    return [Sketch(x, y, w, h, shape, round(d, 4))
+            for ((x, y, w, h), _), (shape, d) in zip(found, labels) if shape is not None]
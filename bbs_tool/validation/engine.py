@@ -0,0 +1,148 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ..calc.batch import DIM_LABELS, ItemColumns
+from ..calc.is2502 import SHAPES, missing_dims_message
+from ..models.schemas import BBSCalculationConfig
+
+
+# Warning codes. "error" issues mean the row cannot be calculated at all.
+CODES: Dict[str, Tuple[str, str]] = {
+    "diameter_not_positive": ("error", "diameter is zero or negative"),
+    "quantity_not_positive": ("error", "quantity is below 1"),
+    "unsupported_shape": ("error", "shape has no cutting length formula"),
+    "missing_dim": ("error", "a dimension the shape needs is missing"),
+    "short_leg": ("warning", "a dimension is shorter than min_leg_multiplier x d"),
+    "small_bend_radius": ("warning", "default bend radius is below min_bend_radius_multiplier x d"),
+    "duplicate_mark": ("warning", "bar mark already used earlier in the schedule"),
+    "inconsistent_diameter": ("warning", "bar mark used earlier with a different diameter"),
+}
+
+# Shape -> dimension labels its cutting length formula needs
+REQUIRED_DIMS: Dict[str, Tuple[str, ...]] = {shape: spec[0] for shape, spec in SHAPES.items()}
+
+
+@dataclass(frozen=True)
+class Issue:
+    row: int  # position in the whole schedule, from 0
+    bar_mark: str
+    code: str
+    message: str
+
+    @property
+    def severity(self) -> str:
+        return CODES[self.code][0]
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"row": self.row, "bar_mark": self.bar_mark, "code": self.code,
+                "severity": self.severity, "message": self.message}
+
+
+class BatchValidator:
+    """Validates a schedule batch by batch as column arrays.
+
+    Per-row rules are array masks; messages are only formatted for rows that
+    fail. Bar marks go into a hash index (mark -> first row and diameter)
+    that persists across batches, so duplicates are caught when a schedule
+    is streamed in chunks.
+    """
+
+    def __init__(self, config: BBSCalculationConfig):
+        self.config = config
+        self.rows_seen = 0
+        # Hash index of bar marks: first row each was seen on, and its diameter there
+        self._first_row: Dict[str, int] = {}
+        self._diameter: Dict[str, float] = {}
+
+    def validate(self, columns: ItemColumns) -> Dict[int, List[Issue]]:
+        """Issues keyed by row index within ``columns``, in the order validate_item reports them."""
+        config = self.config
+        n = len(columns)
+        offset = self.rows_seen
+        self.rows_seen += n
+        d = columns.diameter_mm
+        marks = columns.bar_marks
+        out: Dict[int, List[Issue]] = {}
+
+        def add(i: int, code: str, message: str) -> None:
+            out.setdefault(i, []).append(Issue(offset + i, marks[i], code, message))
+
+        bad_diameter = d <= 0
+        bad_quantity = columns.quantity <= 0
+        dims = np.where(columns.dims_present, columns.dims_mm, np.inf)
+        short = (dims < config.min_leg_multiplier * d[:, None]).any(axis=1) | columns.extra_dims
+        small_radius = np.zeros(n, dtype=bool)
+        if config.default_bend_radius_multiplier < config.min_bend_radius_multiplier:
+            small_radius = d > 0
+
+        for i in np.flatnonzero(bad_diameter | bad_quantity | short | small_radius).tolist():
+            if bad_diameter[i]:
+                add(i, "diameter_not_positive", f"{marks[i]}: diameter must be > 0")
+            if bad_quantity[i]:
+                add(i, "quantity_not_positive", f"{marks[i]}: quantity must be >= 1")
+            if short[i]:
+                # Messages follow the item's own dimension order when there is an item
+                limit = config.min_leg_multiplier * float(d[i])
+                for k, v in self._dims(columns, i):
+                    if v < limit:
+                        add(i, "short_leg", f"{marks[i]}: dim {k}={v} mm is < {config.min_leg_multiplier}d; "
+                                            "verify feasibility")
+            if small_radius[i]:
+                r_default = config.default_bend_radius_multiplier * float(d[i])
+                add(i, "small_bend_radius", f"{marks[i]}: default bend radius {r_default} mm < "
+                                            f"{config.min_bend_radius_multiplier:g}d; verify against code")
+
+        self._check_shapes(columns, add)
+        if config.check_duplicate_marks:
+            self._check_marks(columns, offset, add)
+        return out
+
+    @staticmethod
+    def _dims(columns: ItemColumns, i: int):
+        if columns.items:
+            return columns.items[i].dims_mm.items()
+        # Built from columns (e.g. an Arrow table): only the fixed A-F dimensions exist
+        return [(k, float(v)) for k, v, given in zip(DIM_LABELS, columns.dims_mm[i], columns.dims_present[i]) if given]
+
+    def _check_shapes(self, columns: ItemColumns, add) -> None:
+        shapes = columns.normalized_shapes
+        for shape in set(shapes.tolist()):
+            rows = shapes == shape
+            required = REQUIRED_DIMS.get(shape)
+            if required is None:
+                for i in np.flatnonzero(rows).tolist():
+                    add(i, "unsupported_shape", f"{columns.bar_marks[i]}: unsupported shape {shape}")
+                continue
+            missing = np.zeros(len(columns), dtype=bool)
+            for label in required:
+                missing |= ~columns.has_dim(label)
+            for i in np.flatnonzero(rows & missing).tolist():
+                add(i, "missing_dim", f"{columns.bar_marks[i]}: {missing_dims_message(shape, required)}")
+
+    def _check_marks(self, columns: ItemColumns, offset: int, add) -> None:
+        marks = columns.bar_marks
+        rows = range(offset, offset + len(columns))
+        # Built from the reversed batch so the first occurrence of a mark wins
+        first_row = dict(zip(reversed(marks), reversed(rows)))
+        diameter = dict(zip(reversed(marks), reversed(columns.diameter_mm.tolist())))
+        seen_before = first_row.keys() & self._first_row.keys()
+        for mark in seen_before:
+            first_row[mark] = self._first_row[mark]
+            diameter[mark] = self._diameter[mark]
+        self._first_row.update(first_row)
+        self._diameter.update(diameter)
+        if not seen_before and len(first_row) == len(marks):
+            return  # every mark is new
+
+        first = np.fromiter(map(first_row.__getitem__, marks), dtype=np.int64, count=len(marks))
+        for i in np.flatnonzero(first != np.arange(offset, offset + len(marks))).tolist():
+            mark = marks[i]
+            d = float(columns.diameter_mm[i])
+            known = diameter[mark]
+            if d != known:
+                add(i, "inconsistent_diameter", f"{mark}: diameter {d:g} mm differs from {known:g} mm on row {first[i] + 1}")
+            else:
+                add(i, "duplicate_mark", f"{mark}: bar mark repeats row {first[i] + 1}")
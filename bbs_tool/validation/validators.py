@@ -1,10 +1,15 @@
 from __future__ import annotations
-from typing import List
+from typing import TYPE_CHECKING, Dict, List
 
 from ..models.schemas import BBSItem, BBSCalculationConfig
+from .engine import BatchValidator
+
+if TYPE_CHECKING:
+    from ..calc.batch import ItemColumns
 
 
 def validate_item(item: BBSItem, config: BBSCalculationConfig) -> List[str]:
+    """Per-item checks only; BatchValidator also checks shapes and repeated marks."""
     warnings: List[str] = []
 
     if item.diameter_mm <= 0:
@@ -13,14 +18,21 @@ def validate_item(item: BBSItem, config: BBSCalculationConfig) -> List[str]:
         warnings.append(f"{item.bar_mark}: quantity must be >= 1")
 
     # Simple min dimension check: each leg must be at least some multiple of d
-    min_leg_mult = 4.0
+    min_leg_mult = config.min_leg_multiplier
     for k, v in item.dims_mm.items():
         if v < min_leg_mult * item.diameter_mm:
             warnings.append(f"{item.bar_mark}: dim {k}={v} mm is < {min_leg_mult}d; verify feasibility")
 
     # Bend radius check
     r_default = config.default_bend_radius_multiplier * item.diameter_mm
-    if r_default < 2.0 * item.diameter_mm:
-        warnings.append(f"{item.bar_mark}: default bend radius {r_default} mm < 2d; verify against code")
+    if r_default < config.min_bend_radius_multiplier * item.diameter_mm:
+        warnings.append(f"{item.bar_mark}: default bend radius {r_default} mm < "
+                        f"{config.min_bend_radius_multiplier:g}d; verify against code")
+
+    return warnings
+
 
-    return warnings
\ No newline at end of file
+def validate_columns(columns: "ItemColumns", config: BBSCalculationConfig) -> Dict[int, List[str]]:
+    """Warning messages for one batch keyed by row index."""
+    issues = BatchValidator(config).validate(columns)
+    return {i: [issue.message for issue in row] for i, row in issues.items()}
@@ -0,0 +1,4 @@
+"""Benchmarks and synthetic workloads for the BBS tool.
+
+Run ``python -m benchmarks.run`` from the repository root.
+"""
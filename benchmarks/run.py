@@ -0,0 +1,237 @@
+"""Time the hot paths of the BBS tool and compare against a saved baseline.
+
+    python -m benchmarks.run --save .benchmarks/baseline.json
+    # ... change code ...
+    python -m benchmarks.run --compare .benchmarks/baseline.json
+
+Each benchmark is a setup function that builds its inputs and returns the
+callable to time, so setup cost never shows up in the numbers.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import csv
+import io
+import json
+import platform
+import shutil
+import statistics
+import sys
+import time
+
+from .workload import generate_csv, generate_items, generate_rows, render_schedule_image
+
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+
+def benchmark(name: str):
+    def register(setup: Callable[[], Callable[[], Any]]):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+@benchmark("schemas.from_csv_row[5k]")
+def _from_csv_row():
+    from bbs_tool.models.schemas import BBSItem
+
+    rows = generate_rows(5000, seed=1)
+    return lambda: [BBSItem.from_csv_row(r) for r in rows]
+
+
+@benchmark("extract.csv_row_parser[5k]")
+def _csv_row_parser():
+    from bbs_tool.extract.csv_parser import CSVRowParser
+
+    records = list(csv.reader(io.StringIO(generate_csv(5000, seed=1, malformed_ratio=0.01))))
+
+    def run():
+        errors: List[str] = []
+        return CSVRowParser(records[0]).parse(records[1:], 2, errors)
+    return run
+
+
+@benchmark("extract.csv_column_parser[5k]")
+def _csv_column_parser():
+    from bbs_tool.extract.csv_parser import CSVRowParser
+
+    records = list(csv.reader(io.StringIO(generate_csv(5000, seed=1, malformed_ratio=0.01))))
+
+    def run():
+        errors: List[str] = []
+        return CSVRowParser(records[0]).parse_columns(records[1:], 2, errors)
+    return run
+
+
+@benchmark("validation.validate_item[5k]")
+def _validate_item():
+    from bbs_tool.models.schemas import BBSCalculationConfig
+    from bbs_tool.validation.validators import validate_item
+
+    items = generate_items(5000, seed=2)
+    cfg = BBSCalculationConfig()
+    return lambda: [validate_item(i, cfg) for i in items]
+
+
+@benchmark("validation.batch_validator[200k]")
+def _batch_validator():
+    from bbs_tool.calc.batch import ItemColumns
+    from bbs_tool.models.schemas import BBSCalculationConfig
+    from bbs_tool.validation.engine import BatchValidator
+
+    columns = ItemColumns.from_items(generate_items(200_000, seed=2))
+    cfg = BBSCalculationConfig()
+    return lambda: BatchValidator(cfg).validate(columns)
+
+
+@benchmark("calc.cutting_length_scalar[5k]")
+def _cutting_length():
+    from bbs_tool.calc.is2502 import calculate_cutting_length_for_item
+    from bbs_tool.models.schemas import BBSCalculationConfig
+
+    items = generate_items(5000, seed=3)
+    cfg = BBSCalculationConfig()
+    return lambda: [calculate_cutting_length_for_item(i, cfg) for i in items]
+
+
+@benchmark("calc.calculate_batch[50k]")
+def _calculate_batch():
+    from bbs_tool.calc.batch import calculate_batch
+    from bbs_tool.models.schemas import BBSCalculationConfig
+
+    items = generate_items(50000, seed=4)
+    cfg = BBSCalculationConfig()
+    return lambda: calculate_batch(items, cfg).to_records()
+
+
+def _client():
+    from fastapi.testclient import TestClient
+    from bbs_tool.main import app
+
+    return TestClient(app)
+
+
+@benchmark("api.calculate[500]")
+def _api_calculate_small():
+    client = _client()
+    payload = {"items": [i.model_dump() for i in generate_items(500, seed=5)]}
+    return lambda: client.post("/api/calculate", json=payload).raise_for_status()
+
+
+@benchmark("api.calculate[20k]")
+def _api_calculate_large():
+    client = _client()
+    payload = {"items": [i.model_dump() for i in generate_items(20000, seed=6)]}
+    return lambda: client.post("/api/calculate", json=payload).raise_for_status()
+
+
+@benchmark("api.extract_csv[20k]")
+def _api_extract_csv():
+    client = _client()
+    body = generate_csv(20000, seed=7, malformed_ratio=0.01).encode()
+    return lambda: client.post(
+        "/api/extract", data={"source_type": "csv"}, files={"file": ("s.csv", body)}
+    ).raise_for_status()
+
+
+@benchmark("api.extract_image[40 rows]")
+def _api_extract_image():
+    if shutil.which("tesseract") is None:
+        return None
+    from bbs_tool.main import extraction_cache
+
+    client = _client()
+    image = render_schedule_image(generate_rows(40, seed=8), seed=8)
+    extraction_cache.max_bytes = 0  # time OCR, not the cache
+
+    return lambda: client.post(
+        "/api/extract", data={"source_type": "image"}, files={"file": ("s.png", image)}
+    ).raise_for_status()
+
+
+@benchmark("ocr.preprocess[40 rows]")
+def _ocr_preprocess():
+    from bbs_tool.extract.ocr_extractor import preprocess_image_for_ocr
+
+    image = render_schedule_image(generate_rows(40, seed=9), seed=9)
+    return lambda: preprocess_image_for_ocr(image)
+
+
+def time_callable(fn: Callable[[], Any], repeat: int, min_time_s: float = 0.2) -> Dict[str, float]:
+    fn()  # warm-up: imports, lazy pools, caches
+    samples: List[float] = []
+    deadline = time.perf_counter() + min_time_s
+    while len(samples) < repeat or (time.perf_counter() < deadline and len(samples) < 100):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "stdev_ms": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "runs": len(samples),
+    }
+
+
+def run(names: List[str], repeat: int) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for name in names:
+        fn = BENCHMARKS[name]()
+        if fn is None:
+            print(f"{name:<36} skipped", file=sys.stderr)
+            continue
+        results[name] = time_callable(fn, repeat)
+    return results
+
+
+def report(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]],
+           threshold: float) -> List[str]:
+    regressions: List[str] = []
+    print(f"{'benchmark':<36} {'median ms':>11} {'min ms':>10} {'vs base':>8}")
+    for name, r in results.items():
+        ratio = ""
+        base = (baseline or {}).get(name)
+        if base:
+            change = r["median_ms"] / base["median_ms"]
+            ratio = f"{change:.2f}x"
+            if change > threshold:
+                regressions.append(name)
+                ratio += " !"
+        print(f"{name:<36} {r['median_ms']:>11.2f} {r['min_ms']:>10.2f} {ratio:>8}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="BBS tool benchmarks")
+    parser.add_argument("-k", "--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="Minimum timed runs per benchmark (default 5)")
+    parser.add_argument("--save", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON written earlier with --save")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Median slowdown vs baseline that counts as a regression (default 1.2)")
+    args = parser.parse_args(argv)
+
+    names = [n for n in BENCHMARKS if args.filter in n]
+    results = run(names, args.repeat)
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["results"]
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save:
+        out = Path(args.save)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"python": platform.python_version(), "platform": platform.platform()}
+        out.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+
+    if regressions:
+        print(f"Slower than baseline by more than {args.threshold}x: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
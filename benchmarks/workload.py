@@ -0,0 +1,120 @@
+from __future__ import annotations
+from typing import Dict, List, Optional
+import csv
+import io
+import random
+
+from bbs_tool.models.schemas import BBSItem
+
+
+# Rough mix seen on building schedules: lots of straights and stirrups
+SHAPE_WEIGHTS = {
+    "STRAIGHT": 35,
+    "L_90": 20,
+    "L_135": 5,
+    "U_135_OPEN": 10,
+    "STIRRUP_RECT": 30,
+}
+# Label spellings that normalize_shape_label folds together
+SHAPE_SPELLINGS = {
+    "STRAIGHT": ["STRAIGHT"],
+    "L_90": ["L_90", "L", "L90", "L-90"],
+    "L_135": ["L_135", "L135", "L-135"],
+    "U_135_OPEN": ["U_135_OPEN", "U"],
+    "STIRRUP_RECT": ["STIRRUP_RECT", "STIRRUP"],
+}
+DIAMETER_WEIGHTS = {8: 25, 10: 20, 12: 18, 16: 14, 20: 10, 25: 7, 32: 4, 40: 2}
+CSV_HEADER = ["bar_mark", "shape", "diameter_mm", "quantity", "A", "B", "C"]
+
+
+def _leg_lengths(rng: random.Random, shape: str, d: int) -> Dict[str, float]:
+    if shape == "STRAIGHT":
+        return {"A": float(rng.randrange(1000, 12000, 50))}
+    if shape == "STIRRUP_RECT":
+        return {"A": float(rng.randrange(150, 600, 10)), "B": float(rng.randrange(200, 900, 10))}
+    # Occasionally produce a leg shorter than 4d so validation has something to say
+    short = rng.random() < 0.02
+    a = float(rng.randrange(2 * d, 4 * d)) if short else float(rng.randrange(300, 4000, 10))
+    return {"A": a, "B": float(rng.randrange(150, 1500, 10))}
+
+
+def generate_rows(n: int, seed: int = 0, malformed_ratio: float = 0.0) -> List[Dict[str, str]]:
+    """Schedule rows as CSV strings, optionally with a share of broken rows.
+
+    Broken rows have a missing or zero diameter, a non-numeric quantity, an
+    unknown shape or a missing required dimension.
+    """
+    rng = random.Random(seed)
+    shapes = list(SHAPE_WEIGHTS)
+    shape_w = list(SHAPE_WEIGHTS.values())
+    diameters = list(DIAMETER_WEIGHTS)
+    dia_w = list(DIAMETER_WEIGHTS.values())
+    rows: List[Dict[str, str]] = []
+    for i in range(n):
+        shape = rng.choices(shapes, shape_w)[0]
+        d = rng.choices(diameters, dia_w)[0]
+        dims = _leg_lengths(rng, shape, d)
+        row = {
+            "bar_mark": f"{'BCSF'[i % 4]}{i + 1}",
+            "shape": rng.choice(SHAPE_SPELLINGS[shape]),
+            "diameter_mm": str(d),
+            "quantity": str(rng.choice([1, 2, 2, 4, 4, 6, 8, 12, 24, 48])),
+            "A": f"{dims['A']:g}",
+            "B": f"{dims['B']:g}" if "B" in dims else "",
+            "C": "",
+        }
+        if malformed_ratio and rng.random() < malformed_ratio:
+            fault = rng.randrange(4)
+            if fault == 0:
+                row["diameter_mm"] = rng.choice(["", "0"])
+            elif fault == 1:
+                row["quantity"] = "two"
+            elif fault == 2:
+                row["shape"] = "Z_CRANK"
+            else:
+                row["B"] = ""
+                row["shape"] = "L_90"
+        rows.append(row)
+    return rows
+
+
+def generate_csv(n: int, seed: int = 0, malformed_ratio: float = 0.0) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CSV_HEADER)
+    writer.writeheader()
+    writer.writerows(generate_rows(n, seed, malformed_ratio))
+    return buf.getvalue()
+
+
+def generate_items(n: int, seed: int = 0) -> List[BBSItem]:
+    """Valid items only (malformed rows cannot be represented as BBSItem)."""
+    return [BBSItem.from_csv_row(row) for row in generate_rows(n, seed)]
+
+
+def render_schedule_image(rows: List[Dict[str, str]], seed: int = 0, noise: float = 0.02,
+                          font_size: Optional[int] = None) -> bytes:
+    """A scanned-looking PNG of a schedule in the ``MARK DIA SHAPE QTY=n A=.. B=..`` layout the OCR parser reads."""
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFont
+
+    rng = np.random.default_rng(seed)
+    try:
+        font = ImageFont.load_default(size=font_size or 28)
+    except TypeError:  # Pillow < 10.1
+        font = ImageFont.load_default()
+    line_h = int((font_size or 28) * 1.6)
+    width, height = 1800, 120 + line_h * len(rows)
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    draw.text((60, 40), "BAR BENDING SCHEDULE", fill=0, font=font)
+    for i, row in enumerate(rows):
+        dims = " ".join(f"{k}={row[k]}" for k in ("A", "B", "C") if row.get(k))
+        text = f"{row['bar_mark']} {row['diameter_mm']} {row['shape']} QTY={row['quantity']} {dims}"
+        draw.text((60, 100 + i * line_h), text, fill=0, font=font)
+
+    pixels = np.asarray(image, dtype=np.int16)
+    speckle = rng.random(pixels.shape) < noise
+    pixels = np.where(speckle, 255 - pixels, pixels).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format="PNG")
+    return buf.getvalue()
@@ -1,9 +1,16 @@
 import argparse
-from pathlib import Path
+import csv
+import json
+import math
+import sys
 
-from construction_scheduler.dpr_parser import load_dpr
-from construction_scheduler.schedule import Schedule
-from construction_scheduler.output import save_gantt
+from construction_scheduler.leveling import PRIORITY_RULES
+from construction_scheduler.schedule import SCHEDULE_MODES, Schedule
+
+# pandas and matplotlib are imported only by the features that need them
+# (DPR input, table output, Gantt charts); csv/json output never loads them.
+
+DEFAULT_GANTT_PATH = "schedule_gantt.png"
 
 
 def main():
@@ -13,30 +20,131 @@ def main():
     parser.add_argument("tasks_yaml", help="Path to tasks YAML definition file")
     parser.add_argument(
         "--dpr",
-        help="Path to DPR update file (csv/json). If provided, progress will be merged (feature under development).",
+        help="Path to DPR update file (csv/json). Reported progress is applied and affected tasks are rescheduled.",
+    )
+    parser.add_argument(
+        "--dpr-store",
+        help="SQLite DPR history file. --dpr files are appended to it (only rows not seen before) "
+        "and the latest progress per activity is read back from it.",
+    )
+    parser.add_argument(
+        "--as-of",
+        help="With --dpr-store, use the latest progress on or before this date (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=SCHEDULE_MODES,
+        default="asap",
+        help="asap ignores resources; leveled delays tasks until the crews and equipment "
+        "declared in the YAML are free (default: asap)",
+    )
+    parser.add_argument(
+        "--priority",
+        choices=PRIORITY_RULES,
+        default="late_start",
+        help="With --mode leveled, which eligible task gets resources first: smallest value wins "
+        "(default: late_start)",
+    )
+    parser.add_argument(
+        "--simulate",
+        type=int,
+        metavar="N",
+        help="Run N Monte Carlo scenarios from the duration_min/duration_max of each task and "
+        "report completion percentiles and the most often critical tasks",
+    )
+    parser.add_argument("--seed", type=int, help="Random seed for --simulate")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used by --simulate (default: 1)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("table", "csv", "json"),
+        default="table",
+        help="How the schedule is printed to stdout. csv and json skip the Gantt chart unless "
+        "--output-image is given (default: table)",
     )
     parser.add_argument(
         "--output-image",
-        default="schedule_gantt.png",
-        help="Filename for Gantt chart PNG (default: schedule_gantt.png)",
+        help="Gantt chart file; the suffix picks the format: .png/.jpg image, paginated .pdf, "
+        f"or .svg/.html written without matplotlib (default with --format table: {DEFAULT_GANTT_PATH})",
+    )
+    parser.add_argument(
+        "--rows-per-page",
+        type=int,
+        help="Tasks per page for PDF output",
     )
     args = parser.parse_args()
+    # Keep stdout parseable for csv/json
+    log = sys.stdout if args.format == "table" else sys.stderr
 
-    schedule = Schedule.from_yaml(args.tasks_yaml)
-    df_sched = schedule.to_dataframe()
+    schedule = Schedule.from_yaml(args.tasks_yaml, mode=args.mode, priority=args.priority)
+
+    dpr_df = None
+    if args.dpr_store:
+        from construction_scheduler.dpr_store import DPRStore
+
+        store = DPRStore(args.dpr_store)
+        if args.dpr:
+            print(f"Ingested {store.ingest(args.dpr)} new DPR rows into {args.dpr_store}", file=log)
+        dpr_df = store.latest_progress(args.as_of)
+    elif args.dpr:
+        from construction_scheduler.dpr_parser import load_dpr
 
-    # TODO: integrate DPR updates into schedule adjustments
-    if args.dpr:
         dpr_df = load_dpr(args.dpr)
-        print("Loaded DPR updates (progress %, not yet applied):")
-        print(dpr_df.head())
 
-    print("Planned Schedule:")
-    print(df_sched)
+    if dpr_df is not None:
+        moved = schedule.apply_progress(dpr_df)
+        print(f"Applied {len(dpr_df)} DPR rows; {len(moved)} tasks rescheduled: {', '.join(moved) or 'none'}",
+              file=log)
+
+    if args.simulate:
+        report_risk(schedule, schedule.simulate(args.simulate, seed=args.seed, workers=args.workers), log)
+
+    output_image = args.output_image
+    if args.format == "table":
+        print("Planned Schedule:")
+        print(schedule.to_dataframe())
+        output_image = output_image or DEFAULT_GANTT_PATH
+    else:
+        write_records(schedule.to_records(), args.format, sys.stdout)
+
+    if output_image:
+        from construction_scheduler.output import save_gantt
+
+        options = {"rows_per_page": args.rows_per_page} if args.rows_per_page else {}
+        save_gantt(schedule.to_dataframe(), output_image, **options)
+        print(f"Gantt chart saved to {output_image}", file=log)
+
+
+def report_risk(schedule, risk, out):
+    deterministic = schedule.cpm.project_duration
+    print(f"Monte Carlo: {risk.iterations} scenarios; deterministic finish "
+          f"{schedule.date_after(deterministic).date()} "
+          f"is met in {risk.probability_within(deterministic):.0%} of them", file=out)
+    for p, days in risk.percentiles().items():
+        finish = schedule.date_after(math.ceil(days))
+        print(f"  P{p}: {finish.date()} ({days:.1f} working days)", file=out)
+    print("Most often critical:", file=out)
+    for task_id, share in risk.most_critical():
+        print(f"  {task_id}: {share:.0%}", file=out)
+
 
-    save_gantt(df_sched, args.output_image)
-    print(f"Gantt chart saved to {args.output_image}")
+def write_records(records, fmt, out):
+    rows = [
+        {**r, "start": r["start"].date().isoformat(), "end": r["end"].date().isoformat()}
+        for r in records
+    ]
+    if fmt == "json":
+        json.dump(rows, out, indent=2)
+        out.write("\n")
+        return
+    writer = csv.DictWriter(out, fieldnames=list(rows[0]) if rows else [], lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
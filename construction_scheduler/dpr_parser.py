@@ -1,6 +1,14 @@
+from typing import Iterator
+import io
+import os
+
 import pandas as pd
 from pathlib import Path
 
+DPR_CHUNK_ROWS = 50_000
+DPR_COLUMNS = ["date", "activity", "progress"]
+DPR_DTYPES = {"activity": "category", "progress": "float64"}
+
 
 def load_dpr(file_path: str | Path) -> pd.DataFrame:
     """Load DPR file (CSV or JSON) into a pandas DataFrame.
@@ -8,20 +16,95 @@ def load_dpr(file_path: str | Path) -> pd.DataFrame:
     Supported formats:
     - .csv: expects columns [date, activity, progress]
     - .json: list of dicts with same keys
+    - .ndjson: one such dict per line
+    """
+    chunks = list(iter_dpr_chunks(file_path))
+    if len(chunks) == 1:
+        return chunks[0]
+    df = pd.concat(chunks, ignore_index=True)
+    # Categories differ between chunks, so concat falls back to object
+    df["activity"] = df["activity"].astype("category")
+    return df
+
+
+def iter_dpr_chunks(file_path: str | Path, chunk_rows: int = DPR_CHUNK_ROWS,
+                    start: int = 0, end: int | None = None) -> Iterator[pd.DataFrame]:
+    """Read a DPR file in chunks of at most ``chunk_rows`` rows with fixed dtypes.
+
+    CSV and NDJSON are streamed; a .json array has to be parsed whole and is
+    yielded as one chunk. Only bytes ``start`` to ``end`` (default: end of
+    file) are read, so a file that has only been appended to can be read from
+    where the last read stopped; both must fall on line boundaries, and a CSV
+    read from an offset still takes its header from the first line. At least
+    one (possibly empty) chunk is always yielded.
     """
     file_path = Path(file_path)
     if not file_path.exists():
         raise FileNotFoundError(f"DPR file not found: {file_path}")
 
-    if file_path.suffix.lower() == ".csv":
-        df = pd.read_csv(file_path, parse_dates=["date"])
-    elif file_path.suffix.lower() in {".json", ".ndjson"}:
-        df = pd.read_json(file_path, convert_dates=["date"])
-    else:
-        raise ValueError("Unsupported DPR file format. Use .csv or .json")
+    suffix = file_path.suffix.lower()
+    if suffix not in (".csv", ".ndjson", ".json"):
+        raise ValueError("Unsupported DPR file format. Use .csv, .json or .ndjson")
+    if suffix == ".json" and start:
+        raise ValueError("A .json DPR file can only be read whole")
+
+    with _open_range(file_path, start, end) as f:
+        if suffix == ".csv":
+            chunks = _closing(pd.read_csv(
+                f,
+                names=pd.read_csv(file_path, nrows=0).columns.tolist() if start else None,
+                usecols=lambda c: c in DPR_COLUMNS,
+                dtype=DPR_DTYPES,
+                parse_dates=["date"],
+                chunksize=chunk_rows,
+            ))
+        elif suffix == ".ndjson":
+            chunks = _closing(pd.read_json(f, lines=True, chunksize=chunk_rows, convert_dates=["date"]))
+        else:
+            chunks = iter([pd.read_json(f, convert_dates=["date"])])
+
+        empty = True
+        for chunk in chunks:
+            empty = False
+            yield _typed(chunk)
+    if empty:
+        yield _typed(pd.DataFrame({c: [] for c in DPR_COLUMNS}))
+
+
+class _ByteRange(io.RawIOBase):
+    """Bytes ``start`` to ``end`` of a file, as a readable stream."""
 
-    required_cols = {"date", "activity", "progress"}
+    def __init__(self, path: Path, start: int, end: int | None):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._left = (os.fstat(self._file.fileno()).st_size if end is None else end) - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._file.read(max(0, min(len(buffer), self._left)))
+        buffer[:len(data)] = data
+        self._left -= len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+def _open_range(path: Path, start: int, end: int | None) -> io.TextIOWrapper:
+    return io.TextIOWrapper(io.BufferedReader(_ByteRange(path, start, end)), encoding="utf-8", newline="")
+
+
+def _closing(reader) -> Iterator[pd.DataFrame]:
+    with reader:
+        yield from reader
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    required_cols = set(DPR_COLUMNS)
     if not required_cols.issubset(df.columns):
         raise ValueError(f"DPR file must contain columns {required_cols}")
-
-    return df
\ No newline at end of file
+    df = df[DPR_COLUMNS].reset_index(drop=True)
+    return df.astype({"date": "datetime64[ns]", **DPR_DTYPES})
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime
+from itertools import repeat
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from .dpr_parser import DPR_CHUNK_ROWS, iter_dpr_chunks
+
+_HASH_BLOCK = 1 << 20
+
+
+def _scan(path: Path, offset: int, whole: bool) -> Tuple[Optional[str], int, str]:
+    """SHA-256 of the first ``offset`` bytes (None if the file is shorter), the
+    end of its last complete line (of the file if ``whole``) and the SHA-256 up to there."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        left = offset
+        while left:
+            block = f.read(min(left, _HASH_BLOCK))
+            if not block:
+                break
+            digest.update(block)
+            left -= len(block)
+        prefix = None if left else digest.hexdigest()
+        end, tail = offset - left, b""
+        while block := f.read(_HASH_BLOCK):
+            data = tail + block
+            cut = len(data) if whole else data.rfind(b"\n") + 1
+            digest.update(data[:cut])
+            end += cut
+            tail = data[cut:]
+    return prefix, end, digest.hexdigest()
+
+
+class DPRStore:
+    """Append-only history of DPR rows in a local SQLite file.
+
+    Rows are indexed by (activity, date). Each ingested file is remembered
+    by the byte offset read up to and a hash of those bytes, so re-ingesting
+    a DPR file that has since been appended to only reads the new bytes.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS progress ("
+                " activity TEXT NOT NULL, date TEXT NOT NULL, progress REAL NOT NULL, source TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS progress_activity_date ON progress(activity, date)")
+            conn.execute("CREATE INDEX IF NOT EXISTS progress_source ON progress(source)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                " path TEXT PRIMARY KEY, offset INTEGER NOT NULL, sha256 TEXT NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def ingest(self, file_path: str | Path, chunk_rows: int = DPR_CHUNK_ROWS) -> int:
+        """Append the rows of a DPR file not ingested before; returns how many were added.
+
+        If the file no longer starts with the bytes read last time it was
+        edited rather than appended to: its earlier rows are dropped and it is
+        read again in full. A last line without its newline may still be being
+        written and is left for the next ingest.
+        """
+        path = Path(file_path)
+        source = str(path.resolve())
+        whole = path.suffix.lower() == ".json"  # an array cannot be read from an offset
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT offset, sha256 FROM sources WHERE path = ?", (source,)).fetchone()
+            offset, expected = row if row else (0, None)
+            prefix, end, digest = _scan(path, offset, whole)
+            if row and (prefix != expected or (whole and end > offset)):
+                conn.execute("DELETE FROM progress WHERE source = ?", (source,))
+                if prefix != expected:
+                    _, end, digest = _scan(path, 0, whole)
+                offset = 0
+            added = 0
+            if end > offset:
+                for chunk in iter_dpr_chunks(path, chunk_rows, start=offset, end=end):
+                    conn.executemany(
+                        "INSERT INTO progress (activity, date, progress, source) VALUES (?, ?, ?, ?)",
+                        zip(chunk["activity"].astype(str), chunk["date"].dt.strftime("%Y-%m-%d"),
+                            chunk["progress"].astype(float), repeat(source)),
+                    )
+                    added += len(chunk)
+            conn.execute("INSERT OR REPLACE INTO sources (path, offset, sha256) VALUES (?, ?, ?)",
+                         (source, end, digest))
+        return added
+
+    def latest_progress(self, as_of: date | datetime | str | None = None) -> pd.DataFrame:
+        """Latest row per activity on or before ``as_of`` (all history if None).
+
+        Columns match load_dpr, so the result can be passed to Schedule.apply_progress.
+        Of several rows for the same activity and date, the last ingested wins.
+        """
+        query = (
+            "SELECT activity, date, progress FROM ("
+            " SELECT activity, date, progress,"
+            "  ROW_NUMBER() OVER (PARTITION BY activity ORDER BY date DESC, rowid DESC) AS rn"
+            " FROM progress WHERE date <= ?"
+            ") WHERE rn = 1 ORDER BY activity"
+        )
+        cutoff = "9999-12-31" if as_of is None else pd.Timestamp(as_of).strftime("%Y-%m-%d")
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(query, conn, params=(cutoff,), parse_dates=["date"])
+        df = df[["date", "activity", "progress"]]
+        return df.astype({"activity": "category", "progress": "float64"})
+
+    def row_count(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM progress").fetchone()[0]
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+
+class CycleError(ValueError):
+    """Raised when task dependencies form a cycle; ``cycle`` lists the task ids in order."""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__("Dependency cycle: " + " -> ".join(cycle + cycle[:1]))
+
+
+def _csr(keys: np.ndarray, values: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row pointers and column indices with ``values`` grouped by ``keys``."""
+    order = np.argsort(keys, kind="stable")
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n), out=ptr[1:])
+    return ptr, values[order]
+
+
+@dataclass
+class CPMResult:
+    """Critical path analysis in whole days from the project start, indexed like the graph's tasks."""
+
+    order: np.ndarray
+    early_start: np.ndarray
+    early_finish: np.ndarray
+    late_start: np.ndarray
+    late_finish: np.ndarray
+    total_float: np.ndarray
+    free_float: np.ndarray
+    project_duration: int
+
+    @property
+    def critical(self) -> np.ndarray:
+        # A pinned start ahead of its predecessors' finish leaves them negative float
+        return self.total_float <= 0
+
+
+class TaskGraph:
+    """Tasks as integers 0..n-1 with successor and predecessor lists in CSR arrays.
+
+    ``succ_idx[succ_ptr[i]:succ_ptr[i + 1]]`` are the tasks that depend on task
+    ``i``; ``pred_idx``/``pred_ptr`` hold the reverse. All passes are iterative,
+    so chain depth is bounded by memory rather than the recursion limit.
+    """
+
+    def __init__(self, ids: Sequence[str], durations: Sequence[int], sources: Sequence[int],
+                 targets: Sequence[int]):
+        self.ids = list(ids)
+        self.n = len(self.ids)
+        self.duration = np.asarray(durations, dtype=np.int64)
+        src = np.asarray(sources, dtype=np.int64)
+        dst = np.asarray(targets, dtype=np.int64)
+        self.succ_ptr, self.succ_idx = _csr(src, dst, self.n)
+        self.pred_ptr, self.pred_idx = _csr(dst, src, self.n)
+
+    @classmethod
+    def from_dependencies(cls, durations: Mapping[str, int],
+                          dependencies: Mapping[str, Sequence[str]]) -> "TaskGraph":
+        """Build from task id -> duration and task id -> ids it depends on."""
+        ids = list(durations)
+        index = {tid: i for i, tid in enumerate(ids)}
+        sources: List[int] = []
+        targets: List[int] = []
+        for tid, deps in dependencies.items():
+            for dep in deps:
+                if dep not in index:
+                    raise ValueError(f"Task {tid} depends on unknown task {dep}")
+                sources.append(index[dep])
+                targets.append(index[tid])
+        return cls(ids, [durations[t] for t in ids], sources, targets)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.succ_idx)
+
+    def index(self) -> Dict[str, int]:
+        return {tid: i for i, tid in enumerate(self.ids)}
+
+    def topological_order(self) -> np.ndarray:
+        """Kahn's algorithm; ties keep the original task order. Raises CycleError."""
+        return np.asarray(self._forward_pass()[0], dtype=np.int64)
+
+    def _forward_pass(self) -> Tuple[List[int], List[int], List[int]]:
+        # Kahn's algorithm with the early-start pass folded in: a task is only
+        # released once every predecessor has pushed its finish onto it.
+        indegree = np.diff(self.pred_ptr).tolist()
+        ptr = self.succ_ptr.tolist()
+        succ = self.succ_idx.tolist()
+        duration = self.duration.tolist()
+        early_start = [0] * self.n
+        early_finish = [0] * self.n
+        order = [i for i in range(self.n) if indegree[i] == 0]
+        head = 0
+        while head < len(order):
+            u = order[head]
+            head += 1
+            finish = early_start[u] + duration[u]
+            early_finish[u] = finish
+            for v in succ[ptr[u]:ptr[u + 1]]:
+                if early_start[v] < finish:
+                    early_start[v] = finish
+                indegree[v] -= 1
+                if indegree[v] == 0:
+                    order.append(v)
+        if len(order) < self.n:
+            raise CycleError([self.ids[i] for i in self._find_cycle(indegree)])
+        return order, early_start, early_finish
+
+    def _find_cycle(self, indegree: List[int]) -> List[int]:
+        # Every task Kahn could not release still has an unreleased predecessor,
+        # so walking predecessors from any of them must revisit a task.
+        ptr = self.pred_ptr.tolist()
+        pred = self.pred_idx.tolist()
+        u = next(i for i in range(self.n) if indegree[i] > 0)
+        seen: Dict[int, int] = {}
+        path: List[int] = []
+        while u not in seen:
+            seen[u] = len(path)
+            path.append(u)
+            u = next(p for p in pred[ptr[u]:ptr[u + 1]] if indegree[p] > 0)
+        return path[seen[u]:][::-1]
+
+    def analyse(self) -> CPMResult:
+        """Forward and backward passes, total and free float."""
+        order, early_start, early_finish = self._forward_pass()
+        project = max(early_finish, default=0)
+        ptr = self.succ_ptr.tolist()
+        succ = self.succ_idx.tolist()
+        duration = self.duration.tolist()
+
+        late_start = [0] * self.n
+        late_finish = [0] * self.n
+        free_float = [0] * self.n
+        for u in reversed(order):
+            finish = project
+            next_start = project
+            for v in succ[ptr[u]:ptr[u + 1]]:
+                if late_start[v] < finish:
+                    finish = late_start[v]
+                if early_start[v] < next_start:
+                    next_start = early_start[v]
+            late_finish[u] = finish
+            late_start[u] = finish - duration[u]
+            free_float[u] = next_start - early_finish[u]
+
+        es = np.asarray(early_start, dtype=np.int64)
+        ls = np.asarray(late_start, dtype=np.int64)
+        return CPMResult(
+            order=np.asarray(order, dtype=np.int64),
+            early_start=es,
+            early_finish=np.asarray(early_finish, dtype=np.int64),
+            late_start=ls,
+            late_finish=np.asarray(late_finish, dtype=np.int64),
+            total_float=ls - es,
+            free_float=np.asarray(free_float, dtype=np.int64),
+            project_duration=int(project),
+        )
+
+    def critical_path(self, result: CPMResult) -> List[int]:
+        """One chain of critical tasks ending at the task that sets the project end.
+
+        The chain is built backwards through the predecessor whose finish sets
+        each task's start. A pinned start may match no predecessor's finish;
+        the chain then goes through the critical predecessor finishing last.
+        It begins at a task with no critical predecessor.
+        """
+        if not self.n:
+            return []
+        es, ef, critical = result.early_start, result.early_finish, result.critical
+        ptr = self.pred_ptr
+        u = int(np.argmax(ef))
+        path = [u]
+        while True:
+            preds = [int(p) for p in self.pred_idx[ptr[u]:ptr[u + 1]] if critical[p]]
+            if not preds:
+                break
+            driving = [p for p in preds if ef[p] == es[u]]
+            u = driving[0] if driving else max(preds, key=lambda p: ef[p])
+            path.append(u)
+        return path[::-1]
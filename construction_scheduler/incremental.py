@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import heapq
+from typing import Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+from .graph import CPMResult, TaskGraph
+
+
+class ScheduleState:
+    """Early dates and float of a task graph that can be updated in place.
+
+    Late dates are kept as ``tail``: the longest duration path after a task to
+    the end of the project. Unlike late finish it does not depend on the
+    project end, so a change only touches the tasks upstream of it. Updates
+    walk a heap in topological order from the changed tasks and stop wherever
+    a recomputed value comes out unchanged. If given, ``span(task, start)``
+    is the duration of a task that is not pinned when it starts on ``start``,
+    for tasks whose duration depends on where they start.
+    """
+
+    def __init__(self, graph: TaskGraph, result: Optional[CPMResult] = None,
+                 span: Optional[Callable[[int, int], int]] = None):
+        self.graph = graph
+        self.span = span
+        result = result or graph.analyse()
+        self.duration = graph.duration.tolist()
+        self.early_start = result.early_start.tolist()
+        self.early_finish = result.early_finish.tolist()
+        self.tail = (result.project_duration - result.late_finish).tolist()
+        # Earliest successor start per task (free float); sinks use the project end
+        self.next_start = (result.free_float + result.early_finish).tolist()
+        self.pinned: Dict[int, int] = {}
+        self._order = result.order
+        self.position = [0] * graph.n
+        for pos, i in enumerate(result.order.tolist()):
+            self.position[i] = pos
+        self._succ_ptr = graph.succ_ptr.tolist()
+        self._succ = graph.succ_idx.tolist()
+        self._pred_ptr = graph.pred_ptr.tolist()
+        self._pred = graph.pred_idx.tolist()
+        self._sinks = np.diff(graph.succ_ptr) == 0
+
+    def successors(self, i: int) -> List[int]:
+        return self._succ[self._succ_ptr[i]:self._succ_ptr[i + 1]]
+
+    def predecessors(self, i: int) -> List[int]:
+        return self._pred[self._pred_ptr[i]:self._pred_ptr[i + 1]]
+
+    def update(self, changes: Mapping[int, Tuple[Optional[int], int]]) -> Set[int]:
+        """Apply ``{task: (pinned start or None, duration)}``; returns tasks whose dates moved."""
+        resized: List[int] = []
+        for i, (start, duration) in changes.items():
+            if start is None:
+                self.pinned.pop(i, None)
+            else:
+                self.pinned[i] = start
+            if duration != self.duration[i]:
+                self.duration[i] = duration
+                resized.append(i)
+        moved = self._forward(changes, resized)
+        self._backward(resized)
+
+        succ_ptr, succ, pred_ptr, pred = self._succ_ptr, self._succ, self._pred_ptr, self._pred
+        early_start, next_start = self.early_start, self.next_start
+        for u in {p for v in moved for p in pred[pred_ptr[v]:pred_ptr[v + 1]]}:
+            next_start[u] = min([early_start[s] for s in succ[succ_ptr[u]:succ_ptr[u + 1]]])
+        return moved
+
+    # Both passes are hot on large updates, hence the local aliases.
+
+    def _forward(self, seeds, resized: List[int]) -> Set[int]:
+        position, pinned, duration, span = self.position, self.pinned, self.duration, self.span
+        early_start, early_finish = self.early_start, self.early_finish
+        succ_ptr, succ, pred_ptr, pred = self._succ_ptr, self._succ, self._pred_ptr, self._pred
+        heap = [(position[i], i) for i in seeds]
+        heapq.heapify(heap)
+        queued = set(seeds)
+        moved: Set[int] = set()
+        while heap:
+            v = heapq.heappop(heap)[1]
+            if v in pinned:
+                start = pinned[v]
+            else:
+                start = max([early_finish[p] for p in pred[pred_ptr[v]:pred_ptr[v + 1]]], default=0)
+                if span is not None and start != early_start[v]:
+                    length = span(v, start)
+                    if length != duration[v]:
+                        duration[v] = length
+                        resized.append(v)
+            finish = start + duration[v]
+            if start == early_start[v] and finish == early_finish[v]:
+                continue
+            early_start[v] = start
+            early_finish[v] = finish
+            moved.add(v)
+            for s in succ[succ_ptr[v]:succ_ptr[v + 1]]:
+                if s not in queued:
+                    queued.add(s)
+                    heapq.heappush(heap, (position[s], s))
+        return moved
+
+    def _backward(self, resized: List[int]) -> None:
+        position, duration, tail = self.position, self.duration, self.tail
+        succ_ptr, succ, pred_ptr, pred = self._succ_ptr, self._succ, self._pred_ptr, self._pred
+        queued = {p for v in resized for p in pred[pred_ptr[v]:pred_ptr[v + 1]]}
+        heap = [(-position[i], i) for i in queued]
+        heapq.heapify(heap)
+        while heap:
+            u = heapq.heappop(heap)[1]
+            longest = max([tail[s] + duration[s] for s in succ[succ_ptr[u]:succ_ptr[u + 1]]])
+            if longest == tail[u]:
+                continue
+            tail[u] = longest
+            for p in pred[pred_ptr[u]:pred_ptr[u + 1]]:
+                if p not in queued:
+                    queued.add(p)
+                    heapq.heappush(heap, (-position[p], p))
+
+    def result(self) -> CPMResult:
+        es = np.asarray(self.early_start, dtype=np.int64)
+        ef = np.asarray(self.early_finish, dtype=np.int64)
+        duration = np.asarray(self.duration, dtype=np.int64)
+        project = int(ef.max()) if len(ef) else 0
+        late_finish = project - np.asarray(self.tail, dtype=np.int64)
+        late_start = late_finish - duration
+        next_start = np.where(self._sinks, project, np.asarray(self.next_start, dtype=np.int64))
+        return CPMResult(
+            order=self._order,
+            early_start=es,
+            early_finish=ef,
+            late_start=late_start,
+            late_finish=late_finish,
+            total_float=late_start - es,
+            free_float=next_start - ef,
+            project_duration=project,
+        )
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import heapq
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .graph import CPMResult, TaskGraph
+
+# Activities with the smallest key are scheduled first among those whose
+# predecessors are all placed; ties go to the earlier task.
+PRIORITY_RULES = ("late_start", "late_finish", "total_float", "early_start", "duration")
+
+
+def _priority_keys(rule: str, cpm: CPMResult, duration: np.ndarray) -> List[int]:
+    if rule not in PRIORITY_RULES:
+        raise ValueError(f"Unknown priority rule {rule!r}; use one of {', '.join(PRIORITY_RULES)}")
+    if rule == "duration":
+        return duration.tolist()
+    return getattr(cpm, rule).tolist()
+
+
+class ResourceProfile:
+    """Units in use per day for one resource; grows as days outside it are booked.
+
+    Days before day 0 are kept too, for tasks that started on site before
+    the project start; ``origin`` is where day 0 sits in ``usage``.
+    """
+
+    def __init__(self, capacity: int, horizon: int = 1024):
+        self.capacity = capacity
+        self.usage = np.zeros(horizon, dtype=np.int64)
+        self.origin = 0
+
+    def _window(self, start: int, duration: int) -> slice:
+        before = -(start + self.origin)
+        if before > 0:
+            before = max(before, len(self.usage))
+            self.usage = np.concatenate([np.zeros(before, dtype=np.int64), self.usage])
+            self.origin += before
+        end = start + duration + self.origin
+        if end > len(self.usage):
+            grown = np.zeros(max(end, 2 * len(self.usage)), dtype=np.int64)
+            grown[:len(self.usage)] = self.usage
+            self.usage = grown
+        return slice(start + self.origin, end)
+
+    def first_conflict_end(self, start: int, duration: int, units: int) -> Optional[int]:
+        """Day after the last over-booked day in [start, start + duration), or None if it fits."""
+        window = self._window(start, duration)
+        over = np.flatnonzero(self.usage[window] > self.capacity - units)
+        return start + int(over[-1]) + 1 if over.size else None
+
+    def book(self, start: int, duration: int, units: int) -> None:
+        window = self._window(start, duration)  # may replace self.usage
+        self.usage[window] += units
+
+    def first_overbooked_day(self) -> Optional[int]:
+        over = np.flatnonzero(self.usage > self.capacity)
+        return int(over[0]) - self.origin if over.size else None
+
+
+def level_resources(graph: TaskGraph, demands: Sequence[Mapping[str, int]], capacities: Mapping[str, int],
+                    cpm: Optional[CPMResult] = None, priority: str = "late_start",
+                    durations: Optional[Sequence[int]] = None,
+                    fixed_starts: Optional[Mapping[int, int]] = None,
+                    span: Optional[Callable[[int, int], int]] = None) -> np.ndarray:
+    """Serial schedule-generation scheme; returns a start day per task.
+
+    Tasks become eligible once all predecessors are placed and are taken
+    from a heap in priority-rule order. Each is placed at the earliest day
+    after its predecessors finish where every resource it uses has spare
+    units for its whole duration. Tasks in ``fixed_starts`` (already started
+    on site) keep their start, which may be before day 0, and book their
+    resources before any other task is placed; raises ValueError if they
+    alone need more of a resource than exists. If given, ``span(task, day)``
+    is the duration of a task that is not pinned when it starts on ``day``,
+    re-evaluated each time the task is pushed later.
+    """
+    cpm = cpm or graph.analyse()
+    duration = np.asarray(graph.duration if durations is None else durations, dtype=np.int64)
+    fixed_starts = fixed_starts or {}
+    for i, demand in enumerate(demands):
+        for name, units in demand.items():
+            if name not in capacities:
+                raise ValueError(f"Task {graph.ids[i]} uses undeclared resource {name}")
+            if units > capacities[name]:
+                raise ValueError(f"Task {graph.ids[i]} needs {units} {name} but only {capacities[name]} exist")
+
+    profiles: Dict[str, ResourceProfile] = {name: ResourceProfile(cap) for name, cap in capacities.items()}
+    for i, t in fixed_starts.items():
+        for name, units in demands[i].items():
+            if units > 0:
+                profiles[name].book(t, int(duration[i]), units)
+    for name, profile in profiles.items():
+        day = profile.first_overbooked_day()
+        if day is not None:
+            raise ValueError(f"Tasks started on site need more {name} than the {profile.capacity} "
+                             f"that exist on day {day}")
+
+    keys = _priority_keys(priority, cpm, duration)
+    dur = duration.tolist()
+    succ_ptr = graph.succ_ptr.tolist()
+    succ = graph.succ_idx.tolist()
+    waiting = np.diff(graph.pred_ptr).tolist()
+    ready_at = [0] * graph.n  # latest predecessor finish seen so far
+    start = [0] * graph.n
+
+    eligible = [(keys[i], i) for i in range(graph.n) if waiting[i] == 0]
+    heapq.heapify(eligible)
+    placed = 0
+    while eligible:
+        _, i = heapq.heappop(eligible)
+        if i in fixed_starts:
+            t = fixed_starts[i]
+        else:
+            needs = [(profiles[name], units) for name, units in demands[i].items() if units > 0]
+            t = ready_at[i]
+            if span is not None:
+                dur[i] = span(i, t)
+            if dur[i] > 0:
+                # Jump past the last conflicting day until all resources fit at once
+                settled = False
+                while not settled:
+                    settled = True
+                    for profile, units in needs:
+                        conflict = profile.first_conflict_end(t, dur[i], units)
+                        if conflict is not None:
+                            t = conflict
+                            settled = False
+                            if span is not None:
+                                dur[i] = span(i, t)
+            for profile, units in needs:
+                profile.book(t, dur[i], units)
+        start[i] = t
+        placed += 1
+
+        finish = t + dur[i]
+        for s in succ[succ_ptr[i]:succ_ptr[i + 1]]:
+            if ready_at[s] < finish:
+                ready_at[s] = finish
+            waiting[s] -= 1
+            if waiting[s] == 0:
+                heapq.heappush(eligible, (keys[s], s))
+
+    if placed < graph.n:
+        graph.topological_order()  # raises CycleError naming the cycle
+    return np.asarray(start, dtype=np.int64)
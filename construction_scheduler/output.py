@@ -1,36 +1,160 @@
+from html import escape
 from pathlib import Path
+from typing import Iterator
+import math
 
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.collections import PolyCollection
 
+# PDF pages hold this many rows; raster output is always one page
+GANTT_ROWS_PER_PAGE = 60
+GANTT_MAX_HEIGHT_IN = 40.0
+GANTT_LABEL_FONT_PT = 8.0
+GANTT_LABEL_MAX_CHARS = 40
 
-def save_gantt(df: pd.DataFrame, output_path: str | Path):
-    """Save a simple Gantt chart from schedule DataFrame."""
-    fig, ax = plt.subplots(figsize=(12, 6))
+SVG_ROW_PX = 18
+SVG_CHART_WIDTH_PX = 1200
+SVG_LABEL_WIDTH_PX = 220
 
-    df_sorted = df.sort_values("start")
-    y_pos = range(len(df_sorted))
+BAR_COLOR = "#4c72b0"
+CRITICAL_COLOR = "#c44e52"
 
-    for idx, row in enumerate(df_sorted.itertuples(index=False)):
-        start = mdates.date2num(row.start)
-        end = mdates.date2num(row.end)
-        ax.barh(
-            y=idx,
-            width=end - start,
-            left=start,
-            height=0.4,
-            align="center",
-        )
-        ax.text(end, idx, f" {row.name}", va="center", fontsize=8)
 
-    ax.set_yticks(list(y_pos))
-    ax.set_yticklabels(df_sorted["task_id"].tolist())
+def save_gantt(df: pd.DataFrame, output_path: str | Path, rows_per_page: int = GANTT_ROWS_PER_PAGE):
+    """Save a Gantt chart from schedule DataFrame.
+
+    The format follows the file suffix: .pdf is split into pages of
+    ``rows_per_page`` rows, .svg and .html are written row by row without
+    matplotlib, anything else is a single matplotlib image.
+    """
+    output_path = Path(output_path)
+    suffix = output_path.suffix.lower()
+    if suffix in (".svg", ".html"):
+        save_gantt_svg(df, output_path, html=suffix == ".html")
+        return
+
+    df_sorted = df.sort_values("start", kind="stable")
+    start = mdates.date2num(df_sorted["start"].to_numpy())
+    end = mdates.date2num(df_sorted["end"].to_numpy())
+    xlim = (start.min(), end.max()) if len(df_sorted) else None
+
+    if suffix == ".pdf":
+        # One figure is redrawn for every page; building a figure per page dominates otherwise
+        fig, ax = _figure(min(len(df_sorted), rows_per_page))
+        with PdfPages(output_path) as pdf:
+            for first in range(0, max(len(df_sorted), 1), rows_per_page):
+                rows = slice(first, first + rows_per_page)
+                ax.clear()
+                _draw(ax, df_sorted.iloc[rows], start[rows], end[rows], xlim, first)
+                pdf.savefig(fig)
+        plt.close(fig)
+        return
+
+    fig, ax = _figure(len(df_sorted))
+    _draw(ax, df_sorted, start, end, xlim, 0)
+    fig.savefig(output_path)
+    plt.close(fig)
+
+
+def _figure(rows: int):
+    height = min(max(6.0, 0.25 * rows), GANTT_MAX_HEIGHT_IN)
+    fig, ax = plt.subplots(figsize=(12, height))
+    # Fixed margins instead of tight_layout, which measures every label
+    fig.subplots_adjust(left=0.25, right=0.98, bottom=0.6 / height, top=1 - 0.4 / height)
+    return fig, ax
+
+
+def _draw(ax, df: pd.DataFrame, start: np.ndarray, end: np.ndarray, xlim, first_row: int):
+    n = len(df)
+    height = ax.figure.get_figheight() * ax.get_position().height
+
+    # All bars as one collection: one draw call however many rows there are
+    y = np.arange(n, dtype=float)
+    verts = np.empty((n, 4, 2))
+    verts[:, :, 0] = np.column_stack([start, start, end, end])
+    verts[:, :, 1] = np.column_stack([y - 0.2, y + 0.2, y + 0.2, y - 0.2])
+    colors = BAR_COLOR
+    if "critical" in df.columns:
+        colors = np.where(df["critical"].to_numpy(dtype=bool), CRITICAL_COLOR, BAR_COLOR)
+    ax.add_collection(PolyCollection(verts, facecolors=colors, edgecolors="none"))
+
+    # Only label as many rows as fit at the label font size
+    points_per_row = height * 72.0 / max(n, 1)
+    step = max(1, math.ceil(GANTT_LABEL_FONT_PT * 1.2 / points_per_row))
+    shown = np.arange(0, n, step)
+    names = df["name"].to_numpy()
+    task_ids = df["task_id"].to_numpy()
+    # All labels of the page as one text, its line pitch set to the label
+    # pitch; rows count up from the bottom, text lines down from the top
+    if len(shown):
+        labels = "\n".join(f"{task_ids[i]}  {str(names[i])[:GANTT_LABEL_MAX_CHARS]}" for i in shown[::-1])
+        pitch = step * ax.bbox.height / (max(n, 1) + 1)
+        ax.text(-0.01, (shown[0] + shown[-1]) / 2, labels, transform=ax.get_yaxis_transform(),
+                ha="right", va="center", fontsize=GANTT_LABEL_FONT_PT,
+                linespacing=pitch / _label_line_height(ax.figure))
+    ax.set_yticks([])
+
+    ax.set_ylim(-1, max(n, 1))
+    if xlim is not None:
+        ax.set_xlim(xlim[0], xlim[1] + 0.02 * (xlim[1] - xlim[0] or 1))
     ax.xaxis_date()
     ax.xaxis.set_major_locator(mdates.AutoDateLocator())
     ax.xaxis.set_major_formatter(mdates.DateFormatter("%d-%b"))
+    if first_row:
+        ax.set_title(f"Rows {first_row + 1}-{first_row + n}", fontsize=9)
 
-    plt.tight_layout()
-    output_path = Path(output_path)
-    fig.savefig(output_path)
-    plt.close(fig)
\ No newline at end of file
+
+def _label_line_height(fig) -> float:
+    """Distance between label lines at linespacing 1, in display units."""
+    renderer = fig.canvas.get_renderer()
+    probe = fig.text(0, 0, "lp", fontsize=GANTT_LABEL_FONT_PT, linespacing=1.0)
+    one = probe.get_window_extent(renderer).height
+    probe.set_text("lp\nlp")
+    two = probe.get_window_extent(renderer).height
+    probe.remove()
+    return two - one
+
+
+def save_gantt_svg(df: pd.DataFrame, output_path: str | Path, html: bool = False):
+    """Write the Gantt chart as SVG (or SVG inside an HTML page) one row at a time."""
+    with open(output_path, "w", encoding="utf-8") as f:
+        for part in iter_gantt_svg(df, html=html):
+            f.write(part)
+
+
+def iter_gantt_svg(df: pd.DataFrame, html: bool = False) -> Iterator[str]:
+    df_sorted = df.sort_values("start", kind="stable")
+    start = df_sorted["start"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+    end = df_sorted["end"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+    origin = int(start.min()) if len(start) else 0
+    span = max(int(end.max()) - origin, 1) if len(end) else 1
+    scale = SVG_CHART_WIDTH_PX / span
+    x0 = (start - origin) * scale + SVG_LABEL_WIDTH_PX
+    width = np.maximum((end - start) * scale, 1.0)
+    critical = np.zeros(len(df_sorted), dtype=bool)
+    if "critical" in df_sorted.columns:
+        critical = df_sorted["critical"].to_numpy(dtype=bool)
+    total_width = SVG_LABEL_WIDTH_PX + SVG_CHART_WIDTH_PX
+    total_height = SVG_ROW_PX * (len(df_sorted) + 1)
+
+    if html:
+        yield "<!doctype html>\n<html><head><meta charset='utf-8'/><title>Schedule</title></head><body>\n"
+    yield (f'<svg xmlns="http://www.w3.org/2000/svg" width="{total_width}" height="{total_height}" '
+           f'font-family="sans-serif" font-size="11">\n')
+    rows = zip(df_sorted["task_id"].to_numpy(), df_sorted["name"].to_numpy(),
+               df_sorted["start"].to_numpy(), df_sorted["end"].to_numpy())
+    for i, (task_id, name, row_start, row_end) in enumerate(rows):
+        y = i * SVG_ROW_PX
+        color = CRITICAL_COLOR if critical[i] else BAR_COLOR
+        label = escape(f"{task_id} {name}")
+        tooltip = escape(f"{task_id}: {name} ({pd.Timestamp(row_start):%d-%b-%Y} to {pd.Timestamp(row_end):%d-%b-%Y})")
+        yield (f'<g><title>{tooltip}</title>'
+               f'<text x="4" y="{y + SVG_ROW_PX - 5}">{label}</text>'
+               f'<rect x="{x0[i]:.1f}" y="{y + 3}" width="{width[i]:.1f}" height="{SVG_ROW_PX - 6}" fill="{color}"/></g>\n')
+    yield "</svg>\n"
+    if html:
+        yield "</body></html>\n"
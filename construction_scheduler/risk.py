@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .graph import TaskGraph
+
+# Scenarios simulated together; memory is a few (tasks x chunk) float matrices
+RISK_CHUNK_SCENARIOS = 1000
+RISK_PERCENTILES = (10, 50, 80, 90)
+# Float slack below this counts as zero when deciding if a task was critical
+_CRITICAL_TOL = 1e-6
+
+
+@dataclass
+class RiskResult:
+    """Outcome of a Monte Carlo run, in days from the project start."""
+
+    ids: List[str]
+    completion: np.ndarray  # project duration per scenario
+    criticality: np.ndarray  # fraction of scenarios in which each task was critical
+
+    @property
+    def iterations(self) -> int:
+        return len(self.completion)
+
+    def percentile(self, p: float) -> float:
+        return float(np.percentile(self.completion, p))
+
+    def percentiles(self, ps: Sequence[float] = RISK_PERCENTILES) -> Dict[int, float]:
+        return {int(p): float(v) for p, v in zip(ps, np.percentile(self.completion, ps))}
+
+    def probability_within(self, days: float) -> float:
+        """Share of scenarios finishing within ``days``."""
+        return float(np.mean(self.completion <= days + _CRITICAL_TOL))
+
+    def most_critical(self, count: int = 10) -> List[Tuple[str, float]]:
+        top = np.argsort(-self.criticality, kind="stable")[:count]
+        return [(self.ids[i], float(self.criticality[i])) for i in top]
+
+
+def simulate(graph: TaskGraph, minimum: Sequence[float], likely: Sequence[float], maximum: Sequence[float],
+             iterations: int = 10_000, seed: Optional[int] = None, workers: int = 1,
+             fixed_start: Optional[Dict[int, int]] = None,
+             chunk_scenarios: int = RISK_CHUNK_SCENARIOS) -> RiskResult:
+    """Sample triangular(min, likely, max) durations and run CPM on every scenario.
+
+    Scenarios are a (tasks x scenarios) matrix; each pass walks the topological
+    order once and updates a whole row of scenarios per task. Tasks with
+    min == max keep that duration; ``fixed_start`` tasks (already started)
+    start on that day in every scenario. Chunks of scenarios are seeded from
+    ``seed`` independently of ``workers``, so results do not depend on how
+    many processes ran them.
+    """
+    low = np.asarray(minimum, dtype=np.float64)
+    mode = np.asarray(likely, dtype=np.float64)
+    high = np.asarray(maximum, dtype=np.float64)
+    if np.any(low > mode) or np.any(mode > high):
+        bad = next(graph.ids[i] for i in range(graph.n) if not low[i] <= mode[i] <= high[i])
+        raise ValueError(f"Task {bad} needs duration_min <= duration_days <= duration_max")
+    if iterations < 1:
+        raise ValueError("iterations must be at least 1")
+
+    order = graph.topological_order()
+    # Pinned starts may be before day 0, so whether a task is pinned is kept apart
+    pinned = np.zeros(graph.n, dtype=bool)
+    pins = np.zeros(graph.n, dtype=np.int64)
+    for i, start in (fixed_start or {}).items():
+        pinned[i] = True
+        pins[i] = start
+    sizes = [min(chunk_scenarios, iterations - first) for first in range(0, iterations, chunk_scenarios)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(graph.succ_ptr, graph.succ_idx, graph.pred_ptr, graph.pred_idx, order, low, mode, high, pinned,
+             pins, size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_simulate_chunk, jobs))
+    else:
+        results = [_simulate_chunk(job) for job in jobs]
+
+    completion = np.concatenate([r[0] for r in results])
+    critical_counts = np.sum([r[1] for r in results], axis=0)
+    return RiskResult(graph.ids, completion, critical_counts / iterations)
+
+
+def _simulate_chunk(job) -> Tuple[np.ndarray, np.ndarray]:
+    succ_ptr, succ_idx, pred_ptr, pred_idx, order, low, mode, high, pinned, pins, size, seed = job
+    n = len(low)
+    rng = np.random.default_rng(seed)
+    duration = np.repeat(mode[:, None], size, axis=1)
+    varied = np.flatnonzero(low < high)
+    if varied.size:
+        duration[varied] = rng.triangular(low[varied, None], mode[varied, None], high[varied, None],
+                                          (varied.size, size))
+
+    finish = np.empty((n, size))
+    preds = [pred_idx[pred_ptr[i]:pred_ptr[i + 1]] for i in range(n)]
+    for i in order.tolist():
+        p = preds[i]
+        if pinned[i]:
+            np.add(duration[i], pins[i], out=finish[i])
+        elif p.size == 0:
+            finish[i] = duration[i]
+        elif p.size == 1:
+            np.add(finish[p[0]], duration[i], out=finish[i])
+        else:
+            # Pairwise maximum in place: no (preds x scenarios) temporary
+            row = finish[i]
+            np.maximum(finish[p[0]], finish[p[1]], out=row)
+            for q in p[2:]:
+                np.maximum(row, finish[q], out=row)
+            row += duration[i]
+    project = finish.max(axis=0) if n else np.zeros(size)
+
+    # Backward pass: a task is critical where its late finish meets its early finish
+    late_start = np.empty((n, size))
+    late_finish = np.empty(size)
+    critical = np.zeros(n, dtype=np.int64)
+    for i in order[::-1].tolist():
+        s = succ_idx[succ_ptr[i]:succ_ptr[i + 1]]
+        if s.size == 0:
+            late_finish[:] = project
+        elif s.size == 1:
+            late_finish[:] = late_start[s[0]]
+        else:
+            np.minimum(late_start[s[0]], late_start[s[1]], out=late_finish)
+            for q in s[2:]:
+                np.minimum(late_finish, late_start[q], out=late_finish)
+        np.subtract(late_finish, duration[i], out=late_start[i])
+        critical[i] = np.count_nonzero(late_finish - finish[i] <= _CRITICAL_TOL)
+    return project, critical
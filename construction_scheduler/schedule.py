@@ -3,10 +3,20 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+import math
 
+import numpy as np
 import yaml
 
+from .graph import CPMResult, TaskGraph
+from .incremental import ScheduleState
+from .leveling import level_resources
+from .risk import RiskResult, simulate
+from .workdays import CalendarIndex, WorkCalendar, calendar_spans, forward_spans, load_calendars
+
+SCHEDULE_MODES = ("asap", "leveled")
+
 
 @dataclass
 class Task:
@@ -16,66 +26,301 @@ class Task:
     dependencies: List[str] = field(default_factory=list)
     planned_start: datetime | None = None
     planned_end: datetime | None = None
+    progress_pct: float = 0.0
+    resources: Dict[str, int] = field(default_factory=dict)  # units used on every working day
+    # Optional three-point estimate around duration_days for risk simulation
+    duration_min: int | None = None
+    duration_max: int | None = None
+    calendar: str | None = None  # named calendar the task works on; None = the project calendar
 
-    def set_schedule(self, start_date: datetime):
+    def set_schedule(self, start_date: datetime, end_date: datetime | None = None):
+        """Set planned dates; without ``end_date`` every day after the start counts as a working day."""
         self.planned_start = start_date
-        self.planned_end = start_date + timedelta(days=self.duration_days)
+        self.planned_end = end_date if end_date is not None else start_date + timedelta(days=self.duration_days)
 
 
 class Schedule:
-    def __init__(self, tasks: Dict[str, Task]):
+    def __init__(self, tasks: Dict[str, Task], resources: Optional[Dict[str, int]] = None,
+                 mode: str = "asap", priority: str = "late_start", calendar: WorkCalendar | None = None,
+                 calendars: Optional[Dict[str, WorkCalendar]] = None, start_date: datetime | None = None):
+        if mode not in SCHEDULE_MODES:
+            raise ValueError(f"Unknown schedule mode {mode!r}; use one of {', '.join(SCHEDULE_MODES)}")
         self.tasks = tasks  # dict by task_id
+        self.resources = resources or {}  # capacity per resource name
+        self.mode = mode
+        self.priority = priority
+        # Durations and all passes count working days of the project calendar
+        self.calendar = calendar or WorkCalendar()
+        self.calendars = calendars or {}
+        for task in tasks.values():
+            if task.calendar is not None and task.calendar not in self.calendars:
+                raise ValueError(f"Task {task.task_id} uses unknown calendar {task.calendar!r}")
+        self.axis: CalendarIndex | None = None
+        self._own_axes: List[CalendarIndex | None] = []
+        self._work_days: List[int] = []
+        self.graph: TaskGraph | None = None
+        self.cpm: CPMResult | None = None
+        self.state: ScheduleState | None = None
+        self.start_date = start_date
+        self.leveled_start: List[int] | None = None
 
     @classmethod
-    def from_yaml(cls, yaml_path: str | Path) -> "Schedule":
+    def from_yaml(cls, yaml_path: str | Path, mode: str = "asap", priority: str = "late_start") -> "Schedule":
+        """Load tasks from YAML: either a list of tasks, or a mapping with
+        ``tasks`` and optionally ``resources``, ``calendars``, ``calendar`` and
+        ``start_date``.
+
+        ``resources`` maps a name to the units available, or to
+        ``{units, calendar}``. ``calendars`` are named weekmask/holidays/
+        shutdowns definitions; ``calendar`` names (or inlines) the project
+        calendar, and every day works without one. A task works on its own
+        ``calendar``, else on that of the first of its resources that has
+        one, else on the project calendar.
+
+        With ``mode="leveled"`` tasks are additionally delayed until the
+        resources they declare are free; ``priority`` picks which eligible
+        task gets them first (see leveling.PRIORITY_RULES).
+        """
         yaml_path = Path(yaml_path)
         data = yaml.safe_load(yaml_path.read_text())
+        resources: Dict[str, int] = {}
+        resource_calendars: Dict[str, str] = {}
+        calendars: Dict[str, WorkCalendar] = {}
+        calendar = None
+        start_date = None
+        if isinstance(data, dict):
+            for k, v in (data.get("resources") or {}).items():
+                if isinstance(v, dict):
+                    resources[str(k)] = int(v["units"])
+                    if v.get("calendar"):
+                        resource_calendars[str(k)] = str(v["calendar"])
+                else:
+                    resources[str(k)] = int(v)
+            calendars = load_calendars(data)
+            project = data.get("calendar")
+            if isinstance(project, dict):
+                calendar = WorkCalendar.from_dict("project", project)
+            elif project is not None:
+                if project not in calendars:
+                    raise ValueError(f"Project calendar {project!r} is not defined under calendars")
+                calendar = calendars[project]
+            if data.get("start_date"):
+                start_date = datetime.fromisoformat(str(data["start_date"]))
+            data = data.get("tasks") or []
         tasks_dict: Dict[str, Task] = {}
         for item in data:
+            task_resources = {str(k): int(v) for k, v in (item.get("resources") or {}).items()}
+            task_calendar = item.get("calendar") or next(
+                (resource_calendars[r] for r in task_resources if r in resource_calendars), None)
             task = Task(
                 task_id=item["task_id"],
                 name=item["name"],
                 duration_days=item["duration_days"],
                 dependencies=item.get("dependencies", []),
+                resources=task_resources,
+                duration_min=item.get("duration_min"),
+                duration_max=item.get("duration_max"),
+                calendar=task_calendar,
             )
             tasks_dict[task.task_id] = task
-        sched = cls(tasks_dict)
+        sched = cls(tasks_dict, resources, mode=mode, priority=priority, calendar=calendar,
+                    calendars=calendars, start_date=start_date)
         sched._compute_baseline()
         return sched
 
     def _compute_baseline(self):
-        """Compute baseline schedule using simple forward pass (ASAP)."""
-        start_date = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
-        calculated: Dict[str, datetime] = {}
-
-        def calculate_task(task_id: str):
-            if task_id in calculated:
-                return calculated[task_id]
-            task = self.tasks[task_id]
-            if not task.dependencies:
-                task.set_schedule(start_date)
-            else:
-                dep_end_dates = [calculate_task(dep) for dep in task.dependencies]
-                task.set_schedule(max(dep_end_dates))
-            calculated[task_id] = task.planned_end
-            return task.planned_end
-
-        for tid in self.tasks:
-            calculate_task(tid)
+        """Compute baseline schedule (ASAP forward pass) plus float via the task graph.
+
+        Passes run in whole working days of the project calendar; dates are
+        only looked up at the end. A task on another calendar takes as many
+        project working days as its own calendar needs from where it starts
+        (see workdays.forward_spans); the span is worked out again whenever
+        leveling or progress moves the task. Raises CycleError if the
+        dependencies are circular.
+        """
+        if self.start_date is None:
+            self.start_date = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.axis = self.calendar.index(self.start_date)
+        own = {name: cal.index(self.start_date) for name, cal in self.calendars.items()
+               if cal is not self.calendar}
+        self._own_axes = [own.get(t.calendar) for t in self.tasks.values()]
+        self.graph = TaskGraph.from_dependencies(
+            {tid: t.duration_days for tid, t in self.tasks.items()},
+            {tid: t.dependencies for tid, t in self.tasks.items()},
+        )
+        self._work_days = self.graph.duration.tolist()
+        span = None
+        if any(self._own_axes):
+            self.graph.duration = forward_spans(self.graph, self.axis, self._own_axes)
+            span = self._span_from
+        self.cpm = self.graph.analyse()
+        self.state = ScheduleState(self.graph, self.cpm, span=span)
+        if self.mode == "leveled":
+            self._level()
+            return
+        self._set_dates(range(len(self.tasks)), self.cpm.early_start, self.cpm.early_finish - self.cpm.early_start)
+
+    def _set_dates(self, rows, starts, spans) -> List[int]:
+        """Planned dates of tasks ``rows`` from project workday starts and spans; returns the rows that moved.
+
+        A task on its own calendar starts on that calendar's first working day.
+        """
+        rows = np.fromiter(rows, dtype=np.int64)
+        starts = np.asarray(starts, dtype=np.int64)
+        start_day = self.axis.day_of(starts)
+        end_day = self.axis.finish_day(starts, spans)
+        for own in {id(a): a for a in self._own_axes if a is not None}.values():
+            mine = np.fromiter((self._own_axes[i] is own for i in rows.tolist()), dtype=bool, count=len(rows))
+            if mine.any():
+                start_day[mine] = own.day_of(own.workday_of(start_day[mine]))
+                end_day[mine] = np.maximum(end_day[mine], start_day[mine])
+        tasks = list(self.tasks.values())
+        moved = []
+        for i, start, end in zip(rows.tolist(), self.axis.to_datetimes(start_day), self.axis.to_datetimes(end_day)):
+            task = tasks[i]
+            if (task.planned_start, task.planned_end) != (start, end):
+                task.set_schedule(start, end)
+                moved.append(i)
+        return moved
+
+    def date_after(self, workdays: int) -> datetime:
+        """End date of ``workdays`` project working days from the start."""
+        return self.axis.to_datetimes(self.axis.finish_day([0], [workdays]))[0]
+
+    def _level(self) -> List[int]:
+        """Re-run resource leveling over the whole schedule; returns tasks whose dates moved.
+
+        Started tasks keep their pinned start and current duration; a task on
+        its own calendar takes the span needed from where it is placed.
+        """
+        starts = level_resources(
+            self.graph,
+            [t.resources for t in self.tasks.values()],
+            self.resources,
+            cpm=self.cpm,
+            priority=self.priority,
+            durations=self.state.duration,
+            fixed_starts=self.state.pinned,
+            span=self.state.span,
+        )
+        spans = np.asarray(self.state.duration, dtype=np.int64)
+        free = [i for i, own in enumerate(self._own_axes) if own is not None and i not in self.state.pinned]
+        if free:
+            spans[free] = calendar_spans(self.axis, [self._own_axes[i] for i in free], starts[free],
+                                         [self._work_days[i] for i in free])
+        self.leveled_start = starts.tolist()
+        return self._set_dates(range(len(self.tasks)), starts, spans)
+
+    def apply_progress(self, dpr) -> List[str]:
+        """Apply DPR rows (date, activity, progress %) and reschedule what they affect.
+
+        The latest row per activity wins. A started task keeps its start (or
+        moves to the report date if reported before it) and its remaining work
+        is scheduled from the report date; a task at 100% finishes on the report
+        date. Only the reported tasks and the successors whose dates actually
+        move are recomputed; a leveled schedule is leveled again in full, since
+        freed or extended resource usage can move unrelated tasks. Returns the
+        ids of tasks whose dates changed.
+        """
+        latest = dpr.sort_values("date", kind="stable").groupby("activity", sort=False).tail(1)
+        unknown = sorted(set(latest["activity"]) - set(self.tasks))
+        if unknown:
+            raise ValueError(f"DPR activities not in the schedule: {', '.join(map(str, unknown))}")
+
+        index = self.graph.index()
+        current_start = self.leveled_start if self.mode == "leveled" else self.state.early_start
+        changes: Dict[int, Tuple[Optional[int], int]] = {}
+        for activity, date, progress in zip(latest["activity"], latest["date"], latest["progress"]):
+            task = self.tasks[activity]
+            task.progress_pct = float(progress)
+            i = index[activity]
+            if progress <= 0:
+                changes[i] = (None, self._span(i, current_start[i], task.duration_days))
+                continue
+            # A report on a non-working day counts from the next working day
+            reported = int(self.axis.workday_of((date - self.start_date).days))
+            start = min(current_start[i], reported)
+            remaining = math.ceil(task.duration_days * (1 - min(float(progress), 100.0) / 100.0))
+            changes[i] = (start, reported - start + self._span(i, reported, remaining))
+
+        moved = self.state.update(changes)
+        self.cpm = self.state.result()
+        ids = self.graph.ids
+        if self.mode == "leveled":
+            moved = self._level()
+            return [ids[i] for i in sorted(moved, key=self.state.position.__getitem__)]
+        rows = sorted(moved, key=self.state.position.__getitem__)
+        self._set_dates(rows, [self.state.early_start[i] for i in rows], [self.state.duration[i] for i in rows])
+        return [ids[i] for i in rows]
+
+    def _span_from(self, i: int, start: int) -> int:
+        """Project working days not-started task ``i`` spans when it starts on project workday ``start``."""
+        return self._span(i, start, self._work_days[i])
+
+    def _span(self, i: int, start: int, work_days: int) -> int:
+        """Project working days task ``i`` needs for ``work_days`` of its own calendar from ``start``."""
+        if self._own_axes[i] is None:
+            return work_days
+        return int(calendar_spans(self.axis, [self._own_axes[i]], [start], [work_days])[0])
+
+    def simulate(self, iterations: int = 10_000, seed: int | None = None, workers: int = 1) -> RiskResult:
+        """Monte Carlo completion risk from the tasks' duration_min/duration_max.
+
+        Tasks without a range, and tasks already reported as started, keep
+        their current duration; started tasks keep their start. Resource
+        limits are not simulated. Scenarios count project working days; the
+        range of a task on its own calendar is scaled by its span.
+        """
+        likely = list(self.state.duration)
+        low, high = list(likely), list(likely)
+        for i, task in enumerate(self.tasks.values()):
+            if task.progress_pct > 0:
+                continue
+            # Own-calendar spans are project days; written so that min == duration stays exact
+            scaled = self._own_axes[i] is not None and task.duration_days > 0
+            if task.duration_min is not None:
+                low[i] = task.duration_min * likely[i] / task.duration_days if scaled else task.duration_min
+            if task.duration_max is not None:
+                high[i] = task.duration_max * likely[i] / task.duration_days if scaled else task.duration_max
+        return simulate(self.graph, low, likely, high, iterations=iterations, seed=seed, workers=workers,
+                        fixed_start=self.state.pinned)
+
+    def critical_path(self) -> List[str]:
+        """Task ids of one critical chain from project start to finish."""
+        return [self.graph.ids[i] for i in self.graph.critical_path(self.cpm)]
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """One dict per task, in task order; plain Python values, no pandas needed."""
+        if self.cpm is not None:
+            total_float = self.cpm.total_float.tolist()
+            free_float = self.cpm.free_float.tolist()
+            critical = self.cpm.critical.tolist()
+        else:
+            total_float = free_float = [None] * len(self.tasks)
+            critical = [False] * len(self.tasks)
+        # Float stays that of the unconstrained network; leveling adds a delay column
+        early_start = self.state.early_start if self.mode == "leveled" else None
+        rows = []
+        for i, task in enumerate(self.tasks.values()):
+            row = {
+                "task_id": task.task_id,
+                "name": task.name,
+                "duration_days": task.duration_days,
+                "dependencies": ",".join(task.dependencies),
+                "start": task.planned_start,
+                "end": task.planned_end,
+                "progress_pct": task.progress_pct,
+                "total_float_days": total_float[i],
+                "free_float_days": free_float[i],
+                "critical": critical[i],
+            }
+            if early_start is not None:
+                row["resources"] = ",".join(f"{k}:{v}" for k, v in task.resources.items())
+                row["resource_delay_days"] = self.leveled_start[i] - early_start[i]
+            rows.append(row)
+        return rows
 
     def to_dataframe(self):
         import pandas as pd
 
-        rows = []
-        for task in self.tasks.values():
-            rows.append(
-                {
-                    "task_id": task.task_id,
-                    "name": task.name,
-                    "duration_days": task.duration_days,
-                    "dependencies": ",".join(task.dependencies),
-                    "start": task.planned_start,
-                    "end": task.planned_end,
-                }
-            )
-        return pd.DataFrame(rows)
\ No newline at end of file
+        return pd.DataFrame(self.to_records())
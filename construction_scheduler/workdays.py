@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .graph import TaskGraph
+
+# Every day is a working day unless the YAML declares a calendar
+ALL_DAYS = "1111111"
+# Calendar days covered up front; the index doubles whenever a lookup goes past it
+CALENDAR_HORIZON_DAYS = 4 * 366
+
+
+def _day(value: Any) -> np.datetime64:
+    if isinstance(value, datetime):
+        value = value.date()
+    return np.datetime64(value, "D")
+
+
+@dataclass
+class WorkCalendar:
+    """Which days work happens on: a weekmask plus holidays and shutdown periods.
+
+    ``weekmask`` takes numpy's busday forms, e.g. ``"1111110"`` or
+    ``"Mon Tue Wed Thu Fri Sat"``. Shutdowns are inclusive (start, end) dates.
+    """
+
+    name: str = "default"
+    weekmask: str = ALL_DAYS
+    holidays: List[date] = field(default_factory=list)
+    shutdowns: List[Tuple[date, date]] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, name: str, data: Mapping[str, Any]) -> "WorkCalendar":
+        shutdowns = []
+        for period in data.get("shutdowns") or []:
+            shutdowns.append((period["from"], period["to"]))
+        return cls(
+            name=name,
+            weekmask=str(data.get("weekmask", ALL_DAYS)),
+            holidays=list(data.get("holidays") or []),
+            shutdowns=shutdowns,
+        )
+
+    def closed_days(self) -> np.ndarray:
+        """Holidays and every day of every shutdown, as datetime64[D]."""
+        days = [np.asarray([_day(d) for d in self.holidays], dtype="datetime64[D]")]
+        for start, end in self.shutdowns:
+            if _day(end) < _day(start):
+                raise ValueError(f"Calendar {self.name}: shutdown ends on {end}, before it starts on {start}")
+            days.append(np.arange(_day(start), _day(end) + 1, dtype="datetime64[D]"))
+        return np.concatenate(days)
+
+    def index(self, origin: date | datetime) -> "CalendarIndex":
+        return CalendarIndex(self, origin)
+
+
+class CalendarIndex:
+    """Working-day arrays for one calendar from a fixed origin date.
+
+    "Days" count calendar days from the origin, "workdays" count working days
+    from it. ``workday_day[k]`` is the day of the k-th working day and
+    ``workdays_before[d]`` the number of working days before day ``d``, so
+    both conversions are array lookups. Arrays cover a horizon that grows on
+    demand.
+    """
+
+    def __init__(self, calendar: WorkCalendar, origin: date | datetime,
+                 horizon_days: int = CALENDAR_HORIZON_DAYS):
+        self.calendar = calendar
+        self.origin = _day(origin)
+        try:
+            self._busdays = np.busdaycalendar(weekmask=calendar.weekmask, holidays=calendar.closed_days())
+        except ValueError as ex:
+            raise ValueError(f"Calendar {calendar.name}: {ex}") from ex
+        if not self._busdays.weekmask.any():
+            raise ValueError(f"Calendar {calendar.name} has no working weekdays")
+        self._build(horizon_days)
+
+    def _build(self, horizon_days: int) -> None:
+        days = self.origin + np.arange(horizon_days)
+        working = np.is_busday(days, busdaycal=self._busdays)
+        self.horizon = horizon_days
+        self.workday_day = np.flatnonzero(working)
+        self.workdays_before = np.zeros(horizon_days + 1, dtype=np.int64)
+        np.cumsum(working, out=self.workdays_before[1:])
+
+    def _cover(self, day: int = -1, workday: int = -1) -> None:
+        while day >= self.horizon or workday >= len(self.workday_day):
+            self._build(self.horizon * 2)
+
+    def day_of(self, workdays: np.ndarray | int) -> np.ndarray:
+        """Day of each working-day ordinal."""
+        workdays = np.asarray(workdays, dtype=np.int64)
+        if workdays.size and workdays.max() >= len(self.workday_day):
+            self._cover(workday=int(workdays.max()))
+        return self.workday_day[workdays]
+
+    def workday_of(self, days: np.ndarray | int) -> np.ndarray:
+        """Working days before each day; for a working day that is its own ordinal,
+        otherwise the ordinal of the next working day."""
+        days = np.asarray(days, dtype=np.int64)
+        if days.size and days.max() >= self.horizon:
+            self._cover(day=int(days.max()))
+        return self.workdays_before[np.maximum(days, 0)]
+
+    def finish_day(self, start_workdays: np.ndarray, durations: np.ndarray) -> np.ndarray:
+        """Day after the last working day of each task (its exclusive end); the start day when it takes none."""
+        start_workdays = np.asarray(start_workdays, dtype=np.int64)
+        durations = np.asarray(durations, dtype=np.int64)
+        last = self.day_of(start_workdays + np.maximum(durations, 1) - 1) + 1
+        return np.where(durations > 0, last, self.day_of(start_workdays))
+
+    def to_datetimes(self, days: np.ndarray) -> List[datetime]:
+        stamps = self.origin + np.asarray(days, dtype=np.int64).astype("timedelta64[D]")
+        return stamps.astype("datetime64[us]").tolist()
+
+
+def load_calendars(data: Mapping[str, Any]) -> Dict[str, WorkCalendar]:
+    """Named calendars from the ``calendars`` mapping of a tasks YAML."""
+    return {str(name): WorkCalendar.from_dict(str(name), spec or {})
+            for name, spec in (data.get("calendars") or {}).items()}
+
+
+def calendar_spans(project: CalendarIndex, own: Sequence[CalendarIndex | None], starts: np.ndarray,
+                   durations: np.ndarray) -> np.ndarray:
+    """Project workdays each task takes when it works ``durations`` days of its own calendar.
+
+    ``starts`` are project workday offsets. A task whose calendar is None
+    works on the project calendar and spans exactly its duration; one on
+    another calendar starts on that calendar's first working day at or after
+    its project start, and the span runs to the first project workday on or
+    after its exclusive end.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    spans = np.asarray(durations, dtype=np.int64).copy()
+    groups: Dict[int, Tuple[CalendarIndex, List[int]]] = {}
+    for i, index in enumerate(own):
+        if index is not None and index is not project:
+            groups.setdefault(id(index), (index, []))[1].append(i)
+    for index, rows in groups.values():
+        rows_arr = np.asarray(rows, dtype=np.int64)
+        begin = index.workday_of(project.day_of(starts[rows_arr]))
+        end_day = index.finish_day(begin, spans[rows_arr])
+        spans[rows_arr] = project.workday_of(end_day) - starts[rows_arr]
+    return spans
+
+
+def forward_spans(graph: "TaskGraph", project: CalendarIndex, own: Sequence[CalendarIndex | None]) -> np.ndarray:
+    """Spans in project workdays for ``graph.duration`` working days of each task's own calendar.
+
+    A span depends on where the task starts, so the early starts are walked
+    in topological order and each own-calendar span is fixed at its task's
+    early start. Project-calendar tasks keep their duration.
+    """
+    order = graph.topological_order().tolist()
+    ptr = graph.pred_ptr.tolist()
+    pred = graph.pred_idx.tolist()
+    spans = graph.duration.tolist()
+    finish = [0] * graph.n
+    for u in order:
+        start = max((finish[p] for p in pred[ptr[u]:ptr[u + 1]]), default=0)
+        if own[u] is not None:
+            spans[u] = int(calendar_spans(project, [own[u]], [start], [spans[u]])[0])
+        finish[u] = start + spans[u]
+    return np.asarray(spans, dtype=np.int64)
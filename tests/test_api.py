@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+from bbs_tool.main import app
+
+
+client = TestClient(app)
+
+ITEMS = [
+    {"bar_mark": "S1", "diameter_mm": 12, "shape": "STRAIGHT", "dims_mm": {"A": 3000}, "quantity": 2},
+    {"bar_mark": "L1", "diameter_mm": 12, "shape": "L_90", "dims_mm": {"A": 20, "B": 600}},
+    {"bar_mark": "X1", "diameter_mm": 10, "shape": "Z_CRANK", "dims_mm": {"A": 900}},
+]
+
+
+def test_calculate_streams_ndjson_in_item_order():
+    plain = client.post("/api/calculate", json={"items": ITEMS}).json()
+    res = client.post("/api/calculate?stream=ndjson", json={"items": ITEMS})
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert [r["type"] for r in rows] == ["result", "warning", "result", "warning"]
+    assert [{k: v for k, v in r.items() if k != "type"} for r in rows if r["type"] == "result"] == plain["results"]
+    assert [r["message"] for r in rows if r["type"] == "warning"] == plain["warnings"]
+
+
+def test_calculate_streams_csv_from_accept_header():
+    res = client.post("/api/calculate", json={"items": ITEMS}, headers={"Accept": "text/csv"})
+    assert res.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert rows[0]["bar_mark"] == "S1" and rows[0]["cutting_length_mm"] == "3000.0"
+    assert rows[-1]["type"] == "warning" and "Z_CRANK" in rows[-1]["message"]
+
+
+CSV_TEXT = "bar_mark,shape,diameter_mm,quantity,A,B\n" + "".join(
+    f'M{i},L,12,2,{1000 + i},300\n' for i in range(50)
+) + '"M,50","STRAIGHT",16,1,"2500",\n'
+
+
+def test_extract_csv_reads_in_chunks(monkeypatch):
+    monkeypatch.setattr("bbs_tool.extract.csv_stream.CSV_READ_CHUNK_SIZE", 64)
+    res = client.post("/api/extract", data={"source_type": "csv"}, files={"file": ("s.csv", CSV_TEXT.encode("utf-8-sig"))})
+    items = res.json()["items"]
+    assert len(items) == 51
+    assert items[0]["bar_mark"] == "M0" and items[0]["dims_mm"] == {"A": 1000.0, "B": 300.0}
+    assert items[-1]["bar_mark"] == "M,50"
+
+
+def test_extract_csv_only_breaks_records_at_newlines(monkeypatch):
+    monkeypatch.setattr("bbs_tool.extract.csv_stream.CSV_READ_CHUNK_SIZE", 16)
+    # cp1252 "…" read as latin-1 is U+0085, which str.splitlines treats as a line break
+    data = ("bar_mark,shape,diameter_mm,quantity,A\r\n"
+            'B\x85 1,STRAIGHT,12,1,900\r\n'
+            '"B 2\nlong\x0cnote",STRAIGHT,12,1,800\n').encode("latin-1")
+    res = client.post("/api/extract", data={"source_type": "csv"}, files={"file": ("s.csv", data)})
+    items = res.json()["items"]
+    assert [i["bar_mark"] for i in items] == ["B\x85 1", "B 2\nlong\x0cnote"]
+    assert [i["dims_mm"]["A"] for i in items] == [900.0, 800.0]
+
+
+def test_extract_calculate_pipes_csv_into_calculation():
+    res = client.post("/api/extract/calculate", files={"file": ("s.csv", CSV_TEXT.encode())})
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert len(rows) == 51 and all(r["type"] == "result" for r in rows)
+    assert rows[-1] == {"type": "result", "bar_mark": "M,50", "shape": "STRAIGHT", "diameter_mm": 16.0,
+                        "cutting_length_mm": 2500.0, "unit_weight_kg_per_m": 1.5802, "quantity": 1,
+                        "total_length_m": 2.5, "total_weight_kg": 3.951}
+    res = client.post("/api/extract/calculate", data={"config": "{bad"}, files={"file": ("s.csv", CSV_TEXT.encode())})
+    assert res.status_code == 400
+
+
+def test_extract_csv_reports_bad_rows_by_number():
+    text = "Bar Mark,Dia,qty,a,B\nK1,10,2,900,\nK2,0,1,900,\nK3,abc,1,,\n\nK4,12,1.0,x,450\n"
+    res = client.post("/api/extract", data={"source_type": "csv"}, files={"file": ("s.csv", text.encode())})
+    body = res.json()
+    assert [i["bar_mark"] for i in body["items"]] == ["K1", "K4"]
+    assert body["items"][1]["dims_mm"] == {"B": 450.0}
+    assert body["warnings"] == [
+        "row 3: diameter must be > 0, got 0",
+        "row 4: could not convert string to float: 'abc'",
+    ]
+
+
+def test_extract_pdf_is_ocrd_from_the_spooled_upload(monkeypatch, tmp_path):
+    from bbs_tool import main
+    from bbs_tool.extract.cache import ExtractionCache
+
+    seen = []
+
+    async def fake_pdf_ocr(path, pool):
+        with open(path, "rb") as f:
+            seen.append(f.read())
+        return [], {"ocr": 1.0}
+
+    monkeypatch.setattr("bbs_tool.extract.tiled_ocr.extract_from_pdf_tiled", fake_pdf_ocr)
+    monkeypatch.setattr(main, "extraction_cache", ExtractionCache(str(tmp_path)))
+    pdf = b"%PDF-1.4 " + bytes(range(256)) * 50
+    for _ in range(2):
+        res = client.post("/api/extract", data={"source_type": "pdf"}, files={"file": ("d.pdf", pdf)})
+        assert res.status_code == 200 and res.json()["warnings"] == []
+    assert seen == [pdf]  # the repeat upload is answered from the cache
+
+
+def test_extract_image_runs_in_ocr_pool_and_rejects_when_saturated(monkeypatch):
+    res = client.post("/api/extract", data={"source_type": "image"}, files={"file": ("x.png", b"not an image")})
+    body = res.json()
+    assert body["items"] == [] and body["warnings"][0].startswith("OCR extraction failed: Image preprocessing failed")
+    assert "total" in body["timings_ms"]
+
+    from bbs_tool import main
+    monkeypatch.setattr(main.ocr_pool, "in_flight", main.ocr_pool.capacity)
+    res = client.post("/api/extract", data={"source_type": "image"}, files={"file": ("x.png", b"not an image")})
+    assert res.status_code == 503 and res.headers["retry-after"] == "5"
@@ -0,0 +1,73 @@
+import csv
+import io
+import math
+import random
+
+import numpy as np
+
+from bbs_tool.models.schemas import BBSItem, BBSCalculationConfig
+from bbs_tool.calc.is2502 import calculate_cutting_length_for_item, unit_weight_kg_per_m
+from bbs_tool.calc.batch import ItemColumns, calculate_batch
+from bbs_tool.extract.csv_parser import CSVRowParser
+from bbs_tool import main
+
+
+def _items(n, seed=7):
+    rng = random.Random(seed)
+    shapes = ["STRAIGHT", "L", "L-135", "U", "STIRRUP", "STIRRUP_RECT", "Z_CRANK"]
+    items = []
+    for i in range(n):
+        dims = {"A": float(rng.randint(20, 6000)), "B": float(rng.randint(20, 1200))}
+        if i % 17 == 0:
+            dims.pop("B")
+        items.append(BBSItem(bar_mark=f"M{i}", diameter_mm=rng.choice([8, 10, 12, 16, 20, 25, 32]),
+                             shape=rng.choice(shapes), dims_mm=dims, quantity=rng.randint(1, 40)))
+    return items
+
+
+def test_batch_matches_scalar():
+    for cfg in (BBSCalculationConfig(), BBSCalculationConfig(unit_weight_formula="DENSITY_PI_R2", default_bend_radius_multiplier=4.0)):
+        items = _items(500)
+        res = calculate_batch(items, cfg)
+        for i, item in enumerate(items):
+            try:
+                exp = calculate_cutting_length_for_item(item, cfg)
+            except ValueError as ex:
+                assert not res.ok[i] and res.errors[i] == str(ex)
+                continue
+            assert res.ok[i]
+            assert res.cutting_length_mm[i] == exp
+            assert res.unit_weight_kg_per_m[i] == unit_weight_kg_per_m(item.diameter_mm, cfg)
+
+
+def test_calculate_endpoint_batch_path_matches_scalar(monkeypatch):
+    req = main.BBSCalculationRequest(items=_items(300))
+    scalar = main.calculate(req)
+    monkeypatch.setattr(main, "BATCH_CALCULATION_THRESHOLD", 10)
+    batched = main.calculate(req)
+    assert batched.results == scalar.results
+    assert batched.warnings == scalar.warnings
+
+
+def test_csv_columns_match_parsed_items():
+    text = ("Bar Mark,Shape,Dia,qty,a,B,A,C\n"
+            "K1,l,10,2,900,,,\n"
+            "K2,STRAIGHT,0,1,900,,,\n"
+            "K3,U,abc,1,,,,\n"
+            "\n"
+            "K4,u,12,1.0,x,450,300,nan\n"
+            "K5,STIRRUP,8,0,100,100\n"
+            "K6,stirrup,8,,100,100,,,extra\n")
+    records = list(csv.reader(io.StringIO(text)))
+    parser = CSVRowParser(records[0])
+    item_errors, column_errors = [], []
+    expected = ItemColumns.from_items(parser.parse(records[1:], 2, item_errors))
+    columns = parser.parse_columns(records[1:], 2, column_errors)
+    assert column_errors == item_errors and len(item_errors) == 3
+    assert columns.bar_marks == expected.bar_marks == ["K1", "K4", "K6"]
+    assert columns.shapes == expected.shapes
+    assert columns.normalized_shapes.tolist() == expected.normalized_shapes.tolist()
+    for name in ("diameter_mm", "quantity", "dims_present", "extra_dims"):
+        assert np.array_equal(getattr(columns, name), getattr(expected, name))
+    assert np.array_equal(columns.dims_mm, expected.dims_mm, equal_nan=True)
+    assert columns.has_dim("C")[1] and math.isnan(columns.dim("C")[1])
@@ -0,0 +1,44 @@
+import io
+
+from bbs_tool.extract.cache import _ITEMS, ExtractionCache, cache_key, content_digest, copy_with_digest, file_digest
+from bbs_tool.models.schemas import BBSItem
+
+
+def _items(mark):
+    return [BBSItem(bar_mark=mark, diameter_mm=12, shape="L_90", dims_mm={"A": 500, "B": 600}, quantity=3)]
+
+
+def test_cache_key_depends_on_bytes_and_params():
+    x, y = content_digest(b"x"), content_digest(b"y")
+    assert cache_key(x, {"dpi": 300}) == cache_key(x, {"dpi": 300})
+    assert cache_key(x, {"dpi": 300}) != cache_key(x, {"dpi": 200})
+    assert cache_key(x, {"dpi": 300}) != cache_key(y, {"dpi": 300})
+
+
+def test_copy_with_digest_hashes_what_it_copies(tmp_path):
+    data = bytes(range(256)) * 1000
+    path = tmp_path / "upload.pdf"
+    with open(path, "wb") as f:
+        digest = copy_with_digest(io.BytesIO(data), f, chunk_size=4096)
+    assert path.read_bytes() == data
+    assert digest == content_digest(data) == file_digest(str(path))
+
+
+def test_cache_round_trip_and_lru_eviction(tmp_path):
+    entry_size = len(_ITEMS.dump_json(_items("K0")))
+    cache = ExtractionCache(str(tmp_path), max_bytes=entry_size * 2 + 10)
+    assert cache.get("a") is None
+    cache.put("a", _items("K1"))
+    cache.put("b", _items("K2"))
+    assert cache.get("a") == _items("K1")
+    cache.put("c", _items("K3"))  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == _items("K3")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (2, 2, 1, 2)
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = ExtractionCache(str(tmp_path), max_bytes=0)
+    cache.put("a", _items("K1"))
+    assert cache.get("a") is None and not (tmp_path / "extract_cache.sqlite3").exists()
@@ -1,5 +1,11 @@
 from bbs_tool.models.schemas import BBSItem, BBSCalculationConfig
-from bbs_tool.calc.is2502 import calculate_cutting_length_for_item, unit_weight_kg_per_m, bend_allowance_mm
+from bbs_tool.calc.is2502 import (
+    allowance_table,
+    bend_allowance_mm,
+    calculate_cutting_length_for_item,
+    hook_extension_mm,
+    unit_weight_kg_per_m,
+)
 
 
 def test_unit_weight_formula_default():
@@ -27,4 +33,15 @@ def test_rect_stirrup():
     item = BBSItem(bar_mark="ST1", diameter_mm=8, shape="STIRRUP_RECT", dims_mm={"A": 200, "B": 300}, quantity=5)
     cl = calculate_cutting_length_for_item(item, cfg)
     exp = 2*(200+300) + 4*bend_allowance_mm(90, 8, cfg)
-    assert round(cl, 3) == round(exp, 3)
\ No newline at end of file
+    assert round(cl, 3) == round(exp, 3)
+
+
+def test_allowance_table_matches_direct_formulas():
+    cfg = BBSCalculationConfig(default_bend_radius_multiplier=4.0, unit_weight_formula="DENSITY_PI_R2")
+    item = BBSItem(bar_mark="U1", diameter_mm=14, shape="U", dims_mm={"A": 450, "B": 380}, quantity=1)
+    exp = 450 + 380 + 2 * bend_allowance_mm(135, 14, cfg) + 2 * hook_extension_mm(135, 14, cfg)
+    assert calculate_cutting_length_for_item(item, cfg) == exp
+    table = allowance_table(cfg)
+    assert table is allowance_table(cfg.model_copy())
+    assert table.unit_weight(14) == unit_weight_kg_per_m(14, cfg)
+    assert allowance_table(BBSCalculationConfig()) is not table
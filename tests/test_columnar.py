@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from bbs_tool.main import app
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+client = TestClient(app)
+
+ITEMS = [
+    {"bar_mark": "S1", "diameter_mm": 12, "shape": "STRAIGHT", "dims_mm": {"A": 3000}, "quantity": 2},
+    {"bar_mark": "L1", "diameter_mm": 12, "shape": "L_90", "dims_mm": {"A": 20, "B": 600}},
+    {"bar_mark": "X1", "diameter_mm": 10, "shape": "Z_CRANK", "dims_mm": {"A": 900}},
+    {"bar_mark": "U1", "diameter_mm": 16, "shape": "u", "dims_mm": {"A": 400, "B": 700}, "quantity": 5},
+    {"bar_mark": "L1", "diameter_mm": 12, "shape": "L90", "dims_mm": {"A": 500, "B": 600}},
+]
+
+
+def _table(items):
+    columns = {
+        "bar_mark": [i["bar_mark"] for i in items],
+        "shape": [i["shape"] for i in items],
+        "diameter_mm": [float(i["diameter_mm"]) for i in items],
+        "quantity": [i.get("quantity", 1) for i in items],
+    }
+    for label in "ABCDEF":
+        columns[label] = pa.array([i["dims_mm"].get(label) for i in items], pa.float64())
+    return pa.table(columns)
+
+
+def _arrow_bytes(table):
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _post(body, content_type, accept=None):
+    headers = {"Content-Type": content_type}
+    if accept:
+        headers["Accept"] = accept
+    return client.post("/api/calculate/columnar", content=body, headers=headers)
+
+
+def test_arrow_results_match_json_endpoint():
+    plain = client.post("/api/calculate", json={"items": ITEMS}).json()
+    res = _post(_arrow_bytes(_table(ITEMS)), "application/vnd.apache.arrow.stream")
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(res.content).read_all()
+    assert table.to_pylist() == plain["results"]
+    assert json.loads(table.schema.metadata[b"warnings"]) == plain["warnings"]
+
+
+def test_parquet_in_arrow_out_and_rejected_rows():
+    items = ITEMS + [{"bar_mark": "BAD", "diameter_mm": 0, "shape": "STRAIGHT", "dims_mm": {"A": 100}}]
+    sink = pa.BufferOutputStream()
+    pq.write_table(_table(items), sink)
+    res = _post(sink.getvalue().to_pybytes(), "application/vnd.apache.parquet",
+                accept="application/vnd.apache.arrow.stream")
+    assert res.status_code == 200
+    table = pa.ipc.open_stream(res.content).read_all()
+    assert table.column("bar_mark").to_pylist() == ["S1", "L1", "U1", "L1"]
+    warnings = json.loads(table.schema.metadata[b"warnings"])
+    assert warnings[0] == "row 6: diameter_mm: Input should be greater than 0"
+
+    parquet = _post(sink.getvalue().to_pybytes(), "application/vnd.apache.parquet")
+    assert parquet.headers["content-type"] == "application/vnd.apache.parquet"
+    assert pq.read_table(pa.BufferReader(parquet.content)).equals(table)
+
+
+def test_bad_bodies():
+    assert _post(b"{}", "application/json").status_code == 415
+    assert _post(b"not arrow", "application/vnd.apache.arrow.stream").status_code == 422
+    no_shape = _table(ITEMS).drop_columns(["shape"])
+    res = _post(_arrow_bytes(no_shape), "application/vnd.apache.arrow.stream")
+    assert res.status_code == 422 and "shape" in res.json()["detail"]
+    res = client.post("/api/calculate/columnar", params={"config": "{bad"}, content=_arrow_bytes(_table(ITEMS)),
+                      headers={"Content-Type": "application/vnd.apache.arrow.stream"})
+    assert res.status_code == 422
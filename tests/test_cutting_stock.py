@@ -0,0 +1,82 @@
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from bbs_tool.calc.cutting_stock import optimize_cutting, plan_diameter
+from bbs_tool.main import app
+from bbs_tool.models.schemas import BBSCalculationConfig, BBSItem, CuttingStockConfig
+
+
+def _check_plan(plan, lengths, counts, stock):
+    cut = dict.fromkeys(lengths.tolist(), 0)
+    for pattern in plan.patterns:
+        pieces = sum(count for _, count in pattern.cuts)
+        used = sum(length * count for length, count in pattern.cuts)
+        assert used + stock.kerf_mm * (pieces - 1) <= stock.stock_length_mm
+        assert pattern.offcut_mm >= 0
+        for length, count in pattern.cuts:
+            cut[length] += count * pattern.bars
+    assert cut == dict(zip(lengths.tolist(), counts.tolist()))
+    assert plan.bars == sum(p.bars for p in plan.patterns) >= plan.lower_bound
+
+
+def test_exact_fit_has_no_wastage():
+    stock = CuttingStockConfig()
+    lengths, counts = np.array([6000, 4000]), np.array([2, 3])
+    plan = plan_diameter(12.0, lengths, counts, stock, budget_s=0)
+    _check_plan(plan, lengths, counts, stock)
+    assert plan.bars == 2 and plan.wastage_pct == 0.0
+
+
+def test_dp_improves_on_first_fit_decreasing():
+    stock = CuttingStockConfig()
+    lengths, counts = np.array([6837, 4597, 4535, 4531, 3452]), np.array([1, 4, 1, 2, 4])
+    ffd = plan_diameter(16.0, lengths, counts, stock, budget_s=0)
+    improved = plan_diameter(16.0, lengths, counts, stock, budget_s=0.5)
+    assert (ffd.bars, improved.bars, improved.method) == (6, 5, "dp")
+    _check_plan(improved, lengths, counts, stock)
+
+
+def test_kerf_is_charged_between_cuts():
+    stock = CuttingStockConfig(kerf_mm=5)
+    lengths, counts = np.array([4000]), np.array([3])
+    plan = plan_diameter(10.0, lengths, counts, stock, budget_s=0)
+    # 3 x 4000 plus two 5 mm cuts does not fit in 12 m
+    assert plan.bars == 2
+    _check_plan(plan, lengths, counts, stock)
+
+
+def test_large_quantities_are_planned_from_aggregated_counts():
+    rng = np.random.default_rng(4)
+    items = [
+        BBSItem(bar_mark=f"M{i}", diameter_mm=float(rng.choice([12, 16])), shape="STRAIGHT",
+                dims_mm={"A": float(rng.integers(500, 9000))}, quantity=int(rng.integers(500, 5000)))
+        for i in range(300)
+    ]
+    items.append(BBSItem(bar_mark="LONG", diameter_mm=12, shape="STRAIGHT", dims_mm={"A": 14000}))
+    stock = CuttingStockConfig(time_budget_s=0.5)
+    started = time.perf_counter()
+    plans, warnings = optimize_cutting(items, BBSCalculationConfig(), stock)
+    assert time.perf_counter() - started < 10
+    assert [p.diameter_mm for p in plans] == [12.0, 16.0]
+    assert sum(p.pieces for p in plans) == sum(item.quantity for item in items) - 1
+    assert min(p.pieces for p in plans) > 100_000
+    assert len(warnings) == 1 and warnings[0].startswith("LONG:")
+    for plan in plans:
+        assert plan.wastage_pct < 10
+
+
+def test_cutting_plan_endpoint():
+    client = TestClient(app)
+    items = [
+        {"bar_mark": "S1", "diameter_mm": 12, "shape": "STRAIGHT", "dims_mm": {"A": 6000}, "quantity": 2},
+        {"bar_mark": "S2", "diameter_mm": 12, "shape": "STRAIGHT", "dims_mm": {"A": 4000}, "quantity": 3},
+        {"bar_mark": "X1", "diameter_mm": 10, "shape": "Z_CRANK", "dims_mm": {"A": 900}},
+    ]
+    res = client.post("/api/cutting-plan", json={"items": items, "stock": {"time_budget_s": 0.1}}).json()
+    assert res["stock_bars"] == 2 and res["wastage_pct"] == 0.0
+    assert res["plans"][0]["patterns"][0]["cuts"][0] == {"length_mm": 6000, "count": 2}
+    assert res["warnings"] == ["Calculation failed for X1: Unsupported shape: Z_CRANK"]
+    for stock in ({"stock_length_mm": 30000}, {"time_budget_s": 60}):
+        assert client.post("/api/cutting-plan", json={"items": items, "stock": stock}).status_code == 422
@@ -0,0 +1,62 @@
+import json
+
+from construction_scheduler.dpr_parser import iter_dpr_chunks, load_dpr
+from construction_scheduler.dpr_store import DPRStore
+
+
+def test_chunks_have_fixed_dtypes(tmp_path):
+    path = tmp_path / "dpr.csv"
+    path.write_text("date,activity,progress,remarks\n" + "".join(
+        f"2025-08-{d:02d},A{d % 3},{d * 3},x\n" for d in range(1, 11)
+    ))
+    chunks = list(iter_dpr_chunks(path, chunk_rows=4))
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    assert list(chunks[0].columns) == ["date", "activity", "progress"]
+    assert str(chunks[0]["activity"].dtype) == "category"
+    assert str(chunks[0]["date"].dtype) == "datetime64[ns]" and chunks[0]["progress"].dtype == "float64"
+    assert len(load_dpr(path)) == 10
+
+
+def test_ndjson_is_read_line_by_line(tmp_path):
+    path = tmp_path / "dpr.ndjson"
+    lines = [json.dumps({"date": f"2025-08-1{i}", "activity": "A", "progress": i}) + "\n" for i in range(4)]
+    path.write_text("".join(lines))
+    assert load_dpr(path)["progress"].tolist() == [0, 1, 2, 3]
+    start = len(lines[0]) + len(lines[1])
+    assert [len(c) for c in iter_dpr_chunks(path, chunk_rows=1, start=start)] == [1, 1]
+    assert [len(c) for c in iter_dpr_chunks(path, start=start, end=start + len(lines[2]))] == [1]
+
+
+def test_store_ingests_only_new_rows_and_answers_as_of(tmp_path):
+    path = tmp_path / "dpr.csv"
+    path.write_text("date,activity,progress\n2025-08-01,EXC,20\n2025-08-02,EXC,45\n2025-08-02,FTG,5\n")
+    store = DPRStore(tmp_path / "history.sqlite3")
+    assert store.ingest(path) == 3
+    assert store.ingest(path) == 0
+
+    with path.open("a") as f:
+        f.write("2025-08-03,EXC,70\n2025-08-03,EXC,75\n")
+    assert store.ingest(path) == 2 and store.row_count() == 5
+
+    latest = store.latest_progress()
+    assert latest["activity"].tolist() == ["EXC", "FTG"]
+    assert latest["progress"].tolist() == [75.0, 5.0]  # last ingested wins on the same date
+    as_of = store.latest_progress("2025-08-01")
+    assert as_of["activity"].tolist() == ["EXC"] and as_of["progress"].tolist() == [20.0]
+
+
+def test_store_reads_appended_bytes_and_reingests_edited_files(tmp_path):
+    path = tmp_path / "dpr.csv"
+    # A quoted remark spanning lines must not throw off where the next read starts
+    path.write_text('date,activity,remarks,progress\n2025-08-01,EXC,"rain,\nstopped",20\n2025-08-02,EXC,ok,45')
+    store = DPRStore(tmp_path / "history.sqlite3")
+    assert store.ingest(path) == 1  # the last line has no newline yet
+
+    with path.open("a") as f:
+        f.write('\n2025-08-03,FTG,"two\nlines",5\n')
+    assert store.ingest(path) == 2 and store.row_count() == 3
+    assert store.latest_progress()["progress"].tolist() == [45.0, 5.0]
+
+    path.write_text(path.read_text().replace("2025-08-01,EXC", "2025-08-01,COL"))
+    assert store.ingest(path) == 3 and store.row_count() == 3
+    assert store.latest_progress()["activity"].tolist() == ["COL", "EXC", "FTG"]
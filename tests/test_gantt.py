@@ -0,0 +1,37 @@
+import re
+
+import pandas as pd
+
+from construction_scheduler.output import save_gantt
+
+
+def _df(n):
+    start = pd.Timestamp("2026-01-05") + pd.to_timedelta([i % 40 for i in range(n)], unit="D")
+    return pd.DataFrame({
+        "task_id": [f"T{i}" for i in range(n)],
+        "name": [f"Task <{i}>" for i in range(n)],
+        "start": start,
+        "end": start + pd.Timedelta(days=3),
+        "critical": [i % 5 == 0 for i in range(n)],
+    })
+
+
+def test_svg_and_html_have_one_bar_per_task(tmp_path):
+    save_gantt(_df(250), tmp_path / "g.svg")
+    svg = (tmp_path / "g.svg").read_text()
+    assert svg.startswith("<svg") and svg.count("<rect") == 250
+    assert "Task &lt;7&gt;" in svg and svg.count('fill="#c44e52"') == 50
+
+    save_gantt(_df(3), tmp_path / "g.html")
+    assert (tmp_path / "g.html").read_text().startswith("<!doctype html>")
+
+
+def test_pdf_is_paginated(tmp_path):
+    save_gantt(_df(25), tmp_path / "g.pdf", rows_per_page=10)
+    pdf = (tmp_path / "g.pdf").read_bytes()
+    assert len(re.findall(rb"/Type\s*/Page\b", pdf)) == 3
+
+
+def test_png_with_many_rows(tmp_path):
+    save_gantt(_df(3000), tmp_path / "g.png")
+    assert (tmp_path / "g.png").stat().st_size > 0
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from construction_scheduler.graph import TaskGraph
+from construction_scheduler.incremental import ScheduleState
+from construction_scheduler.schedule import Schedule, Task
+
+
+def test_incremental_update_matches_full_recompute():
+    rng = np.random.default_rng(7)
+    n, m = 2000, 6000
+    src = rng.integers(0, n - 1, m)
+    dst = np.minimum(src + rng.integers(1, 50, m), n - 1)
+    durations = rng.integers(1, 10, n)
+    ids = [f"T{i}" for i in range(n)]
+    state = ScheduleState(TaskGraph(ids, durations, src, dst))
+    for _ in range(3):
+        changed = rng.choice(n, 40, replace=False)
+        durations[changed] = rng.integers(1, 15, 40)
+        state.update({int(i): (None, int(durations[i])) for i in changed})
+        got = state.result()
+        want = TaskGraph(ids, durations, src, dst).analyse()
+        for field in ("early_start", "early_finish", "late_start", "late_finish", "total_float", "free_float"):
+            assert getattr(got, field).tolist() == getattr(want, field).tolist(), field
+
+
+def _schedule():
+    tasks = {
+        "EXC": Task("EXC", "Excavation", 10),
+        "FTG": Task("FTG", "Footings", 7, ["EXC"]),
+        "COL": Task("COL", "Columns", 14, ["FTG"]),
+        "SITE": Task("SITE", "Site works", 5),
+    }
+    sched = Schedule(tasks)
+    sched._compute_baseline()
+    return sched
+
+
+def test_apply_progress_reschedules_only_affected_tasks():
+    sched = _schedule()
+    start = sched.start_date
+    dpr = pd.DataFrame({
+        "date": [start + timedelta(days=5), start + timedelta(days=8)],
+        "activity": ["EXC", "EXC"],
+        "progress": [50, 40],  # latest report wins: 6 days left on day 8
+    })
+    moved = sched.apply_progress(dpr)
+    assert moved == ["EXC", "FTG", "COL"]
+    assert sched.tasks["EXC"].planned_end == start + timedelta(days=14)
+    assert sched.tasks["COL"].planned_end == start + timedelta(days=35)
+    assert sched.tasks["SITE"].planned_end == start + timedelta(days=5)
+
+    df = sched.to_dataframe().set_index("task_id")
+    assert df.loc["EXC", "progress_pct"] == 40
+    assert df.loc["SITE", "total_float_days"] == 30 and bool(df.loc["COL", "critical"])
+
+
+def test_apply_progress_on_plan_moves_nothing():
+    sched = _schedule()
+    dpr = pd.DataFrame({"date": [sched.start_date + timedelta(days=5)], "activity": ["EXC"], "progress": [50]})
+    assert sched.apply_progress(dpr) == []
+
+
+def test_pinned_start_before_predecessor_finish_gives_negative_float():
+    sched = _schedule()
+    # Footings reported started on day 3, a week before excavation finishes
+    dpr = pd.DataFrame({"date": [sched.start_date + timedelta(days=3)], "activity": ["FTG"], "progress": [10]})
+    sched.apply_progress(dpr)
+    df = sched.to_dataframe().set_index("task_id")
+    assert df.loc["EXC", "total_float_days"] == -7 and bool(df.loc["EXC", "critical"])
+    assert not df.loc["SITE", "critical"]
+    assert sched.critical_path() == ["EXC", "FTG", "COL"]
+
+
+def test_critical_path_walks_back_from_a_pinned_end_task():
+    tasks = {
+        "U": Task("U", "Rebar", 4),
+        "W": Task("W", "Formwork", 10),
+        "V": Task("V", "Pour", 5, ["U", "W"]),
+        "X": Task("X", "Cure", 20, ["V"]),
+    }
+    sched = Schedule(tasks, start_date=datetime(2026, 1, 1))
+    sched._compute_baseline()
+    # Curing reported under way on day 2, long before the pour it waits on is done
+    dpr = pd.DataFrame({"date": [datetime(2026, 1, 3)], "activity": ["X"], "progress": [5]})
+    sched.apply_progress(dpr)
+    assert sched.critical_path() == ["W", "V", "X"]
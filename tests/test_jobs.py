@@ -0,0 +1,113 @@
+import io
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from bbs_tool.app import main as upload_app
+from bbs_tool.main import app, job_runner
+from bbs_tool.jobs.runner import JobRunner
+from bbs_tool.jobs.store import JobStore
+from bbs_tool.models.schemas import BBSCalculationConfig
+
+
+client = TestClient(app)
+
+CSV_TEXT = "bar_mark,shape,diameter_mm,quantity,A,B\n" + "".join(
+    f"M{i},L,12,2,{1000 + i},300\n" for i in range(30)
+) + "BAD,STRAIGHT,0,1,100,\n"
+
+
+def _wait(c, url):
+    for _ in range(200):
+        body = c.get(url).json()
+        if body["status"] in ("succeeded", "failed"):
+            return body
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def test_generate_job_runs_csv_to_results():
+    res = client.post("/api/generate", data={"source_type": "csv"}, files={"file": ("s.csv", CSV_TEXT.encode())})
+    assert res.status_code == 202
+    job = res.json()
+    assert res.headers["location"] == job["status_url"] == f"/api/jobs/{job['job_id']}"
+
+    status = _wait(client, job["status_url"])
+    assert status["status"] == "succeeded" and status["progress"] == 1.0
+    assert (status["items"], status["results"], status["warnings"]) == (30, 30, 1)
+
+    streamed = client.post("/api/extract/calculate", files={"file": ("s.csv", CSV_TEXT.encode())}).text
+    assert client.get(job["result_url"] + "?format=ndjson").text == streamed
+    body = client.get(job["result_url"]).json()
+    assert body["complete"] and len(body["results"]) == 30
+    assert body["warnings"] == ["row 32: diameter must be > 0, got 0"]
+    assert client.get(job["result_url"] + "?format=csv").text.startswith("type,bar_mark,")
+
+
+def test_generate_reports_queue_and_rejects_when_full(monkeypatch):
+    stats = client.get("/api/jobs").json()
+    assert {"workers", "queue_depth", "running", "queued", "jobs"} <= set(stats)
+    monkeypatch.setattr(job_runner, "in_flight", job_runner.capacity)
+    res = client.post("/api/generate", data={"source_type": "csv"}, files={"file": ("s.csv", b"a\n")})
+    assert res.status_code == 503 and res.headers["retry-after"] == "30"
+    monkeypatch.undo()
+    assert client.post("/api/generate", data={"source_type": "dwg"}, files={"file": ("s.dwg", b"")}).status_code == 400
+    assert client.get("/api/jobs/unknown").status_code == 404
+
+
+def test_failed_drawing_job_records_error():
+    res = client.post("/api/generate", data={"source_type": "image"}, files={"file": ("x.png", b"not an image")})
+    status = _wait(client, res.json()["status_url"])
+    assert status["status"] == "failed" and "Image preprocessing failed" in status["error"]
+
+
+def test_job_that_cannot_start_or_queue_releases_its_slot(monkeypatch, tmp_path):
+    store = JobStore(str(tmp_path), ttl_s=60)
+    runner = JobRunner(store, pool=None, cache=None, workers=1, queue_depth=0)
+
+    class BrokenUpload:
+        def read(self, size=-1):
+            raise OSError("client went away")
+
+    with pytest.raises(OSError, match="went away"):
+        runner.submit("csv", "s.csv", BrokenUpload())
+    assert runner.in_flight == 0 and store.counts()["queued"] == 0 and not any(tmp_path.iterdir())
+
+    def broken_writer(job):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("bbs_tool.jobs.runner.ResultWriter", broken_writer)
+    job = runner.submit("csv", "s.csv", io.BytesIO(CSV_TEXT.encode()))
+    runner.shutdown()
+    assert job.status == "failed" and job.error == "disk full" and job.finished_at is not None
+    assert runner.in_flight == 0
+
+
+def test_upload_drawing_queues_job():
+    c = TestClient(upload_app.app)
+    res = c.post("/upload-drawing", files={"file": ("s.csv", CSV_TEXT.encode(), "text/csv")})
+    assert res.status_code == 202 and res.json()["source_type"] == "csv"
+    assert _wait(c, res.json()["status_url"])["results"] == 30
+
+
+def test_store_purges_finished_jobs_after_ttl(tmp_path):
+    store = JobStore(str(tmp_path), ttl_s=60)
+    job = store.create("csv", "s.csv", BBSCalculationConfig())
+    assert store.purge_expired(now=time.time() + 120) == 0  # still running
+    job.finished_at = time.time()
+    assert store.purge_expired(now=time.time() + 120) == 1
+    assert store.get(job.id) is None and not job.directory.exists()
+
+
+def test_startup_cleanup_only_removes_finished_job_dirs(tmp_path):
+    old = JobStore(str(tmp_path), ttl_s=60)
+    running = old.create("csv", "a.csv", BBSCalculationConfig())
+    finished = old.create("csv", "b.csv", BBSCalculationConfig())
+    old.finish(finished)
+
+    store = JobStore(str(tmp_path), ttl_s=60)
+    assert running.directory.exists() and finished.directory.exists()  # nothing removed at construction
+    assert store.remove_stale_dirs() == 0  # finished too recently
+    assert store.remove_stale_dirs(now=time.time() + 120) == 1
+    assert running.directory.exists() and not finished.directory.exists()
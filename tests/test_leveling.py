@@ -0,0 +1,103 @@
+import time
+
+import numpy as np
+import pytest
+
+from construction_scheduler.graph import TaskGraph
+from construction_scheduler.leveling import level_resources
+from construction_scheduler.schedule import Schedule
+
+TASKS_YAML = """
+resources:
+  crane: 1
+  formwork_crew: 2
+tasks:
+  - {task_id: EXC, name: Excavation, duration_days: 4}
+  - {task_id: F1, name: Footing 1, duration_days: 3, dependencies: [EXC], resources: {formwork_crew: 2}}
+  - {task_id: F2, name: Footing 2, duration_days: 2, dependencies: [EXC], resources: {formwork_crew: 1}}
+  - {task_id: C1, name: Column lift 1, duration_days: 5, dependencies: [F1], resources: {crane: 1}}
+  - {task_id: C2, name: Column lift 2, duration_days: 1, dependencies: [F2], resources: {crane: 1}}
+"""
+
+
+def _check_feasible(graph, demands, capacities, starts):
+    finish = starts + graph.duration
+    for i in range(graph.n):
+        for p in graph.pred_idx[graph.pred_ptr[i]:graph.pred_ptr[i + 1]]:
+            assert starts[i] >= finish[p]
+    horizon = int(finish.max()) if graph.n else 0
+    for name, cap in capacities.items():
+        usage = np.zeros(horizon + 1, dtype=np.int64)
+        for i, demand in enumerate(demands):
+            usage[starts[i]:finish[i]] += demand.get(name, 0)
+        assert usage.max() <= cap, name
+
+
+def test_leveled_schedule_from_yaml(tmp_path):
+    path = tmp_path / "tasks.yaml"
+    path.write_text(TASKS_YAML)
+    asap = Schedule.from_yaml(path)
+    leveled = Schedule.from_yaml(path, mode="leveled")
+
+    records = {r["task_id"]: r for r in leveled.to_records()}
+    day = lambda tid: (records[tid]["start"] - leveled.start_date).days
+    # F1 and F2 would share the two formwork crews; F1 has less float and goes first
+    assert (day("F1"), day("F2")) == (4, 7)
+    # The crane is busy with C1 (days 7-11) when C2 becomes ready on day 9
+    assert (day("C1"), day("C2")) == (7, 12)
+    assert records["C2"]["resource_delay_days"] == 6
+    assert "resource_delay_days" not in asap.to_records()[0]
+    assert leveled.to_dataframe()["resource_delay_days"].tolist() == [0, 0, 3, 0, 6]
+
+
+def test_leveled_progress_releases_resources(tmp_path):
+    import pandas as pd
+
+    path = tmp_path / "tasks.yaml"
+    path.write_text(TASKS_YAML)
+    sched = Schedule.from_yaml(path, mode="leveled")
+    # C1 finishes early, on day 9: the crane is free for C2 straight away
+    report = sched.start_date + pd.Timedelta(days=9)
+    moved = sched.apply_progress(pd.DataFrame({"date": [report], "activity": ["C1"], "progress": [100.0]}))
+    assert moved == ["C1", "C2"]
+    assert (sched.tasks["C2"].planned_start - sched.start_date).days == 9
+
+
+def test_undeclared_or_oversized_resources_are_rejected():
+    graph = TaskGraph(["A"], [2], [], [])
+    with pytest.raises(ValueError, match="undeclared"):
+        level_resources(graph, [{"crane": 1}], {})
+    with pytest.raises(ValueError, match="only 1"):
+        level_resources(graph, [{"crane": 2}], {"crane": 1})
+    with pytest.raises(ValueError, match="priority"):
+        level_resources(graph, [{}], {}, priority="random")
+
+
+def test_large_leveling_is_feasible_and_fast():
+    rng = np.random.default_rng(3)
+    n, m, r = 20_000, 60_000, 30
+    src = rng.integers(0, n - 1, m)
+    dst = np.minimum(src + rng.integers(1, 200, m), n - 1)
+    graph = TaskGraph([f"T{i}" for i in range(n)], rng.integers(1, 15, n), src, dst)
+    capacities = {f"R{k}": int(c) for k, c in enumerate(rng.integers(2, 8, r))}
+    demands = [
+        {f"R{k}": int(rng.integers(1, 3)) for k in rng.choice(r, rng.integers(0, 3), replace=False)}
+        for _ in range(n)
+    ]
+    started = time.perf_counter()
+    starts = level_resources(graph, demands, capacities)
+    elapsed = time.perf_counter() - started
+    _check_feasible(graph, demands, capacities, starts)
+    assert elapsed < 10.0
+
+
+def test_started_tasks_book_first_even_before_day_zero():
+    # A started two days before the project start; B would otherwise take the crane first
+    graph = TaskGraph(["A", "B", "C"], [4, 3, 2], [], [])
+    demands = [{"crane": 1}, {"crane": 1}, {}]
+    starts = level_resources(graph, demands, {"crane": 1}, priority="duration", fixed_starts={0: -2})
+    assert starts.tolist() == [-2, 2, 0]
+    assert level_resources(graph, demands, {"crane": 1}, priority="duration", fixed_starts={2: 5}).tolist() == [3, 0, 5]
+
+    with pytest.raises(ValueError, match="need more crane than the 1 that exist on day -1"):
+        level_resources(graph, demands, {"crane": 1}, fixed_starts={0: -2, 1: -1})
@@ -0,0 +1,71 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from bbs_tool import metrics
+from bbs_tool.app.main import app as upload_app
+from bbs_tool.main import app
+
+
+client = TestClient(app)
+
+ITEMS = [
+    {"bar_mark": "S1", "diameter_mm": 12, "shape": "STRAIGHT", "dims_mm": {"A": 3000}, "quantity": 2},
+    {"bar_mark": "L1", "diameter_mm": 12, "shape": "L_90", "dims_mm": {"A": 600, "B": 400}},
+]
+
+
+def test_requests_are_labelled_by_route_template():
+    before = metrics.HTTP_REQUESTS.value("api", "POST", "/api/calculate", "200")
+    calculated = metrics.ITEMS.value("calculated")
+    res = client.post("/api/calculate", json={"items": ITEMS})
+    assert res.status_code == 200
+    assert metrics.HTTP_REQUESTS.value("api", "POST", "/api/calculate", "200") == before + 1
+    assert metrics.ITEMS.value("calculated") == calculated + 2
+    assert metrics.HTTP_RESPONSE_BYTES.value("api", "/api/calculate") >= len(res.content)
+
+    client.get("/api/jobs/does-not-exist")
+    assert metrics.HTTP_LATENCY.count("api", "GET", "/api/jobs/{job_id}") >= 1
+    client.get("/no/such/path")
+    assert metrics.HTTP_REQUESTS.value("api", "GET", "unmatched", "404") >= 1
+
+
+def test_metrics_endpoint_renders_prometheus_text():
+    client.post("/api/calculate?stream=ndjson", json={"items": ITEMS})
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    text = res.text
+    assert "# TYPE bbs_http_request_duration_seconds histogram" in text
+    assert 'bbs_stage_duration_seconds_count{stage="calculate.serialize"}' in text
+    assert 'bbs_stage_duration_seconds_count{stage="calculate.records"}' in text
+    assert 'bbs_http_request_duration_seconds_bucket{app="api",method="POST",route="/api/calculate",le="+Inf"}' in text
+
+    assert TestClient(upload_app).get("/metrics").status_code == 200
+    assert metrics.HTTP_REQUESTS.value("app", "GET", "/metrics", "200") >= 1
+
+
+def test_histogram_buckets_are_cumulative():
+    h = metrics.Histogram("test_histogram_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    metrics.REGISTRY.remove(h)
+    for v in (0.05, 0.5, 0.5, 5.0):
+        h.observe(v, "x")
+    lines = h.render()
+    assert 'test_histogram_seconds_bucket{stage="x",le="0.1"} 1' in lines
+    assert 'test_histogram_seconds_bucket{stage="x",le="1"} 3' in lines
+    assert 'test_histogram_seconds_bucket{stage="x",le="+Inf"} 4' in lines
+    assert 'test_histogram_seconds_count{stage="x"} 4' in lines
+
+
+def test_slow_request_profiler_writes_collapsed_stacks(tmp_path):
+    profiler = metrics.SlowRequestProfiler(slow_ms=10, sample_rate=1.0, interval_ms=1, out_dir=tmp_path)
+    sampler = profiler.start()
+    time.sleep(0.05)
+    path = profiler.finish(sampler, 0.05, "POST", "/api/calculate")
+    assert path is not None and path.parent == tmp_path
+    line = path.read_text().splitlines()[0]
+    stack, count = line.rsplit(" ", 1)
+    assert int(count) >= 1 and ";" in stack
+
+    fast = profiler.start()
+    assert profiler.finish(fast, 0.001, "GET", "/health") is None
@@ -0,0 +1,63 @@
+import types
+
+import numpy as np
+
+from bbs_tool.extract import tess_engine
+from bbs_tool.extract.ocr_extractor import ocr_lines, parse_ocr_table
+from bbs_tool.extract.tess_engine import parse_tsv, recognize
+
+HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+ROWS = [
+    "1\t1\t0\t0\t0\t0\t0\t0\t800\t600\t-1\t",
+    "5\t1\t1\t1\t2\t1\t10\t60\t40\t20\t91.5\tB2",
+    "5\t1\t1\t1\t2\t2\t60\t60\t30\t20\t88\t16",
+    "5\t1\t1\t1\t1\t1\t10\t20\t40\t20\t95\tB1",
+    "5\t1\t1\t1\t1\t2\t60\t20\t30\t20\t12\tnoise",
+    "5\t1\t1\t1\t1\t3\t100\t20\t30\t20\t93\t12",
+    "5\t1\t1\t1\t1\t4\t140\t20\t60\t20\t90\tA=1200",
+    "5\t1\t1\t1\t1\t5\t200\t20\t30\t20\t95\t ",
+]
+
+
+def test_parse_tsv_with_and_without_header():
+    words = parse_tsv("\n".join([HEADER] + ROWS))
+    assert len(words) == 7
+    assert words.text.tolist()[:2] == ["B2", "16"]
+    assert words.line.tolist()[:3] == [2, 2, 1]
+    assert words.conf[0] == 91.5 and words.left.dtype == np.int64
+    assert parse_tsv("\n".join(ROWS)).text.tolist() == words.text.tolist()
+    assert len(parse_tsv(HEADER)) == 0
+
+
+def test_ocr_lines_groups_by_tesseract_line():
+    words = parse_tsv("\n".join([HEADER] + ROWS))
+    assert ocr_lines(words) == ["B1 12 A=1200", "B2 16"]
+    items = parse_ocr_table(parse_tsv("\n".join(ROWS + ["5\t1\t1\t1\t1\t6\t240\t20\t40\t20\t90\tQTY=4"])))
+    assert [(i.bar_mark, i.diameter_mm, i.dims_mm["A"], i.quantity) for i in items] == [("B1", 12.0, 1200.0, 4)]
+
+
+def test_tesserocr_engine_is_created_once_and_fed_buffers(monkeypatch):
+    created = []
+    images = []
+
+    class FakeAPI:
+        def __init__(self, lang):
+            created.append(lang)
+
+        def SetImageBytes(self, data, width, height, bpp, bpl):
+            images.append((len(data), width, height, bpp, bpl))
+
+        def Recognize(self):
+            pass
+
+        def GetTSVText(self, page):
+            return "\n".join(ROWS)
+
+    monkeypatch.setitem(__import__("sys").modules, "tesserocr", types.SimpleNamespace(PyTessBaseAPI=FakeAPI))
+    monkeypatch.setattr(tess_engine, "OCR_ENGINE", "tesserocr")
+    monkeypatch.setattr(tess_engine, "_local", __import__("threading").local())
+    img = np.zeros((30, 50), dtype=np.uint8)
+    assert len(recognize(img)) == 7
+    assert len(recognize(img[:, :40])) == 7
+    assert created == ["eng"]
+    assert images == [(1500, 50, 30, 1, 50), (1200, 40, 30, 1, 40)]
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from construction_scheduler.graph import TaskGraph
+from construction_scheduler.risk import simulate
+from construction_scheduler.schedule import Schedule
+
+TASKS_YAML = """
+- {task_id: A, name: Long lead, duration_days: 10, duration_min: 8, duration_max: 20}
+- {task_id: B, name: Short lead, duration_days: 10, duration_min: 9, duration_max: 12}
+- {task_id: C, name: Assembly, duration_days: 5, dependencies: [A, B]}
+"""
+
+
+def _graph():
+    rng = np.random.default_rng(11)
+    n, m = 300, 900
+    src = rng.integers(0, n - 1, m)
+    dst = np.minimum(src + rng.integers(1, 20, m), n - 1)
+    return TaskGraph([f"T{i}" for i in range(n)], rng.integers(1, 10, n), src, dst)
+
+
+def test_fixed_durations_reproduce_cpm():
+    graph = _graph()
+    cpm = graph.analyse()
+    d = graph.duration
+    risk = simulate(graph, d, d, d, iterations=50, seed=0)
+    assert np.allclose(risk.completion, cpm.project_duration)
+    assert risk.criticality.tolist() == cpm.critical.astype(float).tolist()
+
+
+def test_pinned_starts_before_day_zero_are_kept():
+    graph = TaskGraph(["A", "B"], [5, 3], [0], [1])
+    risk = simulate(graph, [5, 3], [5, 3], [5, 3], iterations=10, seed=0, fixed_start={0: -2})
+    assert np.allclose(risk.completion, 6)
+
+
+def test_results_do_not_depend_on_chunking_or_workers():
+    graph = _graph()
+    d = graph.duration
+    one = simulate(graph, d * 0.5, d, d * 2, iterations=600, seed=5, chunk_scenarios=200)
+    many = simulate(graph, d * 0.5, d, d * 2, iterations=600, seed=5, chunk_scenarios=200, workers=2)
+    assert one.completion.tolist() == many.completion.tolist()
+    assert one.criticality.tolist() == many.criticality.tolist()
+    assert one.percentile(50) >= graph.analyse().project_duration
+
+
+def test_schedule_simulation_from_yaml(tmp_path):
+    path = tmp_path / "tasks.yaml"
+    path.write_text(TASKS_YAML)
+    sched = Schedule.from_yaml(path)
+    risk = sched.simulate(4000, seed=1)
+    p = risk.percentiles()
+    assert p[10] <= p[50] <= p[80] <= p[90] <= 25
+    # A's range is skewed late, so it usually drives the finish; C always does
+    critical = dict(risk.most_critical())
+    assert critical["C"] == 1.0
+    assert critical["A"] > 0.6 > critical["B"]
+    assert critical["A"] + critical["B"] == pytest.approx(1.0, abs=0.01)
+    assert risk.probability_within(sched.cpm.project_duration) < 0.2
+
+
+def test_bad_range_is_rejected():
+    graph = TaskGraph(["A"], [5], [], [])
+    with pytest.raises(ValueError, match="duration_min"):
+        simulate(graph, [6], [5], [8])
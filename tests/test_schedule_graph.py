@@ -0,0 +1,47 @@
+import sys
+
+import pytest
+
+from construction_scheduler.graph import CycleError, TaskGraph
+from construction_scheduler.schedule import Schedule, Task
+
+
+def _graph():
+    # A(3) -> B(2) -> D(4); A -> C(1) -> D; C -> E(1)
+    durations = {"A": 3, "B": 2, "C": 1, "D": 4, "E": 1}
+    deps = {"B": ["A"], "C": ["A"], "D": ["B", "C"], "E": ["C"]}
+    return TaskGraph.from_dependencies(durations, deps)
+
+
+def test_forward_backward_pass_and_float():
+    g = _graph()
+    r = g.analyse()
+    assert r.project_duration == 9
+    assert r.early_start.tolist() == [0, 3, 3, 5, 4]
+    assert r.late_start.tolist() == [0, 3, 4, 5, 8]
+    assert r.total_float.tolist() == [0, 0, 1, 0, 4]
+    assert r.free_float.tolist() == [0, 0, 0, 0, 4]  # C pushes E directly
+    assert [g.ids[i] for i in g.critical_path(r)] == ["A", "B", "D"]
+
+
+def test_cycle_is_reported_with_its_tasks():
+    g = TaskGraph.from_dependencies({"A": 1, "B": 1, "C": 1, "D": 1}, {"A": ["C"], "B": ["A"], "C": ["B"]})
+    with pytest.raises(CycleError) as ex:
+        g.analyse()
+    assert ex.value.cycle == ["B", "C", "A"]
+    assert "B -> C -> A -> B" in str(ex.value)
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="unknown task X"):
+        TaskGraph.from_dependencies({"A": 1}, {"A": ["X"]})
+
+
+def test_schedule_handles_chains_deeper_than_recursion_limit():
+    n = sys.getrecursionlimit() * 2
+    tasks = {f"T{i}": Task(f"T{i}", f"Task {i}", 1, [f"T{i - 1}"] if i else []) for i in range(n)}
+    sched = Schedule(tasks)
+    sched._compute_baseline()
+    last = tasks[f"T{n - 1}"]
+    assert (last.planned_end - tasks["T0"].planned_start).days == n
+    assert len(sched.critical_path()) == n
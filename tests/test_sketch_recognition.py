@@ -0,0 +1,87 @@
+import cv2
+import numpy as np
+
+from bbs_tool.extract.ocr_extractor import attach_sketches, parse_bbs_lines, parse_ocr_table, sketch_token
+from bbs_tool.extract.tess_engine import OCRWords
+from bbs_tool.extract.tiled_ocr import merge_words_into_lines
+from bbs_tool.recognition import sketch
+from bbs_tool.recognition.sketch import Sketch, recognize_sketches
+
+ROW_PX = 110
+# Polylines in a 200 x 70 box; proportions differ from the templates on purpose
+DRAWN = {
+    "STRAIGHT": ([(0, 35), (170, 35)], False),
+    "L_90": ([(0, 0), (0, 60), (130, 60)], False),
+    "L_135": ([(0, 60), (110, 60), (150, 20)], False),
+    "U_135_OPEN": ([(0, 0), (0, 30), (190, 30), (190, 0)], False),
+    "STIRRUP_RECT": ([(0, 0), (90, 0), (90, 65), (0, 65)], True),
+}
+
+
+def _sheet(shapes):
+    """A BBS table: mark | dia | sketch | dims, one row per shape, black on white."""
+    edges = [20, 140, 220, 480, 640]
+    img = np.full((len(shapes) * ROW_PX + 40, 660), 255, np.uint8)
+    for r in range(len(shapes) + 1):
+        cv2.line(img, (20, 20 + r * ROW_PX), (640, 20 + r * ROW_PX), 0, 2)
+    for x in edges:
+        cv2.line(img, (x, 20), (x, 20 + len(shapes) * ROW_PX), 0, 2)
+    for r, shape in enumerate(shapes):
+        y = 20 + r * ROW_PX
+        cv2.putText(img, f"B{r}", (30, y + 60), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 0, 2)
+        cv2.putText(img, "A=1200", (490, y + 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+        points, closed = DRAWN[shape]
+        pts = np.array(points, dtype=np.int32) + [240, y + 20]
+        cv2.polylines(img, [pts], closed, 0, 2 + r % 3)
+    return img
+
+
+def test_sketches_are_classified_per_row_and_cached():
+    shapes = list(DRAWN) * 3
+    found = recognize_sketches(_sheet(shapes))
+    assert [s.shape for s in sorted(found, key=lambda s: s.y)] == shapes
+    assert all(240 <= s.x + s.width / 2 <= 460 for s in found)
+
+    hits = sketch._cache.hits
+    recognize_sketches(_sheet(shapes))
+    assert sketch._cache.hits >= hits + len(shapes)
+
+
+def test_blank_or_text_only_pages_have_no_sketches():
+    assert recognize_sketches(np.full((300, 400), 255, np.uint8)) == []
+    text_only = _sheet(["STRAIGHT"])
+    text_only[25:125, 225:475] = 255
+    assert recognize_sketches(text_only) == []
+
+
+def _words(rows):
+    """OCRWords with one Tesseract line per row of (left, top, text) words, 20 px high."""
+    cols = {name: [] for name in OCRWords.__dataclass_fields__}
+    for line, row in enumerate(rows):
+        for left, top, text in row:
+            for name, value in (("page", 1), ("block", 1), ("par", 1), ("line", line), ("left", left),
+                                ("top", top), ("width", 40), ("height", 20), ("conf", 95.0)):
+                cols[name].append(value)
+            cols["text"].append(text)
+    text = np.empty(len(cols["text"]), dtype=object)
+    text[:] = cols.pop("text")
+    return OCRWords(text=text, **{k: np.asarray(v) for k, v in cols.items()})
+
+
+def test_sketch_replaces_the_straight_fallback_but_not_a_label():
+    words = _words([
+        [(30, 50, "B1"), (150, 50, "12"), (500, 50, "QTY=2"), (560, 50, "A=1200")],
+        [(30, 160, "B2"), (150, 160, "16"), (420, 160, "L135"), (500, 160, "A=300"), (560, 160, "B=200")],
+    ])
+    sketches = [Sketch(220, 20, 260, 108, "L_90", 0.01), Sketch(220, 130, 260, 108, "U_135_OPEN", 0.02),
+                Sketch(220, 400, 260, 108, "STIRRUP_RECT", 0.02)]
+    items = parse_ocr_table(attach_sketches(words, sketches))
+    assert [(i.bar_mark, i.shape, i.quantity) for i in items] == [("B1", "L_90", 2), ("B2", "L_135", 1)]
+    assert parse_ocr_table(words)[0].shape == "STRAIGHT"
+
+    # Tiled pages carry the sketch as a positioned word merged into its row
+    tiled = [(0, 30, 50, 40, 20, "B1"), (0, 150, 50, 40, 20, "12"), (0, 560, 50, 40, 20, "A=1200"),
+             (0, 500, 50, 40, 20, "QTY=3"), (0, 220, 10, 260, 108, sketch_token("STIRRUP_RECT"))]
+    lines = merge_words_into_lines(tiled)
+    assert len(lines) == 1
+    assert parse_bbs_lines(lines)[0].shape == "STIRRUP_RECT"
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Generous ceilings for slow CI machines; the point is to catch a heavy
+# dependency creeping back into the startup path.
+SCHEDULER_IMPORT_BUDGET_S = 1.0
+API_IMPORT_BUDGET_S = 3.0
+
+
+def _importtime(*args):
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    modules, total_us = set(), 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        if not name[1:].startswith(" "):  # top-level import
+            total_us += int(cumulative)
+    return modules, total_us / 1e6
+
+
+@pytest.mark.parametrize("fmt", ["csv", "json"])
+def test_scheduler_csv_and_json_output_skip_pandas_and_matplotlib(fmt):
+    modules, seconds = _importtime("-m", "construction_scheduler", "sample_tasks.yaml", "--format", fmt)
+    assert not {"pandas", "matplotlib"} & modules
+    assert seconds < SCHEDULER_IMPORT_BUDGET_S
+
+
+def test_api_import_skips_ocr_stack():
+    modules, seconds = _importtime("-c", "import bbs_tool.main")
+    assert not {"cv2", "PIL", "pytesseract", "pandas"} & modules
+    assert seconds < API_IMPORT_BUDGET_S
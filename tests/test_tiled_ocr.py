@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from bbs_tool.extract.tiled_ocr import Tile, merge_words_into_lines, plan_tiles, render_pdf_tile
+
+
+def test_tile_cores_partition_the_page():
+    tiles = plan_tiles(0, 5100, 2300, size=2000, overlap=200)
+    assert all(t.x1 - t.x0 <= 2000 and t.y1 - t.y0 <= 2000 for t in tiles)
+    for x, y in [(0, 0), (1850, 10), (1900, 1900), (5099, 2299), (3500, 1799)]:
+        owners = [t for t in tiles if t.core[0] <= x < t.core[2] and t.core[1] <= y < t.core[3]]
+        assert len(owners) == 1
+        t = owners[0]
+        assert t.x0 <= x < t.x1 and t.y0 <= y < t.y1
+
+
+def test_merge_words_into_lines_across_tiles():
+    words = [
+        (0, 2100, 502, 80, 30, "A=1200"),
+        (0, 100, 500, 60, 30, "B1"),
+        (0, 400, 498, 40, 30, "12"),
+        (0, 100, 600, 60, 30, "B2"),
+        (1, 100, 500, 60, 30, "C1"),
+    ]
+    assert merge_words_into_lines(words) == ["B1 12 A=1200", "B2", "C1"]
+
+
+def test_skewed_rows_are_not_chained_together():
+    # Each row drifts 4 px per word; adjacent centres never differ by more than the tolerance
+    words = [(0, 50 * k, 10 + 4 * k, 40, 20, f"a{k}") for k in range(4)]
+    words += [(0, 50 * k, 30 + 4 * k, 40, 20, f"b{k}") for k in range(4)]
+    assert merge_words_into_lines(words) == ["a0 a1 a2 a3", "b0 b1 b2 b3"]
+
+
+def test_render_pdf_tile_only_renders_the_tile():
+    pdf = next(Path(__file__).resolve().parents[1].glob("natta150*Layout 1.pdf"))
+    gray = render_pdf_tile(str(pdf), Tile(0, 1000, 500, 1600, 900, (1000, 500, 1600, 900)), dpi=150)
+    assert gray.ndim == 2 and abs(gray.shape[0] - 400) <= 1 and abs(gray.shape[1] - 600) <= 1
@@ -0,0 +1,65 @@
+from fastapi.testclient import TestClient
+
+from bbs_tool.calc.batch import ItemColumns
+from bbs_tool.calc.stream import iter_calculation_events
+from bbs_tool.main import app
+from bbs_tool.models.schemas import BBSCalculationConfig, BBSItem
+from bbs_tool.validation.engine import BatchValidator
+from bbs_tool.validation.validators import validate_item
+
+
+def _item(mark, d=12, shape="L_90", **dims):
+    return BBSItem(bar_mark=mark, diameter_mm=d, shape=shape, dims_mm=dims or {"A": 600, "B": 400})
+
+
+def test_batch_rules_and_codes():
+    items = [
+        _item("B1"),
+        _item("B2", shape="L_90", A=600),
+        _item("B3", shape="Z_CRANK"),
+        _item("B1"),
+        _item("B2", d=16, A=600, B=30),
+    ]
+    issues = BatchValidator(BBSCalculationConfig()).validate(ItemColumns.from_items(items))
+    codes = {i: [issue.code for issue in row] for i, row in issues.items()}
+    assert codes == {
+        1: ["missing_dim"],
+        2: ["unsupported_shape"],
+        3: ["duplicate_mark"],
+        4: ["short_leg", "inconsistent_diameter"],
+    }
+    assert issues[4][1].message == "B2: diameter 16 mm differs from 12 mm on row 2"
+    assert issues[1][0].severity == "error" and issues[3][0].severity == "warning"
+
+
+def test_thresholds_come_from_config():
+    item = _item("B1", A=100, B=400)
+    assert BatchValidator(BBSCalculationConfig()).validate(ItemColumns.from_items([item])) == {}
+    strict = BBSCalculationConfig(min_leg_multiplier=10.0, min_bend_radius_multiplier=3.0, check_duplicate_marks=False)
+    issues = BatchValidator(strict).validate(ItemColumns.from_items([item, item]))
+    assert [issue.code for issue in issues[0]] == ["short_leg", "small_bend_radius"]
+    assert [issue.message for issue in issues[0]] == validate_item(item, strict)
+    assert [issue.code for issue in issues[1]] == ["short_leg", "small_bend_radius"]
+
+
+def test_duplicates_are_found_across_stream_chunks():
+    items = [_item(f"M{i % 150}") for i in range(300)]
+    warnings = [payload for chunk in iter_calculation_events(items, BBSCalculationConfig(), chunk_size=100)
+                for kind, payload in chunk if kind == "warning"]
+    assert len(warnings) == 150
+    assert warnings[0] == "M0: bar mark repeats row 1"
+
+
+def test_validate_endpoint_and_calculate_use_the_same_checks():
+    client = TestClient(app)
+    items = [
+        {"bar_mark": "S1", "diameter_mm": 12, "shape": "STRAIGHT", "dims_mm": {"A": 3000}},
+        {"bar_mark": "S1", "diameter_mm": 12, "shape": "STRAIGHT", "dims_mm": {}},
+    ]
+    body = client.post("/api/validate", json={"items": items}).json()
+    assert body["counts"] == {"missing_dim": 1, "duplicate_mark": 1}
+    assert body["issues"][0] == {"row": 1, "bar_mark": "S1", "code": "missing_dim", "severity": "error",
+                                 "message": "S1: STRAIGHT requires dim A (centreline length in mm)"}
+    calc = client.post("/api/calculate", json={"items": items}).json()
+    assert calc["warnings"] == [issue["message"] for issue in body["issues"]]
+    assert len(calc["results"]) == 1
@@ -0,0 +1,72 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+from bbs_tool.calc.batch import calculate_batch
+from bbs_tool.calc.whatif import evaluate_configs
+from bbs_tool.main import app
+from bbs_tool.models.schemas import BBSCalculationConfig, BBSItem
+
+
+client = TestClient(app)
+
+SHAPES = ["STRAIGHT", "L_90", "L_135", "U_135_OPEN", "STIRRUP_RECT", "Z_CRANK", "l"]
+
+
+def _items(n, seed=3):
+    rng = np.random.default_rng(seed)
+    items = []
+    for i in range(n):
+        dims = {"A": float(rng.uniform(50, 3000)), "B": float(rng.uniform(50, 3000))}
+        if i % 17 == 0:
+            dims.pop("B")
+        items.append(BBSItem(bar_mark=f"M{i}", diameter_mm=float(rng.choice([8, 10, 12.5, 16, 25])),
+                             shape=str(rng.choice(SHAPES)), dims_mm=dims, quantity=int(rng.integers(1, 20))))
+    return items
+
+
+CONFIGS = [
+    BBSCalculationConfig(),
+    BBSCalculationConfig(default_bend_radius_multiplier=4.0),
+    BBSCalculationConfig(hook_extension_multipliers={"90": 8.0, "135": 10.0, "180": 4.0}),
+    BBSCalculationConfig(unit_weight_formula="DENSITY_PI_R2"),
+]
+
+
+def test_every_config_matches_a_plain_calculation():
+    items = _items(500)
+    result = evaluate_configs(items, CONFIGS)
+    for c, config in enumerate(CONFIGS):
+        plain = calculate_batch(items, config)
+        assert np.array_equal(result.ok, plain.ok)
+        assert np.array_equal(result.cutting_length_mm[c], plain.cutting_length_mm, equal_nan=True)
+        assert np.array_equal(result.total_weight_kg[c], plain.total_weight_kg, equal_nan=True)
+
+    diameters, length, weight = result.totals_by_diameter()
+    plain = calculate_batch(items, CONFIGS[1])
+    for k, d in enumerate(diameters.tolist()):
+        rows = plain.ok & (plain.columns.diameter_mm == d)
+        assert np.isclose(weight[1, k], plain.total_weight_kg[rows].sum())
+
+
+def test_what_if_endpoint_reports_totals_and_deltas():
+    items = [
+        {"bar_mark": "S1", "diameter_mm": 12, "shape": "STRAIGHT", "dims_mm": {"A": 3000}, "quantity": 2},
+        {"bar_mark": "L1", "diameter_mm": 16, "shape": "L_90", "dims_mm": {"A": 600, "B": 400}},
+        {"bar_mark": "X1", "diameter_mm": 10, "shape": "Z_CRANK", "dims_mm": {"A": 900}},
+    ]
+    configs = [{}, {"default_bend_radius_multiplier": 4.0}]
+    res = client.post("/api/what-if", json={"items": items, "configs": configs}).json()
+    assert [c["index"] for c in res["configs"]] == [0, 1]
+    assert res["warnings"] == ["X1: unsupported shape Z_CRANK"]
+
+    base, wider = res["configs"]
+    assert base["item_deltas"]["bar_mark"] == [] and base["weight_delta_kg"] == 0
+    # A straight bar has no bend, so only L1 changes
+    assert wider["item_deltas"]["bar_mark"] == ["L1"] and wider["item_deltas"]["row"] == [1]
+    assert wider["item_deltas"]["cutting_length_mm"][0] > 0
+    plain = client.post("/api/calculate", json={"items": items, "config": configs[1]}).json()
+    by_diameter = {row["diameter_mm"]: row["total_weight_kg"] for row in wider["by_diameter"]}
+    assert by_diameter == {r["diameter_mm"]: r["total_weight_kg"] for r in plain["results"]}
+
+    bad = client.post("/api/what-if", json={"items": items, "configs": configs, "base": 2})
+    assert bad.status_code == 422
@@ -0,0 +1,114 @@
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from construction_scheduler.schedule import Schedule
+from construction_scheduler.workdays import WorkCalendar
+
+TASKS_YAML = """
+start_date: 2026-11-02
+calendar: site
+calendars:
+  site:
+    weekmask: Mon Tue Wed Thu Fri Sat
+    holidays: [2026-11-09]
+    shutdowns:
+      - {from: 2026-12-21, to: 2027-01-03}
+  crane_crew:
+    weekmask: Mon Tue Wed Thu Fri
+    holidays: [2026-11-09]
+resources:
+  crane: {units: 1, calendar: crane_crew}
+  crew: 4
+tasks:
+  - {task_id: EXC, name: Excavation, duration_days: 10, resources: {crew: 2}}
+  - {task_id: FTG, name: Footings, duration_days: 7, dependencies: [EXC], resources: {crane: 1}}
+  - {task_id: COL, name: Columns, duration_days: 30, dependencies: [FTG]}
+"""
+
+
+def test_index_converts_between_days_and_workdays():
+    cal = WorkCalendar("site", "Mon Tue Wed Thu Fri Sat", [date(2026, 11, 4)])
+    index = cal.index(date(2026, 11, 2))  # a Monday
+    assert index.day_of([0, 1, 2, 4, 5]).tolist() == [0, 1, 3, 5, 7]
+    # A holiday or Sunday maps to the next working day's ordinal
+    assert index.workday_of([2, 6, 7]).tolist() == [2, 5, 5]
+    assert index.finish_day([0, 3], [7, 0]).tolist() == [9, 4]
+
+    # Lookups beyond the precomputed horizon extend it
+    far = index.day_of(5000)
+    assert index.workday_of(far) == 5000
+    days = np.arange(int(far) + 1)
+    working = np.is_busday(np.datetime64("2026-11-02") + days, weekmask="1111110", holidays=["2026-11-04"])
+    assert int(np.flatnonzero(working)[5000]) == int(far)
+
+
+def test_yaml_calendars_shape_the_dates(tmp_path):
+    path = tmp_path / "tasks.yaml"
+    path.write_text(TASKS_YAML)
+    sched = Schedule.from_yaml(path)
+    tasks = sched.tasks
+    assert tasks["FTG"].calendar == "crane_crew"
+    # 10 site days from Mon 2 Nov, skipping Sunday 8 and the 9 Nov holiday
+    assert tasks["EXC"].planned_start == datetime(2026, 11, 2)
+    assert tasks["EXC"].planned_end == datetime(2026, 11, 14)
+    # The crane crew does not work Saturdays: 7 days run Mon 16 - Tue 24 Nov
+    assert tasks["FTG"].planned_start == datetime(2026, 11, 16)
+    assert tasks["FTG"].planned_end == datetime(2026, 11, 25)
+    # 30 site days from Wed 25 Nov stop for the shutdown and finish in January
+    assert tasks["COL"].planned_start == datetime(2026, 11, 25)
+    assert tasks["COL"].planned_end == datetime(2027, 1, 13)
+    assert sched.date_after(sched.cpm.project_duration) == tasks["COL"].planned_end
+
+    # Reported on Sunday 8 Nov: the 5 days left start on Tue 10 (Monday is a holiday)
+    dpr = pd.DataFrame({"date": [pd.Timestamp("2026-11-08")], "activity": ["EXC"], "progress": [50]})
+    assert sched.apply_progress(dpr) == ["EXC", "FTG"]
+    assert tasks["EXC"].planned_end == datetime(2026, 11, 15)
+    # FTG is now ready on Monday instead of Saturday; the crane crew starts Monday either way
+    assert (tasks["FTG"].planned_start, tasks["FTG"].planned_end) == (datetime(2026, 11, 16), datetime(2026, 11, 25))
+    assert tasks["COL"].planned_end == datetime(2027, 1, 13)
+
+
+SHUTDOWN_YAML = """
+start_date: 2026-01-01
+calendars:
+  site:
+    shutdowns:
+      - {from: 2026-01-15, to: 2026-01-24}
+resources:
+  crane: 1
+tasks:
+  - {task_id: P, name: Piling, duration_days: 5}
+  - {task_id: A, name: Erection, duration_days: 14, resources: {crane: 1}}
+  - {task_id: S, name: Slab, duration_days: 5, dependencies: [P], calendar: site}
+  - {task_id: B, name: Bracing, duration_days: 5, calendar: site, resources: {crane: 1}}
+"""
+
+
+def test_own_calendar_span_follows_the_task_when_it_moves(tmp_path):
+    path = tmp_path / "tasks.yaml"
+    path.write_text(SHUTDOWN_YAML)
+    sched = Schedule.from_yaml(path)
+    assert sched.tasks["S"].planned_end == datetime(2026, 1, 11)
+    # Piling reported half done on 9 Jan: the slab starts on 12 Jan and stops for the shutdown
+    dpr = pd.DataFrame({"date": [pd.Timestamp("2026-01-09")], "activity": ["P"], "progress": [50]})
+    assert sched.apply_progress(dpr) == ["P", "S"]
+    assert (sched.tasks["S"].planned_start, sched.tasks["S"].planned_end) == (datetime(2026, 1, 12),
+                                                                               datetime(2026, 1, 27))
+    assert sched.cpm.project_duration == 26
+
+    # Leveled, bracing waits for the crane until 15 Jan, then for the shutdown
+    leveled = Schedule.from_yaml(path, mode="leveled")
+    bracing = leveled.tasks["B"]
+    assert (bracing.planned_start, bracing.planned_end) == (datetime(2026, 1, 25), datetime(2026, 1, 30))
+
+
+def test_default_calendar_keeps_calendar_day_arithmetic(tmp_path):
+    path = tmp_path / "tasks.yaml"
+    path.write_text("- {task_id: A, name: A, duration_days: 3}\n"
+                    "- {task_id: B, name: B, duration_days: 4, dependencies: [A]}\n")
+    sched = Schedule.from_yaml(path)
+    start = sched.start_date
+    assert (sched.tasks["B"].planned_start - start).days == 3
+    assert (sched.tasks["B"].planned_end - start).days == 7
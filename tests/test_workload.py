@@ -0,0 +1,19 @@
+from benchmarks.workload import generate_csv, generate_rows
+
+from fastapi.testclient import TestClient
+from bbs_tool.main import app
+
+
+def test_workload_is_deterministic():
+    assert generate_rows(200, seed=3) == generate_rows(200, seed=3)
+    assert generate_rows(200, seed=3) != generate_rows(200, seed=4)
+
+
+def test_malformed_rows_become_warnings():
+    client = TestClient(app)
+    body = generate_csv(300, seed=5, malformed_ratio=0.1).encode()
+    r = client.post("/api/extract", data={"source_type": "csv"}, files={"file": ("s.csv", body)})
+    data = r.json()
+    assert r.status_code == 200
+    assert data["warnings"]
+    assert len(data["items"]) + len(data["warnings"]) == 300